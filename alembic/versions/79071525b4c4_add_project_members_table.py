@@ -0,0 +1,45 @@
+"""Add project_members table backfilled from owners/members arrays
+
+Revision ID: 79071525b4c4
+Revises: 16f81f296db3
+Create Date: 2026-10-18 09:12:41.508214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '79071525b4c4'
+down_revision: Union[str, None] = '16f81f296db3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('project_members',
+    sa.Column('project_id', sa.UUID(), nullable=False),
+    sa.Column('username', sa.String(), nullable=False),
+    sa.Column('role', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('project_id', 'username', 'role')
+    )
+    op.create_index('ix_project_members_username_role', 'project_members', ['username', 'role', 'project_id'], unique=False)
+
+    op.execute("""
+        INSERT INTO project_members (project_id, username, role)
+        SELECT DISTINCT id, username, role
+        FROM (
+            SELECT id, unnest(owners) AS username, 'owner' AS role FROM projects
+            UNION ALL
+            SELECT id, unnest(members) AS username, 'member' AS role FROM projects
+        ) AS m
+        WHERE username IS NOT NULL AND username <> ''
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_project_members_username_role', table_name='project_members')
+    op.drop_table('project_members')
@@ -0,0 +1,26 @@
+"""Add projects.version
+
+Revision ID: a5e1c7d94b20
+Revises: 3f0c9d2a7b15
+Create Date: 2026-10-18 13:02:44.180257
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5e1c7d94b20'
+down_revision: Union[str, None] = '3f0c9d2a7b15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('projects', sa.Column('version', sa.BigInteger(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('projects', 'version')
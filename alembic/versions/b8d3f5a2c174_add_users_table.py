@@ -0,0 +1,43 @@
+"""Add users table
+
+Revision ID: b8d3f5a2c174
+Revises: e4a6b1f07c92
+Create Date: 2026-10-18 18:12:31.504217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d3f5a2c174'
+down_revision: Union[str, None] = 'e4a6b1f07c92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Deployments that predate this migration already have the table, made by
+    # create_all at startup
+    if sa.inspect(op.get_bind()).has_table('users'):
+        return
+    op.create_table('users',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('username', sa.String(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('password', sa.String(), nullable=False),
+    sa.Column('role', sa.String(), server_default='user', nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email'),
+    sa.UniqueConstraint('username')
+    )
+
+
+def downgrade() -> None:
+    # Left in place: upgrade may have found the table rather than created it,
+    # and nothing records which. Dropping it could destroy users that predate
+    # this revision; upgrading again skips the existing table.
+    pass
@@ -0,0 +1,34 @@
+"""Add tasks.comment_count
+
+Revision ID: c3b8e2f41a67
+Revises: a5e1c7d94b20
+Create Date: 2026-10-18 13:41:19.556023
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3b8e2f41a67'
+down_revision: Union[str, None] = 'a5e1c7d94b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tasks', sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+    # Backfill from the existing comments
+    op.execute(
+        """
+        UPDATE tasks SET comment_count = counts.n
+        FROM (SELECT task_id, count(*) AS n FROM comments GROUP BY task_id) AS counts
+        WHERE tasks.id = counts.task_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('tasks', 'comment_count')
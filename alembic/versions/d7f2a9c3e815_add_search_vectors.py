@@ -0,0 +1,44 @@
+"""Add full-text search vectors to tasks and comments
+
+Revision ID: d7f2a9c3e815
+Revises: c3b8e2f41a67
+Create Date: 2026-10-18 15:12:36.402871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7f2a9c3e815'
+down_revision: Union[str, None] = 'c3b8e2f41a67'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TASK_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+COMMENT_SEARCH_VECTOR = "to_tsvector('english', coalesce(content, ''))"
+
+
+def upgrade() -> None:
+    # Stored generated columns: adding them rewrites both tables once
+    op.add_column('tasks', sa.Column(
+        'search_vector', postgresql.TSVECTOR(), sa.Computed(TASK_SEARCH_VECTOR, persisted=True), nullable=True
+    ))
+    op.add_column('comments', sa.Column(
+        'search_vector', postgresql.TSVECTOR(), sa.Computed(COMMENT_SEARCH_VECTOR, persisted=True), nullable=True
+    ))
+    op.create_index('ix_tasks_search_vector', 'tasks', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_comments_search_vector', 'comments', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_comments_search_vector', table_name='comments', postgresql_using='gin')
+    op.drop_index('ix_tasks_search_vector', table_name='tasks', postgresql_using='gin')
+    op.drop_column('comments', 'search_vector')
+    op.drop_column('tasks', 'search_vector')
@@ -0,0 +1,39 @@
+"""Add indexes for task and comment lookups
+
+Revision ID: e4a6b1f07c92
+Revises: d7f2a9c3e815
+Create Date: 2026-10-18 16:02:47.318904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a6b1f07c92'
+down_revision: Union[str, None] = 'd7f2a9c3e815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# users.username needs nothing: its unique constraint is already an index
+INDEXES = [
+    ('ix_tasks_project_id_created_at', 'tasks', ['project_id', 'created_at', 'id']),
+    ('ix_tasks_project_id_status', 'tasks', ['project_id', 'status']),
+    ('ix_tasks_assignee_created_at', 'tasks', ['assignee', 'created_at', 'id']),
+    ('ix_comments_task_id_created_at', 'comments', ['task_id', 'created_at']),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY so a populated tasks table stays writable while they build;
+    # it cannot run inside the migration's transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
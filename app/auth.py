@@ -1,30 +1,191 @@
 from passlib.context import CryptContext
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
+from fastapi import HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+import asyncio
+import hashlib
+import os
+import threading
+import time
+import uuid
+from app.cache import TTLCache, BloomFilter
+from app.invalidation import bus, record
+from app.models import RevokedToken
 
 SECRET_KEY = "TaskAPi"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+REVOCATION_FILTER_CAPACITY = int(os.getenv("REVOCATION_FILTER_CAPACITY", "100000"))
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", "5"))
+
+# bcrypt cost; hashes made with a different cost are rehashed on next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "64"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
+# Claims of tokens whose signature was already checked, keyed by token digest
+# and kept until the token's own exp.
+verified_tokens = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
 def hash_password(password: str):
     return pwd_context.hash(password)
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
+
+class PasswordHasher:
+    """Runs bcrypt on its own small thread pool with a bounded backlog.
+
+    Keeping hashing off the request threadpool means a login burst cannot
+    starve unrelated endpoints; once ``workers + max_pending`` jobs are in
+    flight new ones are refused with 503 instead of queueing without limit.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_QUEUE):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent logins, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(lambda _: self._slots.release())
+        return asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        return await self.submit(pwd_context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str):
+        # (valid, new_hash): new_hash is set when the stored hash uses an outdated cost
+        return await self.submit(pwd_context.verify_and_update, password, hashed_password)
+
+
+password_hasher = PasswordHasher()
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def decode_access_token(token: str):
+def decode_access_claims(token: str):
+    key = hashlib.sha256(token.encode()).digest()
+    claims = verified_tokens.get(key)
+    if claims is not None:
+        return claims
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload.get("sub")
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         return None
+    ttl = claims.get("exp", 0) - time.time()
+    if ttl > 0:
+        verified_tokens.set(key, claims, ttl=ttl)
+    return claims
+
+def decode_access_token(token: str):
+    claims = decode_access_claims(token)
+    return claims.get("sub") if claims else None
+
+
+class RevocationList:
+    """Revoked token ids (jti): an in-memory Bloom filter in front of revoked_tokens.
+
+    A jti that is not in the filter is certainly not revoked, so the common
+    check never reaches the database; filter hits are confirmed by primary
+    key. Revocations made by other workers arrive over the invalidation bus
+    and are also pulled in every ``sync_interval`` seconds, with a margin for
+    clock skew and slow commits, in case a notification was missed.
+    """
+
+    SYNC_MARGIN = timedelta(seconds=60)
+
+    def __init__(self, capacity: int = REVOCATION_FILTER_CAPACITY, sync_interval: float = REVOCATION_SYNC_SECONDS):
+        self.capacity = capacity
+        self.sync_interval = sync_interval
+        self._filter = BloomFilter(capacity)
+        self._synced_at = None
+        self._watermark = None
+        self._lock = threading.Lock()
+
+    def _sync(self, db) -> bool:
+        """Refresh the filter when it is due; False while it has never been
+        loaded and another caller is loading it."""
+        if self._synced_at is not None and time.monotonic() - self._synced_at < self.sync_interval:
+            return True
+        # Never wait for another caller's sync: in async mode that caller is a
+        # coroutine on this same thread, suspended in its query, and blocking
+        # on the lock would stall the event loop for good
+        if not self._lock.acquire(blocking=False):
+            return self._synced_at is not None
+        try:
+            if self._synced_at is not None and time.monotonic() - self._synced_at < self.sync_interval:
+                return True
+            rebuild = self._watermark is None or self._filter.count > self.capacity
+            bloom = BloomFilter(self.capacity) if rebuild else self._filter
+            started = datetime.utcnow()
+            q = db.query(RevokedToken.jti).filter(RevokedToken.expires_at > started)
+            if not rebuild:
+                q = q.filter(RevokedToken.revoked_at >= self._watermark - self.SYNC_MARGIN)
+            for (jti,) in q:
+                if jti not in bloom:
+                    bloom.add(jti)
+            self._filter = bloom
+            self._watermark = started
+            self._synced_at = time.monotonic()
+        finally:
+            self._lock.release()
+        return True
+
+    def may_be_revoked(self, jti: str) -> bool:
+        # False means "certainly not revoked" without touching the database
+        if not jti:
+            return False
+        if self._synced_at is None or time.monotonic() - self._synced_at >= self.sync_interval:
+            return True
+        return jti in self._filter
+
+    def is_revoked(self, db, jti: str) -> bool:
+        if not jti:
+            return False
+        if self._sync(db) and jti not in self._filter:
+            return False
+        return db.get(RevokedToken, jti) is not None
+
+    def revoke(self, db, jti: str, exp: int):
+        db.merge(RevokedToken(jti=jti, expires_at=datetime.utcfromtimestamp(exp)))
+        # Other workers add it to their filters right away (see add)
+        record(db, "token", jti)
+        db.commit()
+        self._filter.add(jti)
+
+    def add(self, jtis):
+        for jti in jtis:
+            self._filter.add(jti)
+
+    def expire(self):
+        # The next check syncs: revocations may have been missed
+        if self._synced_at is not None:
+            self._synced_at = float("-inf")
+
+    def reset(self):
+        with self._lock:
+            self._filter = BloomFilter(self.capacity)
+            self._synced_at = None
+            self._watermark = None
+
+
+revoked_tokens = RevocationList()
+bus.on("token", revoked_tokens.add)
+bus.on_resync(revoked_tokens.expire)
@@ -1,27 +1,30 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from app.database import get_db, run_db, session_scope
 from app import schemas, models
-from app.auth import hash_password, verify_password, create_access_token
+from app.auth import (
+    create_access_token,
+    password_hasher,
+    decode_access_claims,
+    oauth2_scheme,
+    revoked_tokens,
+)
 from app.schemas import UserResponse
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+async def _in_own_session(fn, *args):
+    # Own short-lived session: the pooled connection goes back before any hashing
+    async with session_scope() as db:
+        return await run_db(db, fn, *args)
 
-# ✅ Register User (Default role: user)
-@router.post("/register", response_model=UserResponse)
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    existing_user = db.query(models.User).filter(models.User.username == user.username).first()
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Username already exists")
 
-    hashed_password = hash_password(user.password)
+def _find_user(db: Session, username: str):
+    return db.query(models.User).filter(models.User.username == username).first()
+
+
+def _add_user(db: Session, user: schemas.UserCreate, hashed_password: str):
     new_user = models.User(
         username=user.username,
         email=user.email,
@@ -29,22 +32,64 @@ def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
         role="user"  # ✅ Default role is user
     )
     db.add(new_user)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        return None
     db.refresh(new_user)
+    return new_user
+
+
+def _store_password_hash(db: Session, user_id, hashed_password: str):
+    db.query(models.User).filter(models.User.id == user_id).update({"password": hashed_password})
+    db.commit()
+
+
+# ✅ Register User (Default role: user)
+@router.post("/register", response_model=UserResponse)
+async def register_user(user: schemas.UserCreate):
+    if await _in_own_session(_find_user, user.username):
+        raise HTTPException(status_code=400, detail="Username already exists")
+
+    hashed_password = await password_hasher.hash(user.password)
+    new_user = await _in_own_session(_add_user, user, hashed_password)
+    if new_user is None:
+        raise HTTPException(status_code=400, detail="Username or email already exists")
     return new_user  # ✅ This will auto return role via UserResponse schema
 
 # ✅ Login Route (return user with role)
 @router.post("/login")
-def login(user: schemas.UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.username == user.username).first()
+async def login(user: schemas.UserLogin):
+    db_user = await _in_own_session(_find_user, user.username)
+    if not db_user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-    if not db_user or not verify_password(user.password, db_user.password):
+    valid, new_hash = await password_hasher.verify_and_update(user.password, db_user.password)
+    if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    if new_hash:
+        # ✅ Transparently rehash with the configured cost
+        await _in_own_session(_store_password_hash, db_user.id, new_hash)
 
     access_token = create_access_token(data={"sub": str(db_user.id)})
 
     return {
         "access_token": access_token,
         "token_type": "bearer",
-        "user": UserResponse.from_orm(db_user)  # ✅ Returns full user with role
+        "user": UserResponse.model_validate(db_user)  # ✅ Returns full user with role
     }
+
+# ✅ Logout: revoke the presented token until it expires
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    claims = decode_access_claims(token)
+    if claims is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    if not claims.get("jti"):
+        # Issued before tokens had ids: nothing can revoke it, so say so
+        # rather than pretend the logout worked
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token cannot be revoked; it stays valid until it expires",
+        )
+    await run_db(db, revoked_tokens.revoke, claims["jti"], claims["exp"])
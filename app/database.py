@@ -1,19 +1,330 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.exc import InterfaceError, OperationalError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from fastapi.concurrency import run_in_threadpool
 from dotenv import load_dotenv
+from app.pool_stats import TimedQueuePool, TimedAsyncQueuePool, pool_status
+from contextlib import asynccontextmanager
+import asyncio
 import os
+import threading
+import time
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+# "sync": Session per request, DB work on Starlette's threadpool (default)
+# "async": AsyncSession on asyncpg, DB work on the event loop
+DB_MODE = os.getenv("DB_MODE", "sync")
+
+# Pool sizing is per process: each worker gets DB_POOL_SIZE + DB_MAX_OVERFLOW
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() in ("1", "true", "yes")
+# Server-side statement_timeout for every pooled connection; 0 disables it
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+# Optional read replica for GET handlers (see get_read_db)
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_CHECK_SECONDS = float(os.getenv("REPLICA_CHECK_SECONDS", "2"))
+REPLICA_CONNECT_TIMEOUT = int(os.getenv("REPLICA_CONNECT_TIMEOUT", "2"))
+
+
+def engine_options(asyncio: bool = False, connect_timeout: int = 0) -> dict:
+    connect_args = {}
+    options = {
+        "poolclass": TimedAsyncQueuePool if asyncio else TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if DB_STATEMENT_TIMEOUT_MS > 0:
+        if asyncio:
+            connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+        else:
+            connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+    if connect_timeout > 0:
+        connect_args["timeout" if asyncio else "connect_timeout"] = connect_timeout
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+# Engines are created by init_engines(): at application startup (the
+# lifespan in app.main) or on first use, never at import. Creating one opens
+# no connection, so a worker starts and serves whatever does not need the
+# database while the database is down; the schema is Alembic's business.
+_engine = None
+_SessionLocal = None
+_init_lock = threading.Lock()
+
+async_engine = None
+AsyncSessionLocal = None
+replica = None
+
+
+def init_engines():
+    global _engine, _SessionLocal, replica
+    with _init_lock:
+        if _engine is None:
+            if DATABASE_REPLICA_URL:
+                replica = Replica(DATABASE_REPLICA_URL)
+            engine = create_engine(DATABASE_URL, **engine_options())
+            _SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+            # Last, since get_engine() reads it without the lock
+            _engine = engine
+    return _engine
+
+
+def get_engine():
+    return _engine or init_engines()
+
+
+def get_sessionmaker():
+    if _SessionLocal is None:
+        init_engines()
+    return _SessionLocal
+
+
+async def dispose_engines():
+    # Closes pooled connections; the engines stay usable and reconnect on demand
+    if async_engine is not None:
+        await async_engine.dispose()
+    if replica is not None:
+        if replica.async_engine is not None:
+            await replica.async_engine.dispose()
+        replica.dispose()
+    if _engine is not None:
+        _engine.dispose()
+
+
+def __getattr__(name):
+    # database.engine / database.SessionLocal, as they were before they became lazy
+    if name == "engine":
+        return get_engine()
+    if name == "SessionLocal":
+        return get_sessionmaker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def pool_report() -> dict:
+    pools = {"primary": pool_status(get_engine().pool)}
+    if async_engine is not None:
+        pools["primary_async"] = pool_status(async_engine.sync_engine.pool)
+    report = {"pid": os.getpid(), "db_mode": DB_MODE, "pools": pools}
+    if replica is not None:
+        pools["replica"] = pool_status(replica.engine.pool)
+        if replica.async_engine is not None:
+            pools["replica_async"] = pool_status(replica.async_engine.sync_engine.pool)
+        report["replica"] = replica.status()
+    return report
+
+
+def on_replica(session) -> bool:
+    """Whether ``session`` (a Session, or an AsyncSession's sync_session)
+    reads from the replica, whose data may lag behind the primary."""
+    if replica is None:
+        return False
+    bind = session.get_bind()
+    return bind is replica.engine or (replica.async_engine is not None and bind is replica.async_engine.sync_engine)
+
+
+def async_database_url(url: str):
+    return make_url(url).set(drivername="postgresql+asyncpg")
+
+
+def get_async_sessionmaker():
+    # Created on first use so the sync mode never needs asyncpg installed
+    global async_engine, AsyncSessionLocal
+    if AsyncSessionLocal is None:
+        async_engine = create_async_engine(async_database_url(DATABASE_URL), **engine_options(asyncio=True))
+        AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False)
+    return AsyncSessionLocal
+
+
+# Seconds the replica is behind. An idle primary writes no WAL, so a replica
+# that has replayed everything it received counts as current whatever the age
+# of its last replayed transaction. A server that is not in recovery is 0.
+REPLICA_LAG_SQL = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+
+class Replica:
+    """Second engine for reads that tolerate replication lag.
+
+    Whether it is used is decided from a lag probe that runs at most every
+    REPLICA_CHECK_SECONDS; while it is unreachable or more than max_lag
+    seconds behind, get_read_db hands out primary sessions instead.
+    """
+
+    def __init__(self, url: str, max_lag: float = REPLICA_MAX_LAG_SECONDS,
+                 check_seconds: float = REPLICA_CHECK_SECONDS):
+        self.url = url
+        self.max_lag = max_lag
+        self.check_seconds = check_seconds
+        self.engine = create_engine(url, **engine_options(connect_timeout=REPLICA_CONNECT_TIMEOUT))
+        self.SessionLocal = sessionmaker(bind=self.engine, autoflush=False, autocommit=False)
+        self.async_engine = None
+        self.AsyncSessionLocal = None
+        self.lag = None
+        self.healthy = False
+        self.checked_at = None
+        self.error = None
+        self._probing = False
+
+    def get_async_sessionmaker(self):
+        if self.AsyncSessionLocal is None:
+            self.async_engine = create_async_engine(
+                async_database_url(self.url),
+                **engine_options(asyncio=True, connect_timeout=REPLICA_CONNECT_TIMEOUT),
+            )
+            self.AsyncSessionLocal = async_sessionmaker(bind=self.async_engine, autoflush=False)
+        return self.AsyncSessionLocal
+
+    def _due(self) -> bool:
+        return self.checked_at is None or time.monotonic() - self.checked_at >= self.check_seconds
+
+    async def usable(self) -> bool:
+        # One request probes at a time; the others go by the last answer
+        # (the primary, before the first probe has finished)
+        if self._due() and not self._probing:
+            self._probing = True
+            try:
+                await self.check()
+            finally:
+                self._probing = False
+        return self.healthy
+
+    async def check(self):
+        try:
+            if DB_MODE == "async":
+                self.get_async_sessionmaker()
+                async with self.async_engine.connect() as conn:
+                    lag = (await conn.execute(REPLICA_LAG_SQL)).scalar()
+            else:
+                lag = await run_in_threadpool(self._probe)
+        except (SQLAlchemyError, OSError, asyncio.TimeoutError) as e:
+            self.mark_unavailable(e)
+            return
+        self.lag = float(lag)
+        self.healthy = self.lag <= self.max_lag
+        self.error = None if self.healthy else f"lag {self.lag:.1f}s exceeds {self.max_lag:g}s"
+        self.checked_at = time.monotonic()
+
+    def _probe(self):
+        with self.engine.connect() as conn:
+            return conn.execute(REPLICA_LAG_SQL).scalar()
+
+    def mark_unavailable(self, error=None):
+        # Readers go to the primary until the next probe succeeds
+        self.healthy = False
+        self.lag = None
+        self.error = str(error).splitlines()[0] if error else "unavailable"
+        self.checked_at = time.monotonic()
+
+    def status(self) -> dict:
+        return {"healthy": self.healthy, "lag_s": self.lag, "max_lag_s": self.max_lag, "error": self.error}
+
+    def dispose(self):
+        self.engine.dispose()
+
+
+
+@asynccontextmanager
+async def _open_session(sync_factory, get_async_factory):
+    if DB_MODE == "async":
+        async with get_async_factory()() as db:
+            yield db
+        return
+    db = sync_factory()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        # run_db already returned the connection, so this does no I/O
+        db.close()
+
+
+async def get_db():
+    async with _open_session(get_sessionmaker(), get_async_sessionmaker) as db:
+        yield db
+
+
+async def get_read_db():
+    """Session for GET handlers: the replica while it is usable, else the primary.
+
+    Anything that writes, or reads back its own write, keeps using get_db.
+    """
+    factory = get_sessionmaker()
+    if replica is None or not await replica.usable():
+        async with _open_session(factory, get_async_sessionmaker) as db:
+            yield db
+        return
+    async with _open_session(replica.SessionLocal, replica.get_async_sessionmaker) as db:
+        try:
+            yield db
+        except (OperationalError, InterfaceError, OSError) as e:
+            # Connection-level failure: this request fails, the next ones
+            # read from the primary until a probe finds the replica again
+            replica.mark_unavailable(e)
+            raise
+
+
+async def read_session_factory():
+    """Session factory for long reads outside the request's session (exports),
+    following the same replica choice as get_read_db."""
+    factory = get_sessionmaker()
+    if replica is not None and await replica.usable():
+        return replica.get_async_sessionmaker() if DB_MODE == "async" else replica.SessionLocal
+    return get_async_sessionmaker() if DB_MODE == "async" else factory
+
+
+# Same session as the get_db dependency, for code that needs one outside it
+session_scope = asynccontextmanager(get_db)
+
+
+async def run_db(db, fn, *args, **kwargs):
+    """Call ``fn(session, *args, **kwargs)`` with the request's session.
+
+    Repository, service and access-check code stays plain synchronous
+    SQLAlchemy. With an AsyncSession it runs through ``run_sync`` on the
+    asyncpg connection (SQLAlchemy's greenlet bridge, no thread); with a
+    Session it runs on the threadpool and the session is closed afterwards.
+    Whatever ``fn`` returns must be fully loaded: lazy loads are not possible
+    once it has returned.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(_run_and_release, db, fn, *args, **kwargs)
+
+
+async def release_db(db):
+    """Give the request session's connection back now, for handlers that keep
+    running long after their last query (event streams). A Session already
+    gave it back in run_db; an AsyncSession holds it until closed."""
+    if isinstance(db, AsyncSession):
+        await db.close()
+
+
+def _run_and_release(db, fn, *args, **kwargs):
+    # Give the connection back to the pool from the worker thread that used
+    # it. Closing later on the event loop would either block the loop or need
+    # a second thread, and with every thread waiting on the pool that second
+    # thread never comes. The session stays usable for a later run_db call.
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
@@ -1,23 +1,104 @@
+import os
+from typing import NamedTuple
 from fastapi import Depends, HTTPException, status
+from sqlalchemy import event, func, select
 from sqlalchemy.orm import Session
 from uuid import UUID
-from app.database import get_db
-from app.auth import decode_access_token, oauth2_scheme
-from app.models import User, Project, Task
+from app import database, invalidation
+from app.cache import TTLCache
+from app.database import get_db, run_db
+from app.auth import decode_access_claims, oauth2_scheme, revoked_tokens
+from app.models import User, Project, Task, ProjectMember
 
-# ✅ Get current user from token
-def get_current_user(
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PROJECT_CACHE_TTL = float(os.getenv("PROJECT_CACHE_TTL", "300"))
+PROJECT_CACHE_SIZE = int(os.getenv("PROJECT_CACHE_SIZE", "10000"))
+
+
+# ✅ The user fields authorization needs, cached per token subject
+class Principal(NamedTuple):
+    id: UUID
+    username: str
+    role: str
+
+
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+
+def _load_principal(db: Session, user_id: str, jti: str, principal: Principal = None):
+    if revoked_tokens.is_revoked(db, jti):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
+
+    if principal is None:
+        generation = invalidation.bus.generation("user")
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        principal = Principal(user.id, user.username, user.role)
+        invalidation.bus.fill("user", principal_cache, user_id, principal, generation)
+    return principal
+
+
+# ✅ Get current user from token. With a cached principal and a token that is
+# certainly not revoked this never touches the database or the threadpool.
+async def get_current_user(
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme),
-) -> User:
-    user_id = decode_access_token(token)
+) -> Principal:
+    claims = decode_access_claims(token)
+    user_id = claims.get("sub") if claims else None
     if user_id is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
+    principal = principal_cache.get(user_id)
+    if principal is None or revoked_tokens.may_be_revoked(claims.get("jti")):
+        principal = await run_db(db, _load_principal, user_id, claims.get("jti"), principal)
+    return principal
+
+
+# ✅ Drop cached principals of updated or deleted users, here and (through the
+# invalidation bus, at commit) in every worker. Evicting again after commit
+# stops a concurrent request from re-caching the pre-commit row.
+@event.listens_for(Session, "after_flush")
+def _evict_changed_principals(session, flush_context):
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            principal_cache.pop(str(obj.id))
+            invalidation.record(session, "user", obj.id)
+
+
+def _evict_principals(user_ids):
+    for user_id in user_ids:
+        principal_cache.pop(user_id)
+
+
+invalidation.bus.on("user", _evict_principals)
+invalidation.bus.on_resync(principal_cache.clear)
+
+
+# ✅ Request-scoped loaders. The session lives for one request, so Session.get()
+# answers repeat lookups of a row from its identity map without another query:
+# an authorization check and the operation that follows share one fetch. The
+# identity map only holds weak references, so loaded rows are pinned in
+# db.info for the rest of the request.
+def _pin(db: Session, obj):
+    if obj is not None:
+        db.info.setdefault("loaded", {})[(type(obj), obj.id)] = obj
+    return obj
+
+
+def load_project(db: Session, project_id: UUID):
+    if project_id is None:
+        return None
+    return _pin(db, db.get(Project, project_id))
+
+
+def load_task(db: Session, task_id: UUID, project_id: UUID = None):
+    task = _pin(db, db.get(Task, task_id))
+    if task is not None and project_id is not None and task.project_id != project_id:
+        return None
+    return task
 
 
 # ✅ Admin Check
@@ -29,17 +110,93 @@ def require_admin(
     return current_user
 
 
-# ✅ Helper: Check if user is project owner
-def is_project_owner(project: Project, current_user: User):
-    owners = project.owners or []
-    return current_user.username in owners
+# ✅ Helper: Indexed membership lookup (project_members primary key)
+def has_project_role(db: Session, project_id: UUID, current_user: User, roles=("owner", "member")):
+    return db.query(
+        db.query(ProjectMember)
+        .filter(
+            ProjectMember.project_id == project_id,
+            ProjectMember.username == current_user.username,
+            ProjectMember.role.in_(roles),
+        )
+        .exists()
+    ).scalar()
+
+
+# ✅ Batch variant: {project_id: allowed} for every existing project among
+# project_ids, in one query however many items a batch has
+def project_access(db: Session, project_ids, current_user: User, roles=("owner", "member")):
+    project_ids = [pid for pid in set(project_ids) if pid is not None]
+    if not project_ids:
+        return {}
+    has_role = (
+        select(ProjectMember.project_id)
+        .where(
+            ProjectMember.project_id == Project.id,
+            ProjectMember.username == current_user.username,
+            ProjectMember.role.in_(roles),
+        )
+        .exists()
+    )
+    rows = db.execute(select(Project.id, has_role).where(Project.id.in_(project_ids)))
+    return {pid: current_user.role == "admin" or allowed for pid, allowed in rows}
+
+
+# ✅ Project.version and the usernames of its owners and members, cached for
+# conditional GETs. Every write to a project, its tasks or their comments
+# evicts it in all workers, so the cache is only used while this worker's
+# invalidation listener is connected, and never filled from a replica (which
+# may still be behind a write whose eviction has already happened).
+class ProjectViewers(NamedTuple):
+    version: int
+    participants: frozenset
+
+
+project_viewers = TTLCache(maxsize=PROJECT_CACHE_SIZE, ttl=PROJECT_CACHE_TTL)
 
 
+def _evict_projects(project_ids):
+    for project_id in project_ids:
+        project_viewers.pop(UUID(project_id))
+
+
+invalidation.bus.on("project", _evict_projects)
+invalidation.bus.on_resync(project_viewers.clear)
+
+
+# ✅ Version + view access for conditional GETs, in one statement on a cache
+# miss and none on a hit: no project or task rows are loaded (same rules as
+# require_project_view_access)
+def project_version_for_viewer(db: Session, project_id: UUID, current_user: User,
+                               detail: str = "You are not authorized to view this project"):
+    cacheable = invalidation.bus.connected and not database.on_replica(db)
+    viewers = project_viewers.get(project_id) if cacheable else None
+    if viewers is None:
+        generation = invalidation.bus.generation("project")
+        participants = (
+            select(func.array_agg(ProjectMember.username))
+            .where(ProjectMember.project_id == Project.id)
+            .scalar_subquery()
+        )
+        row = db.execute(select(Project.version, participants).where(Project.id == project_id)).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        viewers = ProjectViewers(row[0], frozenset(row[1] or ()))
+        if cacheable:
+            invalidation.bus.fill("project", project_viewers, project_id, viewers, generation)
+    if current_user.role != "admin" and current_user.username not in viewers.participants:
+        raise HTTPException(status_code=403, detail=detail)
+    return viewers.version
+
+
+# ✅ Helper: Check if user is project owner
+def is_project_owner(db: Session, project_id: UUID, current_user: User):
+    return has_project_role(db, project_id, current_user, ("owner",))
+
 
 # ✅ Helper: Check if user is project member
-def is_project_member(project: Project, current_user: User):
-    members = project.members or []
-    return current_user.username in members
+def is_project_member(db: Session, project_id: UUID, current_user: User):
+    return has_project_role(db, project_id, current_user, ("member",))
 
 
 # ✅ Admin or Owner check (For edit, delete project)
@@ -48,11 +205,11 @@ def require_admin_or_owner(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = load_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    if current_user.role == "admin" or is_project_owner(project, current_user):
+    if current_user.role == "admin" or is_project_owner(db, project_id, current_user):
         return current_user
 
     raise HTTPException(status_code=403, detail="Only admin or project owner can perform this action")
@@ -64,15 +221,11 @@ def require_project_view_access(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = load_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    if (
-        current_user.role == "admin"
-        or is_project_owner(project, current_user)
-        or is_project_member(project, current_user)
-    ):
+    if current_user.role == "admin" or has_project_role(db, project_id, current_user):
         return current_user
 
     raise HTTPException(status_code=403, detail="You are not authorized to view this project")
@@ -84,12 +237,12 @@ def require_owner_for_membership_change(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = load_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
     # ✅ Allow if admin or owner
-    if current_user.role != "admin" and not is_project_owner(project, current_user):
+    if current_user.role != "admin" and not is_project_owner(db, project_id, current_user):
         raise HTTPException(
             status_code=403,
             detail="Only project owners or admins can modify members or owners"
@@ -103,18 +256,18 @@ def require_task_update_access(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    task = db.query(Task).filter(Task.id == task_id).first()
+    task = load_task(db, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    project = db.query(Project).filter(Project.id == task.project_id).first()
+    project = load_project(db, task.project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
     if current_user.role == "admin":
         return current_user
 
-    if task.assignee != current_user.username and not is_project_owner(project, current_user):
+    if task.assignee != current_user.username and not is_project_owner(db, project.id, current_user):
         raise HTTPException(status_code=403, detail="Not authorized to update this task")
 
     return current_user
@@ -125,15 +278,15 @@ def require_admin_or_owner_by_task_id(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    task = db.query(Task).filter(Task.id == task_id).first()
+    task = load_task(db, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    project = db.query(Project).filter(Project.id == task.project_id).first()
+    project = load_project(db, task.project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    if current_user.role != "admin" and not is_project_owner(project, current_user):
+    if current_user.role != "admin" and not is_project_owner(db, project.id, current_user):
         raise HTTPException(status_code=403, detail="Only admin or project owner can delete this task")
 
     return current_user
@@ -145,15 +298,11 @@ def require_project_participant(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = load_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    if (
-        current_user.role == "admin"
-        or is_project_owner(project, current_user)
-        or is_project_member(project, current_user)
-    ):
+    if current_user.role == "admin" or has_project_role(db, project_id, current_user):
         return current_user
 
     raise HTTPException(status_code=403, detail="Only project participants can create tasks")
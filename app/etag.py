@@ -0,0 +1,26 @@
+import hashlib
+from uuid import UUID
+
+from fastapi import Response
+
+
+# Strong ETags from Project.version: every change to a project, its tasks or
+# their comments bumps the version, so (resource, project, version, query
+# parameters) identifies one exact response body.
+def project_etag(kind: str, project_id: UUID, version: int, *params) -> str:
+    digest = hashlib.sha256(repr((kind, params)).encode()).hexdigest()[:16]
+    return f'"{project_id.hex}-{version}-{digest}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison: ignore W/ prefixes
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
@@ -0,0 +1,79 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
+
+from app import events, models
+from app.database import get_db, release_db, run_db, session_scope
+from app.dependencies import get_current_user, require_project_view_access
+
+router = APIRouter()
+
+READY = b"retry: 3000\n\n" + events.make_event("ready").frame
+KEEPALIVE = b": keepalive\n\n"
+
+
+# ✅ Live task and comment changes of a project as Server-Sent Events (Admin /
+# Owner / Member). Events carry ids only: clients refetch what they show
+# through the usual endpoints, after "ready" and after every "resync".
+def _check_view_access(db: Session, project_id: UUID, current_user):
+    require_project_view_access(project_id, db, current_user)
+
+
+async def _can_view(project_id: UUID, current_user) -> bool:
+    # Membership has just changed, so ask the primary, not a replica
+    async with session_scope() as db:
+        try:
+            await run_db(db, _check_view_access, project_id, current_user)
+        except HTTPException:
+            return False
+    return True
+
+
+async def _stream(subscription: events.Subscription, project_id: UUID, current_user):
+    try:
+        yield READY
+        while True:
+            batch = await subscription.next_batch(events.SSE_KEEPALIVE_SECONDS)
+            if not batch:
+                yield KEEPALIVE
+                continue
+            frames = []
+            for event in batch:
+                if event.type == "project.members_changed" and not await _can_view(project_id, current_user):
+                    return
+                frames.append(event.frame)
+                if event.type == "project.deleted":
+                    yield b"".join(frames)
+                    return
+            yield b"".join(frames)
+    finally:
+        events.broker.unsubscribe(subscription)
+
+
+@router.get("/projects/{project_id}/events", response_class=StreamingResponse)
+async def project_events(
+    project_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    # Checked before the first byte, so refusals are still proper 403/404s
+    await run_db(db, _check_view_access, project_id, current_user)
+    # The stream holds no connection while it waits for events
+    await release_db(db)
+    # Subscribed before the response starts, so a full broker is a 503 the
+    # client backs off from, not an empty 200 it reconnects to at once
+    try:
+        subscription = events.broker.subscribe(project_id)
+    except events.TooManySubscribers:
+        raise HTTPException(status_code=503, detail="Too many event streams", headers={"Retry-After": "5"})
+    # The generator's finally only runs once it has started; the background
+    # task also covers a client gone before the first byte
+    return StreamingResponse(
+        _stream(subscription, project_id, current_user),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(events.broker.unsubscribe, subscription),
+    )
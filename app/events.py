@@ -0,0 +1,264 @@
+"""Task and comment change events for live clients (GET /projects/{id}/events).
+
+Changes are collected per session as they are flushed and published when the
+transaction commits, so a subscriber never hears of a write it cannot read
+yet, and never of one that was rolled back. Writes that go around the unit of
+work (batch and transition endpoints) record their events with ``record``.
+
+The Broker hands each event to the bounded queue of every subscription to its
+project; events committed by other workers arrive over the invalidation bus
+(app.invalidation). Publishing never waits for a subscriber; a subscriber
+whose queue is full loses its backlog (all but membership and deletion
+events) and gets one "resync" event instead, after which the client
+refetches what it shows. So does every stream when the bus may have missed
+notifications.
+"""
+import asyncio
+import os
+import threading
+from collections import deque
+from typing import NamedTuple, Optional
+from uuid import UUID
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from app.invalidation import bus
+from app.models import Comment, Project, Task
+from app.rows import dumps
+
+# Events buffered per connection before it is told to resync
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "100"))
+# A comment line is sent after this long without events, so proxies keep the
+# connection open and a vanished client is noticed
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+# Open event streams per worker process; further ones get a 503
+SSE_MAX_SUBSCRIBERS = int(os.getenv("SSE_MAX_SUBSCRIBERS", "10000"))
+
+
+class Event(NamedTuple):
+    type: str
+    project_id: Optional[UUID]
+    # The whole SSE message, encoded once for every subscriber
+    frame: bytes
+
+
+def make_event(kind: str, project_id: Optional[UUID] = None, **data) -> Event:
+    payload = dumps({"type": kind, "project_id": project_id, **data})
+    return Event(kind, project_id, b"event: " + kind.encode() + b"\ndata: " + payload + b"\n\n")
+
+
+RESYNC = make_event("resync")
+# Events after which a stream re-checks, or loses, access to its project
+CONTROL_EVENTS = frozenset({"project.members_changed", "project.deleted"})
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+class Subscription:
+    """Events queued for one stream. It is read in batches: whatever piled up
+    while the stream was writing goes out as one chunk, one socket write."""
+
+    def __init__(self, project_id: UUID, loop, maxsize: int):
+        self.project_id = project_id
+        self.loop = loop
+        self.maxsize = maxsize
+        self.events = deque()
+        self.overflowed = False
+        self._waiter = None
+
+    def put(self, event: Event) -> bool:
+        """Queue ``event`` (on self.loop); True when that overflowed the queue."""
+        overflow = False
+        if event.type in CONTROL_EVENTS:
+            # Never dropped: the stream must see that access may have changed
+            self.events.append(event)
+        elif self.overflowed:
+            return False
+        elif len(self.events) >= self.maxsize:
+            # This client refetches anyway: drop its backlog rather than
+            # buffer without bound or slow down the writers
+            self.overflowed = overflow = True
+            kept = [queued for queued in self.events if queued.type in CONTROL_EVENTS]
+            self.events.clear()
+            self.events.extend([RESYNC] + kept)
+        else:
+            self.events.append(event)
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+        return overflow
+
+    async def next_batch(self, timeout: float) -> list:
+        """Every queued event, waiting up to ``timeout`` seconds for one; an
+        empty list when none came. A plain future and timer: no task per wait."""
+        if not self.events:
+            self._waiter = self.loop.create_future()
+            timer = self.loop.call_later(timeout, _wake, self._waiter)
+            try:
+                await self._waiter
+            finally:
+                timer.cancel()
+                self._waiter = None
+        batch = list(self.events)
+        self.events.clear()
+        self.overflowed = False
+        return batch
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class Broker:
+    """Subscriptions by project. Events are published from whichever thread
+    commits (threadpool workers in sync mode) and handed to each
+    subscription's event loop with one call per loop and publish."""
+
+    def __init__(self, max_subscribers: int = SSE_MAX_SUBSCRIBERS):
+        self.max_subscribers = max_subscribers
+        self.resyncs = 0
+        self._subscribers = {}
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self) -> int:
+        return self._count
+
+    def subscribe(self, project_id: UUID, maxsize: int = SSE_QUEUE_SIZE) -> Subscription:
+        subscription = Subscription(project_id, asyncio.get_running_loop(), maxsize)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise TooManySubscribers()
+            self._subscribers.setdefault(project_id, set()).add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscriptions = self._subscribers.get(subscription.project_id)
+            if subscriptions is None or subscription not in subscriptions:
+                return
+            subscriptions.discard(subscription)
+            self._count -= 1
+            if not subscriptions:
+                del self._subscribers[subscription.project_id]
+
+    def publish(self, changes):
+        """Publish ``(type, project_id, data)`` changes. Events are only
+        encoded for projects somebody is subscribed to."""
+        deliveries = {}
+        with self._lock:
+            for kind, project_id, data in changes:
+                subscriptions = self._subscribers.get(project_id)
+                if not subscriptions:
+                    continue
+                event = make_event(kind, project_id, **data)
+                for subscription in subscriptions:
+                    deliveries.setdefault(subscription.loop, []).append((subscription, event))
+        self._hand_over(deliveries)
+
+    def resync(self):
+        """Tell every stream to refetch: events may have been missed."""
+        deliveries = {}
+        with self._lock:
+            for subscriptions in self._subscribers.values():
+                for subscription in subscriptions:
+                    deliveries.setdefault(subscription.loop, []).append((subscription, RESYNC))
+        self._hand_over(deliveries)
+
+    def _hand_over(self, deliveries):
+        for loop, items in deliveries.items():
+            try:
+                loop.call_soon_threadsafe(self._deliver, items)
+            except RuntimeError:
+                # Loop already closed; its subscriptions are being dropped
+                pass
+
+    def _deliver(self, deliveries):
+        overflows = sum(subscription.put(event) for subscription, event in deliveries)
+        if overflows:
+            with self._lock:
+                self.resyncs += overflows
+
+
+broker = Broker()
+
+
+def _publish_remote(changes):
+    # Sent as JSON: project ids come back as strings
+    broker.publish([(kind, UUID(project_id), data) for kind, project_id, data in changes])
+
+
+bus.on_events(_publish_remote)
+bus.on_resync(broker.resync)
+
+
+def record(session: Session, kind: str, project_id: UUID, **data):
+    """Publish a change when ``session`` commits; for writes that bypass the
+    unit of work (Core and bulk statements)."""
+    session.info.setdefault("pending_events", []).append((kind, project_id, data))
+
+
+# ✅ Collect task, comment and membership changes of every flush
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_changes(session, flush_context):
+    comments = []
+    for state, objects in (("created", session.new), ("updated", session.dirty), ("deleted", session.deleted)):
+        for obj in objects:
+            if state == "updated" and not session.is_modified(obj):
+                continue
+            if isinstance(obj, Task):
+                # Old and new project when a task moves
+                for project_id in get_history(obj, "project_id").sum():
+                    if project_id is not None:
+                        record(session, f"task.{state}", project_id, task_id=obj.id)
+            elif isinstance(obj, Comment):
+                comments.append((state, obj))
+            elif isinstance(obj, Project) and state == "deleted":
+                record(session, "project.deleted", obj.id)
+            elif isinstance(obj, Project) and state == "updated" and (
+                get_history(obj, "owners").has_changes() or get_history(obj, "members").has_changes()
+            ):
+                record(session, "project.members_changed", obj.id)
+    if comments:
+        _record_comments(session, comments)
+
+
+def _record_comments(session, comments):
+    # A comment's task is normally loaded already (the access check); the
+    # others are looked up with one query
+    project_ids, missing = {}, set()
+    for _, comment in comments:
+        task = comment.__dict__.get("task") or session.identity_map.get(Session.identity_key(Task, comment.task_id))
+        if task is not None:
+            project_ids[comment.task_id] = task.project_id
+        else:
+            missing.add(comment.task_id)
+    if missing:
+        for task_id, project_id in session.connection().execute(
+            select(Task.id, Task.project_id).where(Task.id.in_(missing))
+        ):
+            project_ids[task_id] = project_id
+    for state, comment in comments:
+        project_id = project_ids.get(comment.task_id)
+        if project_id is not None:
+            record(session, f"comment.{state}", project_id, task_id=comment.task_id, comment_id=comment.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed_changes(session):
+    changes = session.info.pop("pending_events", None)
+    if changes:
+        broker.publish(changes)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_uncommitted_changes(session, transaction):
+    # Rolled back or closed without a commit
+    if transaction.parent is None:
+        session.info.pop("pending_events", None)
@@ -0,0 +1,127 @@
+"""Streaming export of a project's data, in app.importer's record format.
+
+Rows are read with server-side cursors (``yield_per``) inside one REPEATABLE
+READ transaction, so the export is a consistent snapshot and memory stays at
+one batch of rows however large the project is. Each batch is encoded and
+sent as one chunk of a StreamingResponse.
+"""
+import csv
+import io
+import os
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app import database, models
+from app.rows import dumps
+
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "1000"))
+
+_projects, _tasks, _comments = models.Project.__table__, models.Task.__table__, models.Comment.__table__
+
+# Same field names as app.importer.FIELDS, so per-kind exports import back
+PROJECT_COLUMNS = [
+    _projects.c.id.label("ref"), _projects.c.name, _projects.c.description, _projects.c.status,
+    _projects.c.due_date, _projects.c.owners, _projects.c.members, _projects.c.created_at,
+]
+TASK_COLUMNS = [
+    _tasks.c.id.label("ref"), _tasks.c.project_id.label("project"), _tasks.c.title, _tasks.c.description,
+    _tasks.c.status, _tasks.c.priority, _tasks.c.due_date, _tasks.c.assignee, _tasks.c.created_by,
+    _tasks.c.created_at,
+]
+COMMENT_COLUMNS = [_comments.c.task_id.label("task"), _comments.c.content, _comments.c.author, _comments.c.created_at]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def export_queries(project_id: UUID, kind: str):
+    """``(record type, select)`` pairs for ``kind`` ("all", "tasks" or "comments")."""
+    queries = []
+    if kind == "all":
+        queries.append(("project", select(*PROJECT_COLUMNS).where(_projects.c.id == project_id)))
+    if kind in ("all", "tasks"):
+        queries.append(("task", select(*TASK_COLUMNS).where(_tasks.c.project_id == project_id)))
+    if kind in ("all", "comments"):
+        queries.append((
+            "comment",
+            select(*COMMENT_COLUMNS)
+            .join(_tasks, _tasks.c.id == _comments.c.task_id)
+            .where(_tasks.c.project_id == project_id),
+        ))
+    # No ORDER BY: rows flow as soon as the scan finds them instead of after a sort
+    return [(record_type, query.execution_options(yield_per=EXPORT_BATCH_ROWS)) for record_type, query in queries]
+
+
+class NDJSONEncoder:
+    def __init__(self, typed: bool):
+        # Mixed exports tag each record with its type
+        self.typed = typed
+
+    def header(self, queries) -> bytes:
+        return b""
+
+    def encode(self, record_type: str, rows) -> bytes:
+        if self.typed:
+            return b"".join(dumps({"type": record_type, **row._asdict()}) + b"\n" for row in rows)
+        return b"".join(dumps(row._asdict()) + b"\n" for row in rows)
+
+
+class CSVEncoder:
+    def header(self, queries) -> bytes:
+        [(_, query)] = queries
+        return self._lines([[column.name for column in query.selected_columns]])
+
+    def encode(self, record_type: str, rows) -> bytes:
+        return self._lines([_csv_value(value) for value in row] for row in rows)
+
+    @staticmethod
+    def _lines(rows) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode()
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return ";".join(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def _encoder(kind: str, fmt: str):
+    return CSVEncoder() if fmt == "csv" else NDJSONEncoder(typed=kind == "all")
+
+
+def _iter_sync(session_factory, queries, encoder):
+    with session_factory() as db:
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        yield encoder.header(queries)
+        for record_type, query in queries:
+            for rows in db.execute(query).partitions():
+                yield encoder.encode(record_type, rows)
+
+
+async def _iter_async(session_factory, queries, encoder):
+    async with session_factory() as db:
+        await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        yield encoder.header(queries)
+        for record_type, query in queries:
+            result = await db.stream(query)
+            async for rows in result.partitions():
+                yield encoder.encode(record_type, rows)
+
+
+async def stream_project(project_id: UUID, kind: str = "all", fmt: str = "ndjson"):
+    """Body iterator for a StreamingResponse; access must be checked first.
+
+    In sync mode this is a plain generator (Starlette pulls each chunk on
+    the threadpool); in async mode an async generator over AsyncSession.stream.
+    """
+    queries = export_queries(project_id, kind)
+    session_factory = await database.read_session_factory()
+    if database.DB_MODE == "async":
+        return _iter_async(session_factory, queries, _encoder(kind, fmt))
+    return _iter_sync(session_factory, queries, _encoder(kind, fmt))
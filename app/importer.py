@@ -0,0 +1,420 @@
+"""Bulk import of projects, tasks and comments through PostgreSQL COPY.
+
+    python -m app.importer --projects projects.ndjson --tasks tasks.csv \\
+        --comments comments.ndjson [--batch-rows 100000]
+
+Each file holds one kind of record, as NDJSON (one object per line) or as
+CSV with a header row; the extension picks the format. Records point at each
+other by ``ref``: a task's ``project`` is the ref of a project in the same
+import or the id of an existing project, a comment's ``task`` likewise for
+tasks. Usernames (owners/members, created_by, assignee, author) must belong
+to existing users; case is corrected when the match is unambiguous. Lists in
+CSV are separated with ``;``.
+
+Files are streamed into temporary staging tables with COPY, checked with
+set-based queries, then merged into projects/tasks/comments in statements of
+``--batch-rows`` rows. Everything runs in one transaction: an invalid record
+or a failure halfway through the merge leaves the database as it was.
+The ORM and its flush hooks are bypassed, so memberships, comment counts and
+project versions are maintained here with plain SQL, and the bumped projects
+are sent over the invalidation bus by hand.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+
+from sqlalchemy import text
+
+from app import database, invalidation
+
+FIELDS = {
+    "projects": ("ref", "name", "description", "status", "due_date", "owners", "members", "created_at"),
+    "tasks": ("ref", "project", "title", "description", "status", "priority", "due_date", "assignee",
+              "created_by", "created_at"),
+    "comments": ("task", "content", "author", "created_at"),
+}
+MAX_ERRORS = 100
+
+
+class ImportFailed(Exception):
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"{len(errors)} invalid record(s), nothing imported")
+
+
+# --- Staging ---
+
+# Everything is staged as text so COPY itself never rejects a row; "line" is
+# the file line the record starts on, for error messages, and "seq" its
+# position among the records, for merging in batches.
+STAGING_SQL = """
+CREATE TEMP TABLE import_projects (
+    seq bigserial, line bigint, ref text, name text, description text, status text, due_date text,
+    owners text, members text, created_at text, id uuid, owner_names text[], member_names text[]
+);
+CREATE TEMP TABLE import_tasks (
+    seq bigserial, line bigint, ref text, project text, title text, description text, status text, priority text,
+    due_date text, assignee text, created_by text, created_at text, id uuid, project_id uuid
+);
+CREATE TEMP TABLE import_comments (
+    seq bigserial, line bigint, task text, content text, author text, created_at text, task_id uuid
+);
+CREATE FUNCTION pg_temp.try_uuid(value text) RETURNS uuid LANGUAGE plpgsql IMMUTABLE AS $$
+BEGIN RETURN value::uuid; EXCEPTION WHEN others THEN RETURN NULL; END $$;
+CREATE FUNCTION pg_temp.try_date(value text) RETURNS date LANGUAGE plpgsql IMMUTABLE AS $$
+BEGIN RETURN value::date; EXCEPTION WHEN others THEN RETURN NULL; END $$;
+CREATE FUNCTION pg_temp.try_timestamp(value text) RETURNS timestamp LANGUAGE plpgsql IMMUTABLE AS $$
+BEGIN RETURN value::timestamp; EXCEPTION WHEN others THEN RETURN NULL; END $$;
+"""
+
+
+class _ChunkReader:
+    """File-like ``read()`` over an iterator of text chunks, for copy_expert."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = ""
+        self.error = None
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                chunk = next(self._chunks, None)
+            except ImportFailed as e:
+                self.error = e
+                raise
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def _copy_chunks(rows, kind, progress, rows_per_chunk=5000):
+    # (line, values) rows as CSV text for COPY; None and "" both load as NULL
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    count = 0
+    for line, values in rows:
+        writer.writerow([line, *values])
+        count += 1
+        if count % rows_per_chunk == 0:
+            progress(f"copy {kind}", count)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    progress(f"copy {kind}", count)
+    yield buffer.getvalue()
+
+
+def _ndjson_rows(stream, kind, fields):
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ImportFailed([(kind, number, f"invalid JSON: {e}")])
+        if not isinstance(record, dict):
+            raise ImportFailed([(kind, number, "expected a JSON object")])
+        unknown = set(record) - set(fields)
+        if unknown:
+            raise ImportFailed([(kind, number, f"unknown field(s): {', '.join(sorted(unknown))}")])
+        row = []
+        for field in fields:
+            value = record.get(field)
+            if isinstance(value, list):
+                value = ";".join(str(v) for v in value)
+            row.append("" if value is None else str(value))
+        _check_values(kind, number, row)
+        yield number, row
+
+
+def _csv_rows(reader, kind, header):
+    # line_num counts physical lines, so quoted fields spanning several
+    # lines still give each record the line it starts on
+    end = reader.line_num
+    for values in reader:
+        start, end = end + 1, reader.line_num
+        if not values:
+            continue
+        if len(values) != len(header):
+            raise ImportFailed([(kind, start, f"expected {len(header)} fields, got {len(values)}")])
+        _check_values(kind, start, values)
+        yield start, values
+
+
+def _check_values(kind, line, values):
+    # What COPY itself would reject, reported by line instead
+    if any("\x00" in value for value in values):
+        raise ImportFailed([(kind, line, "NUL character in a field")])
+
+
+def _copy_file(conn, kind, path, progress):
+    fields = FIELDS[kind]
+    with open(path, newline="", encoding="utf-8") as stream:
+        if path.endswith(".csv"):
+            records = csv.reader(stream)
+            header = next(records, [])
+            unknown = set(header) - set(fields)
+            if not header or unknown:
+                raise ImportFailed([(kind, 1, f"unknown CSV column(s): {', '.join(sorted(unknown)) or '(none)'}")])
+            columns, rows = header, _csv_rows(records, kind, header)
+        else:
+            columns, rows = fields, _ndjson_rows(stream, kind, fields)
+        sql = f"COPY import_{kind} (line, {', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        reader = _ChunkReader(_copy_chunks(rows, kind, progress))
+        with conn.connection.driver_connection.cursor() as cursor:
+            try:
+                cursor.copy_expert(sql, reader)
+            except Exception:
+                # psycopg2 reports an exception raised by read() as QueryCanceled
+                if reader.error is not None:
+                    raise reader.error from None
+                raise
+
+
+# --- Validation ---
+
+RESOLVE_SQL = """
+CREATE INDEX ON import_projects (ref);
+CREATE INDEX ON import_tasks (ref);
+CREATE INDEX ON import_tasks (seq);
+CREATE INDEX ON import_comments (seq);
+ANALYZE import_projects;
+ANALYZE import_tasks;
+ANALYZE import_comments;
+
+-- Every referenced username, mapped to the user's exact spelling, or NULL
+CREATE TEMP TABLE import_usernames AS
+SELECT n.name, coalesce(exact.username, folded.username) AS username
+FROM (
+    SELECT DISTINCT trim(name) AS name FROM (
+        SELECT unnest(string_to_array(owners, ';')) FROM import_projects
+        UNION ALL SELECT unnest(string_to_array(members, ';')) FROM import_projects
+        UNION ALL SELECT created_by FROM import_tasks
+        UNION ALL SELECT assignee FROM import_tasks
+        UNION ALL SELECT author FROM import_comments
+    ) AS referenced (name)
+    WHERE coalesce(trim(name), '') <> ''
+) AS n
+LEFT JOIN users AS exact ON exact.username = n.name
+LEFT JOIN (
+    SELECT lower(username) AS folded_name, min(username) AS username FROM users
+    GROUP BY lower(username) HAVING count(*) = 1
+) AS folded ON folded.folded_name = lower(n.name);
+CREATE UNIQUE INDEX ON import_usernames (name);
+
+UPDATE import_projects SET
+    id = gen_random_uuid(),
+    owner_names = ARRAY(
+        SELECT u.username FROM unnest(string_to_array(owners, ';')) WITH ORDINALITY AS o (name, n)
+        JOIN import_usernames AS u ON u.name = trim(o.name) ORDER BY o.n
+    ),
+    member_names = ARRAY(
+        SELECT u.username FROM unnest(string_to_array(members, ';')) WITH ORDINALITY AS m (name, n)
+        JOIN import_usernames AS u ON u.name = trim(m.name) ORDER BY m.n
+    );
+
+UPDATE import_tasks SET id = gen_random_uuid();
+UPDATE import_tasks AS t SET project_id = p.id FROM import_projects AS p WHERE p.ref = t.project;
+UPDATE import_tasks AS t SET project_id = p.id FROM projects AS p
+WHERE t.project_id IS NULL AND p.id = pg_temp.try_uuid(t.project);
+
+UPDATE import_comments AS c SET task_id = t.id FROM import_tasks AS t WHERE t.ref = c.task;
+UPDATE import_comments AS c SET task_id = t.id FROM tasks AS t
+WHERE c.task_id IS NULL AND t.id = pg_temp.try_uuid(c.task);
+"""
+
+# (kind, query returning line + message); each query is capped at MAX_ERRORS
+CHECKS = [
+    ("projects", "SELECT line, 'name is required' FROM import_projects WHERE coalesce(trim(name), '') = ''"),
+    ("projects", """SELECT line, 'duplicate ref ' || ref FROM import_projects
+                    WHERE ref IN (SELECT ref FROM import_projects GROUP BY ref HAVING count(*) > 1)"""),
+    ("projects", "SELECT line, 'invalid due_date ' || due_date FROM import_projects "
+                 "WHERE due_date IS NOT NULL AND pg_temp.try_date(due_date) IS NULL"),
+    ("projects", "SELECT line, 'invalid created_at ' || created_at FROM import_projects "
+                 "WHERE created_at IS NOT NULL AND pg_temp.try_timestamp(created_at) IS NULL"),
+    ("projects", """SELECT p.line, 'unknown user ' || trim(n.name) FROM import_projects AS p,
+                    unnest(string_to_array(p.owners, ';') || string_to_array(p.members, ';')) AS n (name)
+                    JOIN import_usernames AS u ON u.name = trim(n.name) WHERE u.username IS NULL"""),
+    ("tasks", "SELECT line, 'title is required' FROM import_tasks WHERE coalesce(trim(title), '') = ''"),
+    ("tasks", """SELECT line, 'duplicate ref ' || ref FROM import_tasks
+                 WHERE ref IN (SELECT ref FROM import_tasks GROUP BY ref HAVING count(*) > 1)"""),
+    ("tasks", "SELECT line, 'unknown project ' || coalesce(project, '(none)') FROM import_tasks "
+              "WHERE project_id IS NULL"),
+    ("tasks", "SELECT line, 'created_by is required' FROM import_tasks WHERE coalesce(trim(created_by), '') = ''"),
+    ("tasks", """SELECT t.line, 'unknown user ' || u.name FROM import_tasks AS t
+                 JOIN import_usernames AS u ON u.name IN (trim(t.created_by), trim(t.assignee))
+                 WHERE u.username IS NULL"""),
+    ("tasks", "SELECT line, 'invalid due_date ' || due_date FROM import_tasks "
+              "WHERE due_date IS NOT NULL AND pg_temp.try_date(due_date) IS NULL"),
+    ("tasks", "SELECT line, 'invalid created_at ' || created_at FROM import_tasks "
+              "WHERE created_at IS NOT NULL AND pg_temp.try_timestamp(created_at) IS NULL"),
+    ("comments", "SELECT line, 'content is required' FROM import_comments WHERE coalesce(content, '') = ''"),
+    ("comments", "SELECT line, 'unknown task ' || coalesce(task, '(none)') FROM import_comments "
+                 "WHERE task_id IS NULL"),
+    ("comments", """SELECT c.line, coalesce('unknown user ' || u.name, 'author is required')
+                    FROM import_comments AS c LEFT JOIN import_usernames AS u ON u.name = trim(c.author)
+                    WHERE u.username IS NULL"""),
+    ("comments", "SELECT line, 'invalid created_at ' || created_at FROM import_comments "
+                 "WHERE created_at IS NOT NULL AND pg_temp.try_timestamp(created_at) IS NULL"),
+]
+
+
+def _validate(conn):
+    errors = []
+    for kind, query in CHECKS:
+        rows = conn.execute(text(f"{query} ORDER BY 1 LIMIT {MAX_ERRORS}"))
+        errors.extend((kind, line, message) for line, message in rows)
+    if errors:
+        raise ImportFailed(sorted(errors)[:MAX_ERRORS])
+
+
+# --- Merge ---
+
+MERGE_PROJECTS_SQL = """
+INSERT INTO projects (id, name, description, status, due_date, owners, members, created_at, version)
+SELECT id, name, description, coalesce(status, 'pending'), pg_temp.try_date(due_date), owner_names,
+       member_names, coalesce(pg_temp.try_timestamp(created_at), timezone('utc', now())), 1
+FROM import_projects;
+
+INSERT INTO project_members (project_id, username, role)
+SELECT DISTINCT p.id, m.username, m.role FROM import_projects AS p,
+LATERAL (SELECT unnest(p.owner_names), 'owner' UNION ALL SELECT unnest(p.member_names), 'member')
+    AS m (username, role);
+"""
+
+MERGE_TASKS_SQL = """
+INSERT INTO tasks (id, title, description, status, priority, due_date, assignee, created_by, project_id,
+                   created_at, updated_at, comment_count)
+SELECT t.id, t.title, t.description, coalesce(t.status, 'pending'), coalesce(t.priority, 'medium'),
+       pg_temp.try_date(t.due_date), a.username, c.username, t.project_id,
+       coalesce(pg_temp.try_timestamp(t.created_at), timezone('utc', now())), timezone('utc', now()), 0
+FROM import_tasks AS t
+JOIN import_usernames AS c ON c.name = trim(t.created_by)
+LEFT JOIN import_usernames AS a ON a.name = trim(t.assignee)
+WHERE t.seq > :low AND t.seq <= :high;
+
+UPDATE projects SET version = version + 1
+WHERE id IN (SELECT project_id FROM import_tasks WHERE seq > :low AND seq <= :high)
+RETURNING id;
+"""
+
+MERGE_COMMENTS_SQL = """
+INSERT INTO comments (id, content, author, created_at, task_id)
+SELECT gen_random_uuid(), c.content, u.username,
+       coalesce(pg_temp.try_timestamp(c.created_at), timezone('utc', now())), c.task_id
+FROM import_comments AS c JOIN import_usernames AS u ON u.name = trim(c.author)
+WHERE c.seq > :low AND c.seq <= :high;
+
+UPDATE tasks SET comment_count = tasks.comment_count + added.n
+FROM (SELECT task_id, count(*) AS n FROM import_comments WHERE seq > :low AND seq <= :high GROUP BY task_id)
+    AS added
+WHERE tasks.id = added.task_id;
+
+UPDATE projects SET version = version + 1
+WHERE id IN (SELECT t.project_id FROM tasks AS t
+             JOIN import_comments AS c ON c.task_id = t.id AND c.seq > :low AND c.seq <= :high)
+RETURNING id;
+"""
+
+
+def _execute_script(conn, script, **params) -> set:
+    """Run each statement of ``script``; returns what they return (ids)."""
+    returned = set()
+    for statement in script.split(";\n"):
+        if statement.strip():
+            result = conn.execute(text(statement), params)
+            if result.returns_rows:
+                returned.update(result.scalars())
+    return returned
+
+
+def _merge_in_batches(conn, kind, script, batch_rows, progress, bumped):
+    # Batches bound each statement's size, not the transaction's
+    total = conn.execute(text(f"SELECT coalesce(max(seq), 0) FROM import_{kind}")).scalar()
+    for low in range(0, total, batch_rows):
+        high = min(low + batch_rows, total)
+        bumped.update(("project", str(project_id)) for project_id in _execute_script(conn, script, low=low, high=high))
+        progress(f"merge {kind}", high, total)
+    return total
+
+
+def import_files(projects=None, tasks=None, comments=None, batch_rows=100_000, progress=None, engine=None):
+    """Import the given files; returns the number of rows merged per kind.
+
+    Raises ImportFailed, with up to MAX_ERRORS (kind, line, message) tuples,
+    when any record is invalid. Nothing is written then, nor when the merge
+    fails: the import commits once, at the end.
+    """
+    progress = progress or (lambda *args: None)
+    engine = engine or database.get_engine()
+    started = time.perf_counter()
+    counts = {}
+    with engine.connect() as conn:
+        try:
+            _execute_script(conn, STAGING_SQL)
+            for kind, path in (("projects", projects), ("tasks", tasks), ("comments", comments)):
+                if path:
+                    _copy_file(conn, kind, path, progress)
+            _execute_script(conn, RESOLVE_SQL)
+            _validate(conn)
+
+            counts["projects"] = conn.execute(text("SELECT count(*) FROM import_projects")).scalar()
+            _execute_script(conn, MERGE_PROJECTS_SQL)
+            progress("merge projects", counts["projects"], counts["projects"])
+            bumped = set()
+            counts["tasks"] = _merge_in_batches(conn, "tasks", MERGE_TASKS_SQL, batch_rows, progress, bumped)
+            counts["comments"] = _merge_in_batches(conn, "comments", MERGE_COMMENTS_SQL, batch_rows, progress, bumped)
+            invalidation.bus.send(conn, bumped)
+            conn.commit()
+            invalidation.bus.apply(bumped)
+        finally:
+            conn.rollback()
+            # Temp tables and functions live as long as the pooled connection
+            conn.execute(text("DISCARD TEMP"))
+            conn.commit()
+    counts["seconds"] = round(time.perf_counter() - started, 3)
+    return counts
+
+
+def _print_progress(stage, done, total=None):
+    suffix = f"/{total:,}" if total is not None else ""
+    print(f"\r{stage}: {done:,}{suffix}", end="\n" if total is not None and done >= total else "",
+          file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", help="projects file (.ndjson or .csv)")
+    parser.add_argument("--tasks", help="tasks file (.ndjson or .csv)")
+    parser.add_argument("--comments", help="comments file (.ndjson or .csv)")
+    parser.add_argument("--batch-rows", type=int, default=int(os.getenv("IMPORT_BATCH_ROWS", "100000")),
+                        help="rows merged per statement")
+    args = parser.parse_args(argv)
+    if not (args.projects or args.tasks or args.comments):
+        parser.error("nothing to import")
+    try:
+        counts = import_files(args.projects, args.tasks, args.comments, args.batch_rows, _print_progress)
+    except ImportFailed as e:
+        print(file=sys.stderr)
+        for kind, line, message in e.errors:
+            print(f"{kind} line {line}: {message}", file=sys.stderr)
+        print(e, file=sys.stderr)
+        return 1
+    rows = counts["projects"] + counts["tasks"] + counts["comments"]
+    print(f"\nimported {counts['projects']:,} projects, {counts['tasks']:,} tasks, "
+          f"{counts['comments']:,} comments in {counts['seconds']}s "
+          f"({rows / max(counts['seconds'], 1e-9):,.0f} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
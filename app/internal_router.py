@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from app import database, metrics
+from app.dependencies import require_admin
+
+router = APIRouter()
+
+
+# ✅ Connection pool usage of this worker process (Admins only)
+@router.get("/internal/pool")
+async def pool_statistics(current_user=Depends(require_admin)):
+    return database.pool_report()
+
+
+# ✅ Prometheus scrape target: request, DB and pool metrics of this worker
+# process. Open unless METRICS_TOKEN is set (scrapers send no user token).
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics(authorization: str = Header(None)):
+    if metrics.METRICS_TOKEN and authorization != f"Bearer {metrics.METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
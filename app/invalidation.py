@@ -0,0 +1,295 @@
+"""Cross-worker cache invalidation over PostgreSQL LISTEN/NOTIFY.
+
+Every worker keeps in-process caches: principals, project versions and
+participants, the token revocation filter. A write says which keys it changed
+with ``record(session, kind, *keys)``; when its transaction commits, the keys
+are evicted in this worker and sent to all the others with pg_notify on the
+write's own connection. NOTIFY is transactional, so other workers hear of a
+change exactly when it becomes visible, and never of a rollback. Committed SSE
+events (app.events) travel the same way, so streams on every worker see them.
+
+Each worker runs one listener thread on a connection of its own (``bus.start()``
+in the app lifespan). Notifications are read in batches: everything arriving
+within INVALIDATION_BATCH_MS of the first is merged, and each key is evicted
+once per batch. Notifications sent while the listener is not connected are
+lost, so every disconnect and every reconnect clears the caches (a resync),
+and caches that rely on the bus alone check ``bus.connected`` before use.
+"""
+import json
+import logging
+import os
+import select
+import threading
+import time
+from uuid import uuid4
+
+from sqlalchemy import create_engine, event, func
+from sqlalchemy import select as sql_select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from app import database
+from app.rows import dumps
+
+logger = logging.getLogger(__name__)
+
+# Disable to run workers without a listener (caches then rely on their TTLs)
+INVALIDATION_BUS = os.getenv("INVALIDATION_BUS", "true").lower() in ("1", "true", "yes")
+INVALIDATION_CHANNEL = os.getenv("INVALIDATION_CHANNEL", "taskhub_invalidation")
+# How long the listener keeps collecting after a notification arrives
+INVALIDATION_BATCH_MS = float(os.getenv("INVALIDATION_BATCH_MS", "10"))
+# Transactions with more events than this send one "resync" per project instead
+INVALIDATION_MAX_EVENTS = int(os.getenv("INVALIDATION_MAX_EVENTS", "200"))
+INVALIDATION_RECONNECT_MAX_SECONDS = float(os.getenv("INVALIDATION_RECONNECT_MAX_SECONDS", "5"))
+# An idle listener pings the server this often, so a dead connection is noticed
+INVALIDATION_HEARTBEAT_SECONDS = float(os.getenv("INVALIDATION_HEARTBEAT_SECONDS", "10"))
+INVALIDATION_CONNECT_TIMEOUT = int(os.getenv("INVALIDATION_CONNECT_TIMEOUT", "5"))
+
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+MAX_PAYLOAD_BYTES = 7900
+# application_name of listener connections, as seen in pg_stat_activity
+LISTENER_NAME = "taskhub-invalidation"
+
+
+class InvalidationBus:
+    """Handlers by kind of key, the sending side of a commit, and the
+    listener thread applying what other workers sent."""
+
+    def __init__(self, channel: str = INVALIDATION_CHANNEL, batch_seconds: float = INVALIDATION_BATCH_MS / 1000):
+        self.channel = channel
+        self.batch_seconds = batch_seconds
+        # Tells this process's notifications apart: it applied them at commit
+        self.origin = uuid4().hex
+        self.connected = False
+        self.notifications = 0
+        self.batches = 0
+        self.resyncs = 0
+        self.reconnects = 0
+        self._handlers = {}
+        self._event_handlers = []
+        self._resync_handlers = []
+        self._generations = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._wakeup = None
+
+    # --- Handlers ---
+    def on(self, kind: str, handler):
+        """Call ``handler(keys)`` with the changed keys of ``kind`` (strings)."""
+        self._handlers.setdefault(kind, []).append(handler)
+
+    def on_events(self, handler):
+        """Call ``handler(changes)`` with SSE changes committed by other workers."""
+        self._event_handlers.append(handler)
+
+    def on_resync(self, handler):
+        """Call ``handler()`` when notifications may have been missed."""
+        self._resync_handlers.append(handler)
+
+    def generation(self, kind: str) -> int:
+        return self._generations.get(kind, 0)
+
+    def fill(self, kind: str, cache, key, value, generation: int):
+        """``cache.set(key, value)`` unless a ``kind`` invalidation was applied
+        since ``generation`` was read, i.e. while ``value`` was being loaded."""
+        with self._lock:
+            if self._generations.get(kind, 0) == generation:
+                cache.set(key, value)
+
+    def apply(self, keys, changes=()):
+        """Evict ``(kind, key)`` pairs and pass on ``changes``."""
+        grouped = {}
+        for kind, key in keys:
+            grouped.setdefault(kind, set()).add(key)
+        with self._lock:
+            # Before evicting: a fill racing with this eviction then fails
+            for kind in grouped:
+                self._generations[kind] = self._generations.get(kind, 0) + 1
+        for kind, kind_keys in grouped.items():
+            for handler in self._handlers.get(kind, ()):
+                _call(handler, kind_keys)
+        if changes:
+            for handler in self._event_handlers:
+                _call(handler, changes)
+
+    def resync(self):
+        with self._lock:
+            for kind in self._handlers:
+                self._generations[kind] = self._generations.get(kind, 0) + 1
+            self.resyncs += 1
+        for handler in self._resync_handlers:
+            _call(handler)
+
+    # --- Sending ---
+    def payloads(self, keys, changes) -> list:
+        """NOTIFY payloads for one transaction, each under the size limit."""
+        if len(changes) > INVALIDATION_MAX_EVENTS:
+            # A bulk write: streams elsewhere refetch rather than replay it
+            changes = [("resync", project_id, {}) for project_id in {change[1] for change in changes}]
+        items = [("k", [kind, key]) for kind, key in sorted(keys)]
+        items += [("e", list(change)) for change in changes]
+
+        header = dumps({"o": self.origin})
+        messages, message, size = [], {}, len(header)
+        for field, item in items:
+            encoded = len(dumps(item)) + 8
+            if message and size + encoded > MAX_PAYLOAD_BYTES:
+                messages.append(message)
+                message, size = {}, len(header)
+            message.setdefault(field, []).append(item)
+            size += encoded
+        if message:
+            messages.append(message)
+        return [dumps({"o": self.origin, **message}).decode() for message in messages]
+
+    def send(self, connection, keys, changes=()):
+        """Queue the notifications on ``connection``'s open transaction; the
+        server delivers them when it commits."""
+        payloads = self.payloads(keys, changes)
+        if payloads:
+            connection.execute(sql_select(*(func.pg_notify(self.channel, payload) for payload in payloads)))
+
+    # --- Listening ---
+    def start(self):
+        if not INVALIDATION_BUS or self._thread is not None:
+            return
+        self._stop.clear()
+        self._wakeup = os.pipe()
+        self._thread = threading.Thread(target=self._run, name="invalidation-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        if self._thread is None:
+            return
+        self._stop.set()
+        os.write(self._wakeup[1], b"x")
+        self._thread.join(timeout)
+        self._thread = None
+        for fd in self._wakeup:
+            os.close(fd)
+        self._wakeup = None
+
+    def _run(self):
+        engine = create_engine(
+            database.DATABASE_URL, poolclass=NullPool,
+            connect_args={"connect_timeout": INVALIDATION_CONNECT_TIMEOUT, "application_name": LISTENER_NAME},
+        )
+        delay, listened = 0.1, False
+        try:
+            while not self._stop.is_set():
+                try:
+                    connection = engine.raw_connection()
+                except Exception as e:
+                    logger.warning("Invalidation listener cannot connect: %s", e)
+                else:
+                    try:
+                        if listened:
+                            self.reconnects += 1
+                        listened = True
+                        delay = 0.1
+                        self._listen(connection.driver_connection)
+                    except Exception as e:
+                        if not self._stop.is_set():
+                            logger.warning("Invalidation listener lost its connection: %s", e)
+                    finally:
+                        self.connected = False
+                        connection.invalidate()
+                if self._stop.is_set():
+                    break
+                # Blind until reconnected: drop what may go stale meanwhile
+                self.resync()
+                self._stop.wait(delay)
+                delay = min(delay * 2, INVALIDATION_RECONNECT_MAX_SECONDS)
+        finally:
+            engine.dispose()
+
+    def _listen(self, conn):
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        # Anything cached before LISTEN took effect may already be stale
+        self.resync()
+        self.connected = True
+        wakeup = self._wakeup[0]
+        while not self._stop.is_set():
+            readable, _, _ = select.select([conn, wakeup], [], [], INVALIDATION_HEARTBEAT_SECONDS)
+            if wakeup in readable:
+                return
+            if readable:
+                conn.poll()
+            else:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+            if not conn.notifies:
+                continue
+            # Coalesce the burst this notification belongs to
+            deadline = time.monotonic() + self.batch_seconds
+            while (remaining := deadline - time.monotonic()) > 0:
+                if not select.select([conn], [], [], remaining)[0]:
+                    break
+                conn.poll()
+            notifies = list(conn.notifies)
+            conn.notifies.clear()
+            self._receive(notifies)
+
+    def _receive(self, notifies):
+        keys, changes = set(), []
+        for notify in notifies:
+            try:
+                message = json.loads(notify.payload)
+            except ValueError:
+                logger.warning("Ignoring malformed invalidation payload: %.100s", notify.payload)
+                continue
+            if message.get("o") == self.origin:
+                continue
+            keys.update((kind, key) for kind, key in message.get("k", ()))
+            changes.extend(message.get("e", ()))
+        self.notifications += len(notifies)
+        if keys or changes:
+            self.batches += 1
+            self.apply(keys, changes)
+
+
+def _call(handler, *args):
+    # One failing cache must not stop the others from being evicted
+    try:
+        handler(*args)
+    except Exception:
+        logger.exception("Invalidation handler %r failed", handler)
+
+
+bus = InvalidationBus()
+
+
+def record(session: Session, kind: str, *keys):
+    """Evict ``keys`` of ``kind`` in every worker once ``session`` commits."""
+    if keys:
+        session.info.setdefault("pending_invalidations", set()).update((kind, str(key)) for key in keys)
+
+
+# ✅ Notify the other workers inside the committing transaction. Flushed first,
+# so the commit's last flush has recorded its keys and events too.
+@event.listens_for(Session, "before_commit")
+def _notify_other_workers(session):
+    if session.in_nested_transaction():
+        return
+    session.flush()
+    keys = session.info.get("pending_invalidations", ())
+    # Collected by app.events, which publishes them locally after the commit
+    changes = session.info.get("pending_events", ())
+    if keys or changes:
+        bus.send(session.connection(), keys, changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_invalidations(session):
+    keys = session.info.pop("pending_invalidations", None)
+    if keys:
+        bus.apply(keys)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_uncommitted_invalidations(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("pending_invalidations", None)
@@ -1,23 +1,47 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app import models, database
+from app import database, invalidation
 from app.project_router import router as project_router
 from app.task_router import router as task_router
 from app.comment_router import router as comment_router
 from app.user_router import router as user_router
 from app.auth_router import router as auth_router
-app = FastAPI(title="TaskHub API", version="1.0")
+from app.internal_router import router as internal_router
+from app.search_router import router as search_router
+from app.event_router import router as event_router
+from app.query_stats import QueryStatsMiddleware
+from app.metrics import MetricsMiddleware
 
 
+@asynccontextmanager
+async def lifespan(app):
+    # ✅ Engines are created per worker at startup, without connecting; the
+    # schema is managed by Alembic (alembic upgrade head), not at import
+    database.init_engines()
+    # ✅ Evicts this worker's caches when other workers write (LISTEN/NOTIFY)
+    invalidation.bus.start()
+    yield
+    invalidation.bus.stop()
+    await database.dispose_engines()
 
-app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
 
-models.Base.metadata.create_all(bind=database.engine)
+app = FastAPI(title="TaskHub API", version="1.0", lifespan=lifespan)
+
 
 
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
+# ✅ SQL statement count and DB time per request (X-DB-Statements, X-DB-Time-Ms)
+app.add_middleware(QueryStatsMiddleware)
+# ✅ Prometheus metrics (GET /metrics); outermost, so it times everything above
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(auth_router, tags=["Auth"])
 app.include_router(project_router, prefix="", tags=["Projects"])
 app.include_router(task_router, prefix="", tags=["Tasks"])
 app.include_router(comment_router, tags=["comments"])
+app.include_router(search_router, tags=["Search"])
+app.include_router(event_router, tags=["Events"])
 app.include_router(user_router, prefix="", tags=["Users"])
-app.include_router(user_router, prefix="/api")
\ No newline at end of file
+app.include_router(user_router, prefix="/api")
+app.include_router(internal_router, tags=["Internal"])
\ No newline at end of file
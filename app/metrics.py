@@ -0,0 +1,267 @@
+"""Request, cache and connection pool metrics in the Prometheus text format.
+
+Everything is aggregated in-process: one RouteSeries per (method, route
+template) holds plain counters and histogram buckets under its own lock, so
+recording a request is a bisect and a few additions. Rendering, which walks
+every series and reads the pools, only happens when /metrics is scraped.
+Each worker process reports its own numbers; Prometheus sums them.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from app import database, events, invalidation
+from app.auth import verified_tokens
+from app.dependencies import principal_cache, project_viewers
+
+# Upper bounds in seconds; one more bucket (+Inf) catches the rest
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Requests that matched no route share one label instead of one per path
+UNMATCHED_ROUTE = "unmatched"
+
+# When set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        # Callers hold the series lock
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def snapshot(self):
+        return list(self.counts), self.sum
+
+
+class RouteSeries:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.statuses = {}
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.db_time = Histogram(DB_TIME_BUCKETS)
+        self.db_statements = 0
+
+    def observe(self, status: int, seconds: float, db_seconds: float, db_statements: int):
+        with self.lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.latency.observe(seconds)
+            self.db_time.observe(db_seconds)
+            self.db_statements += db_statements
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.statuses), self.latency.snapshot(), self.db_time.snapshot(), self.db_statements
+
+
+class Registry:
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+        self._started = {}
+
+    def series(self, method: str, route: str) -> RouteSeries:
+        key = (method, route)
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(key, RouteSeries())
+        return series
+
+    def started(self, method: str):
+        # Finished requests are counted by their series, so in flight is
+        # started minus finished and a request takes two locks, not three
+        with self._lock:
+            self._started[method] = self._started.get(method, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            items, in_flight = list(self._series.items()), dict(self._started)
+        series = [(key, s.snapshot()) for key, s in sorted(items)]
+        for (method, _), (statuses, _, _, _) in series:
+            in_flight[method] = in_flight.get(method, 0) - sum(statuses.values())
+        # Counters are read one after the other, so clamp a momentary skew
+        return series, {method: max(0, count) for method, count in in_flight.items()}
+
+
+registry = Registry()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording every HTTP request into ``registry``.
+
+    The route label is the matched route's path template. The router leaves
+    the matched endpoint in the scope, so it is looked up once the request
+    is done; in-flight requests, whose route is not known yet, are counted
+    per method.
+    """
+
+    def __init__(self, app, registry: Registry = registry):
+        self.app = app
+        self.registry = registry
+        self._routes = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.registry.started(method)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            stats = scope.get("query_stats")
+            self.registry.series(method, self._route(scope)).observe(
+                status, elapsed,
+                stats.seconds if stats is not None else 0.0,
+                stats.statements if stats is not None else 0,
+            )
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        routes = self._routes.get(endpoint)
+        if routes is None:
+            routes = self._routes[endpoint] = [
+                route for route in scope["app"].router.routes if getattr(route, "endpoint", None) is endpoint
+            ]
+        if len(routes) == 1:
+            return routes[0].path
+        # One endpoint mounted under several paths (/users and /api/users)
+        for route in routes:
+            if route.path_regex.match(scope["path"]):
+                return route.path
+        return UNMATCHED_ROUTE
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _histogram(lines, name, labels, bounds, snapshot):
+    counts, total = snapshot
+    cumulative = 0
+    for bound, count in zip(bounds + (float("inf"),), counts):
+        cumulative += count
+        le = "+Inf" if bound == float("inf") else repr(bound)
+        lines.append(f"{name}_bucket{_labels(**labels, le=le)} {cumulative}")
+    lines.append(f"{name}_sum{_labels(**labels)} {total}")
+    lines.append(f"{name}_count{_labels(**labels)} {cumulative}")
+
+
+def _header(lines, name, kind, help_text):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def render(registry: Registry = registry) -> str:
+    series, in_flight = registry.snapshot()
+    lines = []
+
+    _header(lines, "http_requests_total", "counter", "HTTP requests by route and status code.")
+    for (method, route), (statuses, _, _, _) in series:
+        for status, count in sorted(statuses.items()):
+            lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+    _header(lines, "http_request_duration_seconds", "histogram", "Time to the end of the response.")
+    for (method, route), (_, latency, _, _) in series:
+        _histogram(lines, "http_request_duration_seconds", {"method": method, "route": route}, LATENCY_BUCKETS, latency)
+
+    _header(lines, "http_requests_in_flight", "gauge", "Requests being handled.")
+    for method, count in sorted(in_flight.items()):
+        lines.append(f"http_requests_in_flight{_labels(method=method)} {count}")
+
+    _header(lines, "http_request_db_seconds", "histogram", "Time spent executing SQL per request.")
+    for (method, route), (_, _, db_time, _) in series:
+        _histogram(lines, "http_request_db_seconds", {"method": method, "route": route}, DB_TIME_BUCKETS, db_time)
+
+    _header(lines, "http_request_db_statements_total", "counter", "SQL statements executed by requests.")
+    for (method, route), (_, _, _, statements) in series:
+        lines.append(f"http_request_db_statements_total{_labels(method=method, route=route)} {statements}")
+
+    _header(lines, "sse_subscribers", "gauge", "Open event streams (GET /projects/{project_id}/events).")
+    lines.append(f"sse_subscribers {events.broker.subscriber_count}")
+    _header(lines, "sse_resyncs_total", "counter", "Event streams that fell behind and were told to resync.")
+    lines.append(f"sse_resyncs_total {events.broker.resyncs}")
+
+    bus = invalidation.bus
+    _header(lines, "invalidation_listener_connected", "gauge", "Whether this worker is listening for invalidations.")
+    lines.append(f"invalidation_listener_connected {int(bus.connected)}")
+    _header(lines, "invalidation_notifications_total", "counter", "Notifications received from the database.")
+    lines.append(f"invalidation_notifications_total {bus.notifications}")
+    _header(lines, "invalidation_batches_total", "counter", "Coalesced batches of other workers' invalidations applied.")
+    lines.append(f"invalidation_batches_total {bus.batches}")
+    _header(lines, "invalidation_resyncs_total", "counter", "Cache flushes after the listener lost or regained its connection.")
+    lines.append(f"invalidation_resyncs_total {bus.resyncs}")
+
+    _render_caches(lines)
+    _render_pools(lines)
+    return "\n".join(lines) + "\n"
+
+
+def _render_caches(lines):
+    caches = {"principal": principal_cache, "project_viewers": project_viewers, "verified_token": verified_tokens}
+    stats = {name: cache.stats() for name, cache in caches.items()}
+    for name, key, kind, help_text in (
+        ("cache_hits_total", "hits", "counter", "In-process cache lookups answered from the cache."),
+        ("cache_misses_total", "misses", "counter", "In-process cache lookups that had to load the value."),
+        ("cache_entries", "size", "gauge", "Entries held by the in-process cache."),
+    ):
+        _header(lines, name, kind, help_text)
+        for cache, values in stats.items():
+            lines.append(f"{name}{_labels(cache=cache)} {values[key]}")
+
+
+def _render_pools(lines):
+    report = database.pool_report()
+    gauges = (
+        ("db_pool_size", "size", "Configured pool size."),
+        ("db_pool_max_overflow", "max_overflow", "Connections allowed beyond the pool size."),
+        ("db_pool_checked_out", "checked_out", "Connections in use."),
+        ("db_pool_idle", "idle", "Idle connections in the pool."),
+        ("db_pool_overflow", "overflow", "Open connections beyond the pool size."),
+    )
+    counters = (
+        ("db_pool_checkouts_total", "checkouts", "Connection checkouts."),
+        ("db_pool_checkout_timeouts_total", "timeouts", "Checkouts that timed out waiting for a connection."),
+        ("db_pool_checkout_wait_seconds_total", "wait_s_total", "Time spent waiting for a connection."),
+    )
+    for kind, metrics in (("gauge", gauges), ("counter", counters)):
+        for name, key, help_text in metrics:
+            _header(lines, name, kind, help_text)
+            for pool, status in report["pools"].items():
+                if key in status:
+                    lines.append(f"{name}{_labels(pool=pool)} {status[key]}")
+
+    replica = report.get("replica")
+    if replica is not None:
+        _header(lines, "db_replica_healthy", "gauge", "1 while reads go to the replica.")
+        lines.append(f"db_replica_healthy {int(replica['healthy'])}")
+        if replica["lag_s"] is not None:
+            _header(lines, "db_replica_lag_seconds", "gauge", "Replication lag at the last probe.")
+            lines.append(f"db_replica_lag_seconds {replica['lag_s']}")
@@ -1,9 +1,11 @@
-from sqlalchemy import Column, String, Date, ForeignKey, Text, DateTime
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import BigInteger, Column, Computed, Integer, String, Date, ForeignKey, Text, DateTime, Index, event, or_, select, update
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import deferred, relationship, Session
+from sqlalchemy.orm.attributes import get_history
 from datetime import datetime
 import uuid
 from app.database import Base
+from app.invalidation import record
 from sqlalchemy.dialects.postgresql import ARRAY
 
 class Project(Base):
@@ -17,6 +19,8 @@ class Project(Base):
     members = Column(ARRAY(String), default=[])
     owners = Column(ARRAY(String), default=[])
     created_at = Column(DateTime, default=datetime.utcnow)
+    # ✅ Bumped on every change to the project, its tasks or their comments (ETags)
+    version = Column(BigInteger, nullable=False, default=1, server_default="1")
 
     # ✅ Store all owners as comma-separated usernames (Example: "admin,deepak")
     
@@ -24,6 +28,35 @@ class Project(Base):
     # ✅ Relationship with Tasks
     tasks = relationship("Task", back_populates="project", cascade="all, delete-orphan")
 
+    # ✅ Indexed copy of owners/members, kept in sync on flush (see below)
+    memberships = relationship(
+        "ProjectMember", back_populates="project", cascade="all, delete-orphan", passive_deletes=True
+    )
+
+
+class ProjectMember(Base):
+    __tablename__ = "project_members"
+
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    username = Column(String, primary_key=True)
+    role = Column(String, primary_key=True)  # "owner" or "member"
+
+    # The primary key serves lookups by project; this one serves "which
+    # projects can user X see" and per-role checks by username.
+    __table_args__ = (
+        Index("ix_project_members_username_role", "username", "role", "project_id"),
+    )
+
+    project = relationship("Project", back_populates="memberships")
+
+# ✅ Full-text search documents, kept up to date by PostgreSQL (generated columns)
+TASK_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+COMMENT_SEARCH_VECTOR = "to_tsvector('english', coalesce(content, ''))"
+
+
 class Task(Base):
     __tablename__ = "tasks"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -40,6 +73,19 @@ class Task(Base):
     project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id"),nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # ✅ Denormalized count of comments, maintained on flush (see below)
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Deferred: only the search query reads it
+    search_vector = deferred(Column(TSVECTOR, Computed(TASK_SEARCH_VECTOR, persisted=True)))
+
+    # ✅ Indexes for the list/filter shapes: per-project pages in created_at
+    # order, status filters and rollups per project, "assigned to me"
+    __table_args__ = (
+        Index("ix_tasks_project_id_created_at", "project_id", "created_at", "id"),
+        Index("ix_tasks_project_id_status", "project_id", "status"),
+        Index("ix_tasks_assignee_created_at", "assignee", "created_at", "id"),
+        Index("ix_tasks_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     
     project = relationship("Project", back_populates="tasks")
@@ -55,8 +101,14 @@ class Comment(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     task_id = Column(UUID(as_uuid=True), ForeignKey("tasks.id"), nullable=False)
+    search_vector = deferred(Column(TSVECTOR, Computed(COMMENT_SEARCH_VECTOR, persisted=True)))
     task = relationship("Task", back_populates="comments")
 
+    __table_args__ = (
+        Index("ix_comments_task_id_created_at", "task_id", "created_at"),
+        Index("ix_comments_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
 
 
 
@@ -67,4 +119,150 @@ class User(Base):
     username = Column(String, unique=True, nullable=False)
     email = Column(String, unique=True, nullable=False)
     password = Column(String, nullable=False)
-    role = Column(String, default="user")
+    role = Column(String, default="user", server_default="user")
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String, primary_key=True)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+# ✅ Mirror Project.owners / Project.members into project_members whenever they change
+@event.listens_for(Session, "before_flush")
+def sync_project_memberships(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Project):
+            continue
+        if obj not in session.new and not (
+            get_history(obj, "owners").has_changes() or get_history(obj, "members").has_changes()
+        ):
+            continue
+        obj.memberships = [
+            ProjectMember(username=username, role=role)
+            for role, usernames in (("owner", obj.owners), ("member", obj.members))
+            for username in sorted(set(usernames or []))
+            if username
+        ]
+
+
+# ✅ Keep Task.comment_count in step with comment inserts and deletes
+@event.listens_for(Session, "before_flush")
+def count_task_comments(session, flush_context, instances):
+    deltas = {}
+    for obj in session.new:
+        if not isinstance(obj, Comment):
+            continue
+        task = obj.__dict__.get("task")
+        if task is not None and task in session.new:
+            # Task inserted in this same flush: count goes into its INSERT
+            task.comment_count = (task.comment_count or 0) + 1
+            continue
+        task_id = task.id if task is not None else obj.task_id
+        deltas[task_id] = deltas.get(task_id, 0) + 1
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, Comment):
+            continue
+        history = get_history(obj, "task_id")
+        removed = history.sum() if obj in session.deleted else history.deleted
+        added = [] if obj in session.deleted else history.added
+        for task_id in removed:
+            deltas[task_id] = deltas.get(task_id, 0) - 1
+        for task_id in added:
+            deltas[task_id] = deltas.get(task_id, 0) + 1
+
+    pending = {}
+    for task_id, delta in deltas.items():
+        if task_id is not None and delta:
+            pending.setdefault(delta, set()).add(task_id)
+    if pending:
+        session.info["pending_comment_counts"] = pending
+
+
+@event.listens_for(Session, "after_flush")
+def apply_pending_comment_counts(session, flush_context):
+    # Relative Core updates: concurrent writers never lose each other's
+    # increments, and Task.updated_at is not touched by a new comment
+    pending = session.info.pop("pending_comment_counts", None)
+    if not pending:
+        return
+    tasks = Task.__table__
+    for delta, task_ids in pending.items():
+        session.connection().execute(
+            update(tasks).where(tasks.c.id.in_(task_ids)).values(comment_count=tasks.c.comment_count + delta)
+        )
+    session.info["stale_comment_counts"] = set().union(*pending.values())
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def expire_stale_comment_counts(session, flush_context):
+    for task_id in session.info.pop("stale_comment_counts", ()):
+        task = session.identity_map.get(Session.identity_key(Task, task_id))
+        if task is not None:
+            session.expire(task, ["comment_count"])
+
+
+# ✅ Bump Project.version for every project whose data a flush changes
+@event.listens_for(Session, "before_flush")
+def bump_project_versions(session, flush_context, instances):
+    project_ids, task_ids = set(), set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        if isinstance(obj, Project):
+            # New projects start at 1; deleted ones have nothing left to
+            # cache here, but other workers' caches still hold them
+            if obj in session.dirty:
+                project_ids.add(obj.id)
+            elif obj in session.deleted:
+                record(session, "project", obj.id)
+        elif isinstance(obj, Task):
+            # Old and new project when a task moves
+            project_ids.update(get_history(obj, "project_id").sum())
+        elif isinstance(obj, Comment):
+            task = obj.__dict__.get("task")
+            if task is not None:
+                project_ids.add(task.project_id)
+            task_ids.update(get_history(obj, "task_id").sum())
+    project_ids.discard(None)
+    task_ids.discard(None)
+
+    # Projects already in the session get "version = version + 1" folded into
+    # their own UPDATE; the rest are bumped with one statement after the flush.
+    pending = set()
+    for project_id in project_ids:
+        project = session.identity_map.get(Session.identity_key(Project, project_id))
+        if project is None:
+            pending.add(project_id)
+        elif project not in session.deleted:
+            project.version = Project.version + 1
+            record(session, "project", project_id)
+    if pending or task_ids:
+        session.info["pending_version_bumps"] = (pending, task_ids)
+
+
+@event.listens_for(Session, "after_flush")
+def apply_pending_version_bumps(session, flush_context):
+    pending = session.info.pop("pending_version_bumps", None)
+    if pending is None:
+        return
+    record(session, "project", *bump_project_versions_now(session.connection(), *pending))
+
+
+def bump_project_versions_now(connection, project_ids=(), task_ids=()) -> set:
+    """One UPDATE bumping the given projects and the projects of the given
+    tasks. For writes that bypass the unit of work (Core/bulk statements).
+    Returns the ids of the bumped projects."""
+    conditions = []
+    if project_ids:
+        conditions.append(Project.id.in_(project_ids))
+    if task_ids:
+        conditions.append(Project.id.in_(select(Task.project_id).where(Task.id.in_(task_ids))))
+    if not conditions:
+        return set()
+    projects = Project.__table__
+    return set(connection.execute(
+        update(projects).where(or_(*conditions)).values(version=projects.c.version + 1).returning(projects.c.id)
+    ).scalars())
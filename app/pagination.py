@@ -0,0 +1,83 @@
+import base64
+import json
+from datetime import date, datetime
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+
+# Cursors are opaque to clients: base64 of the sort key plus the sort values of
+# the last row on the page. Resuming with "WHERE (col, id) > (:col, :id)" keeps
+# every page as cheap as the first one, unlike OFFSET.
+def encode_cursor(sort: str, values: list) -> str:
+    raw = json.dumps([sort, [_dump(v) for v in values]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_sort != sort:
+        raise HTTPException(status_code=400, detail="Cursor does not match sort order")
+    return values
+
+
+def _dump(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _load(column, value):
+    python_type = column.type.python_type
+    if value is None or isinstance(value, python_type):
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def keyset_page(query, sort: str, columns: dict, tiebreaker, cursor: str = None, limit: int = 50, session=None):
+    """Return ``(rows, next_cursor)`` for one page of ``query``.
+
+    ``sort`` is a key of ``columns``, optionally prefixed with ``-`` for
+    descending order. ``tiebreaker`` must be unique (the primary key) so the
+    order is total and no row is skipped or repeated between pages.
+    ``query`` is an ORM Query, or a Core ``select()`` executed on ``session``;
+    either way the sort column and tiebreaker must be among the results.
+    """
+    descending = sort.startswith("-")
+    column = columns[sort.lstrip("-")]
+    keys = tuple_(column, tiebreaker)
+
+    if cursor:
+        values = decode_cursor(cursor, sort)
+        try:
+            if len(values) != 2:
+                raise ValueError(values)
+            values = tuple_(_load(column, values[0]), _load(tiebreaker, values[1]))
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(keys < values if descending else keys > values)
+
+    if descending:
+        query = query.order_by(column.desc(), tiebreaker.desc())
+    else:
+        query = query.order_by(column.asc(), tiebreaker.asc())
+
+    query = query.limit(limit + 1)
+    rows = session.execute(query).all() if session is not None else query.all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, [getattr(last, column.key), getattr(last, tiebreaker.key)])
+    return rows, next_cursor
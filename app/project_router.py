@@ -1,65 +1,93 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from uuid import UUID
-from typing import List
-from sqlalchemy.orm import joinedload
+from typing import List, Literal, Optional
 from app import models, schemas
-from app.database import get_db
+from app.database import get_db, get_read_db, run_db
 from app.services import project_service
-from app.schemas import ProjectOut
+from app import exporter
+from app.etag import etag_matches, not_modified, project_etag
+from app.rows import RowsJSONResponse
 from app.dependencies import (
     get_current_user,
     require_admin_or_owner,
-    require_project_view_access,
     require_owner_for_membership_change,
+    require_project_view_access,
+    load_project,
+    project_version_for_viewer,
 )
-from fastapi.encoders import jsonable_encoder
 
 router = APIRouter()
 
+# Each handler awaits one run_db() call; the _helpers below hold the
+# synchronous session work it runs (see app.database.run_db).
+
 
 # ✅ Create Project (Any logged-in user can create)
 @router.post("/projects", response_model=schemas.Project)
-def create_project(
+async def create_project(
     p: schemas.ProjectCreate,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    return project_service.create_project(db, p, owner=current_user.username)
+    return await run_db(db, project_service.create_project, p, owner=current_user.username)
 
 
 # ✅ Get All Projects (Admin sees all, users see only where owner/member)
-@router.get("/projects", response_model=List[ProjectOut])
-def list_projects(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
-):
+# Task counts per project by default; every task only with ?include=tasks
+def _list_projects(db: Session, current_user, include_tasks: bool):
     if current_user.role == "admin":
-        return project_service.get_all_projects(db)
-    return project_service.get_user_related_projects(db, current_user.username)
+        return project_service.get_all_projects(db, include_tasks)
+    return project_service.get_user_related_projects(db, current_user.username, include_tasks)
 
 
-# ✅ Get Single Project (Admin / Owner / Member)
-@router.get("/projects/{project_id}", response_model=schemas.ProjectOut)
-def get_project_by_id(
-    project_id: UUID,
-    db: Session = Depends(get_db),
+@router.get(
+    "/projects",
+    response_model=List[schemas.ProjectSummary],
+    response_class=RowsJSONResponse,
+)
+async def list_projects(
+    include: Optional[schemas.ProjectInclude] = None,
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    require_project_view_access(project_id, db, current_user)
+    # Plain dicts from Core rows, encoded without response_model validation
+    return RowsJSONResponse(await run_db(db, _list_projects, current_user, include == "tasks"))
+
+
+# ✅ Get Single Project (Admin / Owner / Member), 304 when If-None-Match is current
+def _get_project_by_id(db: Session, project_id: UUID, current_user, if_none_match):
+    # Version first: a change landing in between makes the body newer than
+    # the ETag (one extra 200 later), never older
+    version = project_version_for_viewer(db, project_id, current_user)
+    etag = project_etag("project", project_id, version)
+    if etag_matches(if_none_match, etag):
+        return etag, None
     project = project_service.get_project_by_id(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    return project
+    # Serialize here so project.tasks is loaded while the session is usable
+    return etag, schemas.ProjectOut.model_validate(project, from_attributes=True)
 
-# ✅ Update Project (Only Admin or Owner)
-@router.put("/projects/{project_id}", response_model=schemas.Project)
-def update_project(
+
+@router.get("/projects/{project_id}", response_model=schemas.ProjectOut)
+async def get_project_by_id(
     project_id: UUID,
-    updated_data: schemas.ProjectUpdate,
-    db: Session = Depends(get_db),
+    response: Response,
+    if_none_match: str = Header(None),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user),
 ):
+    etag, project = await run_db(db, _get_project_by_id, project_id, current_user, if_none_match)
+    if project is None:
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return project
+
+
+# ✅ Update Project (Only Admin or Owner)
+def _update_project(db: Session, project_id: UUID, updated_data: schemas.ProjectUpdate, current_user):
     require_admin_or_owner(project_id, db, current_user)
     project = project_service.update_project_details(db, project_id, updated_data)
     if not project:
@@ -67,13 +95,18 @@ def update_project(
     return project
 
 
-# ✅ Delete Project (Only Admin or Owner)
-@router.delete("/projects/{project_id}", response_model=schemas.Project)
-def delete_project(
+@router.put("/projects/{project_id}", response_model=schemas.Project)
+async def update_project(
     project_id: UUID,
+    updated_data: schemas.ProjectUpdate,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
+    return await run_db(db, _update_project, project_id, updated_data, current_user)
+
+
+# ✅ Delete Project (Only Admin or Owner)
+def _delete_project(db: Session, project_id: UUID, current_user):
     require_admin_or_owner(project_id, db, current_user)
     deleted_project = project_service.delete_project_by_id(db, project_id)
     if not deleted_project:
@@ -81,43 +114,91 @@ def delete_project(
     return deleted_project
 
 
+@router.delete("/projects/{project_id}", response_model=schemas.Project)
+async def delete_project(
+    project_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    return await run_db(db, _delete_project, project_id, current_user)
+
+
 # ✅ Update Project Members (Only Owners)
+def _update_project_members(db: Session, project_id: UUID, members: List[str], current_user):
+    require_owner_for_membership_change(project_id, db, current_user)
+    return project_service.update_project_members(db, project_id, members)
+
+
 @router.put("/projects/{project_id}/members")
-def update_project_members(
+async def update_project_members(
     project_id: UUID,
     members_update: schemas.ProjectMembersUpdate,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    require_owner_for_membership_change(project_id, db, current_user)
-    return project_service.update_project_members(db, project_id, members_update.members)
+    return await run_db(db, _update_project_members, project_id, members_update.members, current_user)
 
 
 # ✅ Update Project Owners (Only Owners)
+def _update_project_owners(db: Session, project_id: UUID, owners: List[str], current_user):
+    require_owner_for_membership_change(project_id, db, current_user)
+    return project_service.update_project_owners(db, project_id, owners)
+
+
 @router.put("/projects/{project_id}/owners")
-def update_project_owners(
+async def update_project_owners(
     project_id: UUID,
     owners_update: schemas.ProjectOwnersUpdate,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    require_owner_for_membership_change(project_id, db, current_user)
-    return project_service.update_project_owners(db, project_id, owners_update.owners)
+    return await run_db(db, _update_project_owners, project_id, owners_update.owners, current_user)
+
 
 # ✅ Get All Members (Members + Owners) of a Project
+def _get_project_members(db: Session, project_id: UUID):
+    project = load_project(db, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    # Members and owners, each user once
+    member_usernames = db.query(models.ProjectMember.username).filter(
+        models.ProjectMember.project_id == project_id
+    )
+    users = db.query(models.User).filter(models.User.username.in_(member_usernames)).all()
+    return users
+
+
 @router.get("/projects/{project_id}/members", response_model=List[schemas.UserPublic])
-def get_project_members(
+async def get_project_members(
     project_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
+    return await run_db(db, _get_project_members, project_id)
 
-    # Combine members and owners, remove duplicates and empty strings
-    usernames = (project.members or []) + (project.owners or [])
-    usernames = list(set(usernames))  # Remove duplicates
 
-    users = db.query(models.User).filter(models.User.username.in_(usernames)).all()
-    return users
+# ✅ Export a Project (Admin / Owner / Member), streamed as NDJSON or CSV
+def _check_export_access(db: Session, project_id: UUID, current_user):
+    require_project_view_access(project_id, db, current_user)
+
+
+@router.get("/projects/{project_id}/export")
+async def export_project(
+    project_id: UUID,
+    kind: Literal["all", "tasks", "comments"] = "all",
+    format: Literal["ndjson", "csv"] = "ndjson",
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    if format == "csv" and kind == "all":
+        raise HTTPException(status_code=400, detail="CSV export needs kind=tasks or kind=comments")
+    # Checked before the first byte, so refusals are still proper 403/404s
+    await run_db(db, _check_export_access, project_id, current_user)
+    body = await exporter.stream_project(project_id, kind, format)
+    filename = f"project-{project_id}-{kind}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=exporter.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,117 @@
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Add X-DB-Statements / X-DB-Time-Ms to every response
+SQL_STATS_HEADERS = os.getenv("SQL_STATS_HEADERS", "true").lower() in ("1", "true", "yes")
+# Log a warning for requests running more statements than this; 0 disables it
+SQL_STATS_WARN_STATEMENTS = int(os.getenv("SQL_STATS_WARN_STATEMENTS", "50"))
+
+
+class QueryStats:
+    """Statements and DB time of one request.
+
+    A request's statements run on the event loop (async mode) or on
+    threadpool workers (sync mode), which both see the request's context,
+    so the counters are shared through a ContextVar rather than a thread.
+    """
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.statements += 1
+            self.seconds += seconds
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current() -> Optional[QueryStats]:
+    return _current.get()
+
+
+# Registered on the Engine class, so every engine (primary, replica and the
+# sync side of the async engines) reports into the same counters
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = conn.info.get("query_started")
+    if stats is not None and started:
+        stats.record(time.perf_counter() - started.pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _failed(exception_context):
+    # A failed statement still counts, and must not leave its start time behind
+    stats = _current.get()
+    conn = exception_context.connection
+    started = conn.info.get("query_started") if conn is not None else None
+    if stats is not None and started:
+        stats.record(time.perf_counter() - started.pop())
+
+
+class QueryStatsMiddleware:
+    """Pure ASGI middleware: one QueryStats per HTTP request.
+
+    Headers are added when the response starts, so statements a streaming
+    body runs afterwards (exports) only show up in the log line.
+    """
+
+    def __init__(self, app, headers: bool = SQL_STATS_HEADERS, warn_statements: int = SQL_STATS_WARN_STATEMENTS):
+        self.app = app
+        self.headers = headers
+        self.warn_statements = warn_statements
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+        # Also on the scope, for middleware further out (app.metrics)
+        scope["query_stats"] = stats
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start" and self.headers:
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-db-statements", str(stats.statements).encode()),
+                    (b"x-db-time-ms", f"{stats.seconds * 1000:.2f}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current.reset(token)
+            self._log(scope, stats)
+
+    def _log(self, scope, stats: QueryStats):
+        if self.warn_statements and stats.statements > self.warn_statements:
+            logger.warning(
+                "%s %s ran %d SQL statements (%.1f ms)",
+                scope["method"], scope["path"], stats.statements, stats.seconds * 1000,
+            )
+        else:
+            logger.debug(
+                "%s %s: %d SQL statements, %.1f ms",
+                scope["method"], scope["path"], stats.statements, stats.seconds * 1000,
+            )
@@ -6,7 +6,7 @@ from uuid import UUID
 from app.schemas import CommentCreate
 
 def create_comment(db: Session, task_id: UUID, comment_data: CommentCreate):
-    comment = Comment(task_id=task_id, **comment_data.dict())
+    comment = Comment(task_id=task_id, **comment_data.model_dump())
     db.add(comment)
     db.commit()
     db.refresh(comment)
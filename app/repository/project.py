@@ -5,7 +5,7 @@ from datetime import datetime
 
 def create_project(db: Session, data: schemas.ProjectCreate, owner: str):
     proj = models.Project(
-        **data.dict(),
+        **data.model_dump(),
         owner=owner,                   
         created_at=datetime.utcnow()    
     )
@@ -31,7 +31,7 @@ def update_project(db: Session, project_id: UUID, data: schemas.ProjectCreate):
     proj = get_project_by_id(db, project_id)
     if not proj:
         return None
-    for key, val in data.dict().items():
+    for key, val in data.model_dump().items():
         setattr(proj, key, val)
     db.commit()
     db.refresh(proj)
@@ -0,0 +1,112 @@
+import html
+
+from sqlalchemy import cast, func, literal, select, union_all
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.pagination import keyset_page
+from app.repository import task as task_repo
+
+SEARCH_CONFIG = "english"
+# Snippets are HTML: ts_headline marks matches with control characters (which
+# are stripped from the text first), the text is escaped, then the markers
+# become <mark> tags. User markup never reaches the client unescaped.
+START_SEL, STOP_SEL = "\x02", "\x03"
+SNIPPET_OPTIONS = f'MaxFragments=1, MaxWords=24, MinWords=8, StartSel="{START_SEL}", StopSel="{STOP_SEL}"'
+
+
+def _visible(query, user: models.User):
+    # Same visibility as GET /tasks: admins everything attached to a project,
+    # others their projects' tasks plus tasks assigned to them
+    query = query.where(models.Task.project_id.isnot(None))
+    if user.role == "admin":
+        return query
+    return query.where(task_repo.visible_to(user))
+
+
+def _filtered(query, filters: schemas.SearchFilters):
+    if filters.project_id: query = query.where(models.Task.project_id == filters.project_id)
+    if filters.status: query = query.where(models.Task.status == filters.status)
+    if filters.priority: query = query.where(models.Task.priority == filters.priority)
+    if filters.assignee: query = query.where(models.Task.assignee == filters.assignee)
+    return query
+
+
+def _rank(vector, tsquery):
+    # ts_rank is real (float4). Read as a Python float and sent back in the
+    # cursor as float8, its value no longer equals the row's, so rows tied at
+    # the cursor's rank would come back on every page. A double round-trips.
+    return cast(func.ts_rank(vector, tsquery), DOUBLE_PRECISION).label("rank")
+
+
+def search(db: Session, user: models.User, q: str, filters: schemas.SearchFilters,
+           cursor: str = None, limit: int = 20):
+    """Ranked task and comment hits for ``q`` (web search syntax: quotes, OR, -word).
+
+    The ranked page is computed over ids and ranks only; titles and snippets
+    (ts_headline is expensive) are fetched afterwards for the page's rows.
+    """
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    branches = []
+    if filters.type in (None, "task"):
+        tasks = select(
+            literal("task").label("type"), models.Task.id, models.Task.id.label("task_id"),
+            models.Task.project_id, _rank(models.Task.search_vector, tsquery),
+        ).where(models.Task.search_vector.op("@@")(tsquery))
+        branches.append(_filtered(_visible(tasks, user), filters))
+    if filters.type in (None, "comment"):
+        comments = select(
+            literal("comment").label("type"), models.Comment.id, models.Comment.task_id,
+            models.Task.project_id, _rank(models.Comment.search_vector, tsquery),
+        ).join(models.Task, models.Task.id == models.Comment.task_id).where(
+            models.Comment.search_vector.op("@@")(tsquery)
+        )
+        branches.append(_filtered(_visible(comments, user), filters))
+
+    hits = union_all(*branches).subquery("hits") if len(branches) > 1 else branches[0].subquery("hits")
+    rows, next_cursor = keyset_page(
+        select(hits), "-rank", {"rank": hits.c.rank}, hits.c.id, cursor, limit, session=db
+    )
+    return _with_snippets(db, rows, tsquery), next_cursor
+
+
+def _headline(document, tsquery):
+    plain = func.translate(document, START_SEL + STOP_SEL, "")
+    return func.ts_headline(SEARCH_CONFIG, plain, tsquery, SNIPPET_OPTIONS).label("snippet")
+
+
+def _snippet_html(snippet: str) -> str:
+    return html.escape(snippet).replace(START_SEL, "<mark>").replace(STOP_SEL, "</mark>")
+
+
+def _with_snippets(db: Session, rows, tsquery):
+    task_ids = [row.id for row in rows if row.type == "task"]
+    comment_ids = [row.id for row in rows if row.type == "comment"]
+    details = {}
+    if task_ids:
+        document = func.concat_ws(" ", models.Task.title, models.Task.description)
+        details.update(
+            (row.id, row) for row in db.execute(
+                select(
+                    models.Task.id, models.Task.title,
+                    _headline(document, tsquery),
+                ).where(models.Task.id.in_(task_ids))
+            )
+        )
+    if comment_ids:
+        details.update(
+            (row.id, row) for row in db.execute(
+                select(
+                    models.Comment.id, models.Task.title,
+                    _headline(models.Comment.content, tsquery),
+                )
+                .join(models.Task, models.Task.id == models.Comment.task_id)
+                .where(models.Comment.id.in_(comment_ids))
+            )
+        )
+    # A hit deleted since the ranking query is left out, not a 500
+    return [
+        {**row._asdict(), "title": details[row.id].title, "snippet": _snippet_html(details[row.id].snippet)}
+        for row in rows if row.id in details
+    ]
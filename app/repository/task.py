@@ -1,10 +1,23 @@
+from datetime import datetime
+from sqlalchemy import any_, func, insert, select, update
 from sqlalchemy.orm import Session
 from uuid import UUID
-from app import models, schemas
+from app import events, invalidation, models, schemas
 from fastapi import HTTPException
+from app.pagination import keyset_page
+from app.rows import schema_columns
+
+TASK_SORT_COLUMNS = {
+    "created_at": models.Task.created_at,
+    "updated_at": models.Task.updated_at,
+    "title": models.Task.title,
+}
+
+# Columns of schemas.Task: list endpoints return plain rows of these
+TASK_LIST_COLUMNS = schema_columns(schemas.Task, models.Task.__table__)
 
 def create_task(db: Session, data: schemas.TaskCreate,creator: str):
-    task_data = data.dict()
+    task_data = data.model_dump()
     task_data["created_by"] = creator 
     if task_data.get("project_id"):
         task_data["project_id"] = UUID(str(task_data["project_id"]))
@@ -21,13 +34,45 @@ def get_tasks(db: Session, status: str = None, assignee: str = None):
     if assignee: q = q.filter(models.Task.assignee == assignee)
     return q.all()
 
+def filter_tasks(q, filters: schemas.TaskFilters):
+    if filters.status: q = q.filter(models.Task.status == filters.status)
+    if filters.priority: q = q.filter(models.Task.priority == filters.priority)
+    if filters.assignee: q = q.filter(models.Task.assignee == filters.assignee)
+    if filters.due_from: q = q.filter(models.Task.due_date >= filters.due_from)
+    if filters.due_to: q = q.filter(models.Task.due_date <= filters.due_to)
+    return q
+
+def visible_to(user: models.User):
+    """Filter for tasks of the user's projects plus tasks assigned to them.
+
+    The project ids are collected into an array first: ``project_id IN
+    (subquery) OR assignee = ...`` cannot use an index on either side and
+    scans every task, ``project_id = ANY(array) OR ...`` is a BitmapOr of
+    two index scans.
+    """
+    member_of = select(models.ProjectMember.project_id).where(models.ProjectMember.username == user.username)
+    # Renders ARRAY((SELECT ...)): evaluated once, before the scan
+    project_ids = func.array(member_of.scalar_subquery())
+    return (models.Task.project_id == any_(project_ids)) | (models.Task.assignee == user.username)
+
+
+def get_visible_tasks(db: Session, user: models.User, filters: schemas.TaskFilters,
+                      sort: str = "created_at", cursor: str = None, limit: int = 50):
+    # Admins see every task attached to a project; everyone else sees tasks of
+    # projects they own or belong to, plus tasks assigned to them.
+    q = select(*TASK_LIST_COLUMNS).join(models.Project, models.Project.id == models.Task.project_id)
+    if user.role != "admin":
+        q = q.filter(visible_to(user))
+    q = filter_tasks(q, filters)
+    return keyset_page(q, sort, TASK_SORT_COLUMNS, models.Task.id, cursor, limit, session=db)
+
 def get_task_by_id(db: Session, task_id: UUID):
-    return db.query(models.Task).filter(models.Task.id == task_id).first()
+    return db.get(models.Task, task_id)
 
-def update_task(db: Session, task_id: UUID, data: schemas.TaskCreate):
+def update_task(db: Session, task_id: UUID, data: schemas.TaskUpdate):
     task = get_task_by_id(db, task_id)
     if not task: return None
-    for k, v in data.dict().items(): setattr(task, k, v)
+    for k, v in data.model_dump(exclude_unset=True).items(): setattr(task, k, v)
     db.commit(); db.refresh(task); return task
 
 def delete_task(db: Session, task_id: UUID):
@@ -35,8 +80,11 @@ def delete_task(db: Session, task_id: UUID):
     if not task: return None
     db.delete(task); db.commit(); return task
 
-def get_tasks_by_project(db: Session, project_id: UUID):
-    return db.query(models.Task).filter(models.Task.project_id == project_id).all()
+def get_tasks_by_project(db: Session, project_id: UUID, filters: schemas.TaskFilters,
+                         sort: str = "created_at", cursor: str = None, limit: int = 50):
+    q = select(*TASK_LIST_COLUMNS).filter(models.Task.project_id == project_id)
+    q = filter_tasks(q, filters)
+    return keyset_page(q, sort, TASK_SORT_COLUMNS, models.Task.id, cursor, limit, session=db)
 
 
 def get_task_by_project_and_id(db: Session, project_id: UUID, task_id: UUID):
@@ -47,3 +95,50 @@ def get_task_by_project_and_id(db: Session, project_id: UUID, task_id: UUID):
     )
 
 
+
+
+# Batch writes go around the unit of work (one multi-row statement each), so
+# they bump project versions, invalidate cached ones in every worker and
+# record change events themselves.
+def create_tasks(db: Session, rows: list):
+    if rows:
+        db.execute(insert(models.Task.__table__), rows)
+        bumped = models.bump_project_versions_now(db.connection(), {row["project_id"] for row in rows})
+        invalidation.record(db, "project", *bumped)
+        for row in rows:
+            events.record(db, "task.created", row["project_id"], task_id=row["id"])
+    db.commit()
+
+
+def get_task_access_rows(db: Session, task_ids):
+    rows = db.execute(
+        select(models.Task.id, models.Task.project_id, models.Task.assignee).where(models.Task.id.in_(set(task_ids)))
+    )
+    return {row.id: row for row in rows}
+
+
+def update_tasks(db: Session, rows: list, task_projects: dict):
+    """``task_projects`` maps the id of every task in ``rows`` to its project."""
+    # ORM bulk UPDATE by primary key: one executemany per distinct set of columns
+    if rows:
+        db.execute(update(models.Task), rows)
+        bumped = models.bump_project_versions_now(db.connection(), set(task_projects.values()))
+        invalidation.record(db, "project", *bumped)
+        for row in rows:
+            events.record(db, "task.updated", task_projects[row["id"]], task_id=row["id"])
+    db.commit()
+
+
+def transition_tasks(db: Session, project_id: UUID, filters: schemas.TaskFilters, to_status: str) -> int:
+    stmt = update(models.Task.__table__).where(
+        models.Task.project_id == project_id, models.Task.status.is_distinct_from(to_status)
+    )
+    stmt = filter_tasks(stmt, filters).values(status=to_status, updated_at=datetime.utcnow())
+    task_ids = db.execute(stmt.returning(models.Task.id)).scalars().all()
+    if task_ids:
+        bumped = models.bump_project_versions_now(db.connection(), {project_id})
+        invalidation.record(db, "project", *bumped)
+        for task_id in task_ids:
+            events.record(db, "task.updated", project_id, task_id=task_id)
+    db.commit()
+    return len(task_ids)
@@ -0,0 +1,35 @@
+from typing import Any
+from uuid import UUID
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from sqlalchemy import Table
+
+
+# Hot list endpoints skip ORM objects and response_model validation: they
+# select exactly the columns of the response schema with Core and hand plain
+# dicts to RowsJSONResponse (orjson), which encodes UUID/date/datetime natively.
+def schema_columns(schema: type[BaseModel], table: Table, exclude=()) -> list:
+    """Columns of ``table`` named like the fields of ``schema``, in field order."""
+    return [table.c[name] for name in schema.model_fields if name not in exclude]
+
+
+def as_dicts(rows) -> list:
+    return [row._asdict() for row in rows]
+
+
+def _default(value):
+    # orjson only takes uuid.UUID itself; asyncpg returns a subclass of it
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class RowsJSONResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
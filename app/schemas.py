@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from uuid import UUID
-from typing import Optional, List
+from typing import Dict, Optional, List, Literal
 from datetime import date, datetime
 
 # ✅ Tasks Schemas
@@ -18,8 +18,8 @@ class Task(TaskCreate):
     created_at: datetime
     updated_at: datetime
     created_by: str
-    class Config:
-       orm_mode = True 
+    comment_count: int = 0
+    model_config = ConfigDict(from_attributes=True)
 
 class TaskUpdate(BaseModel):
     title: Optional[str] = None
@@ -30,6 +30,74 @@ class TaskUpdate(BaseModel):
     due_date: Optional[date] = None
 
 
+class TaskFilters(BaseModel):
+    status: Optional[str] = None
+    priority: Optional[str] = None
+    assignee: Optional[str] = None
+    due_from: Optional[date] = None
+    due_to: Optional[date] = None
+
+TaskSort = Literal["created_at", "-created_at", "updated_at", "-updated_at", "title", "-title"]
+
+class TaskPage(BaseModel):
+    items: List[Task]
+    next_cursor: Optional[str] = None
+
+
+# ✅ Full-text search
+SearchType = Literal["task", "comment"]
+
+class SearchFilters(BaseModel):
+    project_id: Optional[UUID] = None
+    status: Optional[str] = None
+    priority: Optional[str] = None
+    assignee: Optional[str] = None
+    type: Optional[SearchType] = None
+
+class SearchHit(BaseModel):
+    type: SearchType
+    id: UUID
+    task_id: UUID
+    project_id: Optional[UUID]
+    title: str
+    snippet: str
+    rank: float
+
+class SearchPage(BaseModel):
+    items: List[SearchHit]
+    next_cursor: Optional[str] = None
+
+
+# ✅ Batch task mutations
+TASK_BATCH_MAX = 500
+
+class TaskBatchCreate(BaseModel):
+    items: List[TaskCreate] = Field(..., min_length=1, max_length=TASK_BATCH_MAX)
+
+class TaskBatchUpdateItem(TaskUpdate):
+    id: UUID
+
+class TaskBatchUpdate(BaseModel):
+    items: List[TaskBatchUpdateItem] = Field(..., min_length=1, max_length=TASK_BATCH_MAX)
+
+class TaskBatchItemResult(BaseModel):
+    index: int
+    status: int  # HTTP status the single-item endpoint would have returned
+    id: Optional[UUID] = None
+    detail: Optional[str] = None
+
+class TaskBatchResult(BaseModel):
+    applied: int
+    results: List[TaskBatchItemResult]
+
+class TaskTransition(BaseModel):
+    filters: TaskFilters = TaskFilters()
+    to_status: str
+
+class TaskTransitionResult(BaseModel):
+    updated: int
+
+
 class TaskRead(BaseModel):
     id: UUID
     title: str
@@ -38,8 +106,7 @@ class TaskRead(BaseModel):
     priority: Optional[str]
     created_by: str
 
-    class Config:
-       orm_mode = True 
+    model_config = ConfigDict(from_attributes=True)
 
 # ✅ Project Schemas
 class ProjectBase(BaseModel):
@@ -67,8 +134,7 @@ class Project(BaseModel):
     members: List[str] = []
     created_at: datetime
 
-    class Config:
-       orm_mode = True 
+    model_config = ConfigDict(from_attributes=True)
 
 class ProjectRead(BaseModel):
     id: UUID
@@ -80,8 +146,7 @@ class ProjectRead(BaseModel):
     members: List[str] = []
     tasks: List[TaskRead] = []
 
-    class Config:
-       orm_mode = True 
+    model_config = ConfigDict(from_attributes=True)
 
 class ProjectOut(BaseModel):
     id: UUID
@@ -94,8 +159,29 @@ class ProjectOut(BaseModel):
     created_at: datetime
     tasks: List[TaskRead] = []
 
-    class Config:
-       orm_mode = True 
+    model_config = ConfigDict(from_attributes=True)
+
+# ✅ Task rollup per project, for listings that only need counts
+class TaskRollup(BaseModel):
+    total: int = 0
+    by_status: Dict[str, int] = {}
+    by_priority: Dict[str, int] = {}
+    overdue: int = 0
+    last_activity: Optional[datetime] = None
+
+class ProjectSummary(BaseModel):
+    id: UUID
+    name: str
+    description: Optional[str]
+    status: str
+    owners: List[str] = []
+    members: List[str] = []
+    due_date: Optional[date]
+    created_at: datetime
+    task_summary: TaskRollup
+    tasks: Optional[List[TaskRead]] = None  # only with ?include=tasks
+
+ProjectInclude = Literal["tasks"]
 
 class ProjectMembersUpdate(BaseModel):
     members: List[str]
@@ -115,8 +201,7 @@ class Comment(CommentBase):
     id: UUID
     created_at: datetime
     task_id: UUID
-    class Config:
-       orm_mode = True 
+    model_config = ConfigDict(from_attributes=True)
 
 # ✅ User Schemas
 class UserCreate(BaseModel):
@@ -134,22 +219,19 @@ class UserResponse(BaseModel):
     email: str
     role: str
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class UserOut(BaseModel):
     id: int
     name: str
     email: EmailStr
     
-    class Config:
-        orm_mode = True 
+    model_config = ConfigDict(from_attributes=True)
 
 
 class UserPublic(BaseModel):
-    id: str
+    id: UUID
     username: str
     email: str
 
-    class Config:
-         orm_mode = True 
+    model_config = ConfigDict(from_attributes=True)
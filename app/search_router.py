@@ -0,0 +1,30 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.database import get_read_db, run_db
+from app.dependencies import get_current_user
+from app.repository import search as search_repo
+from app.rows import RowsJSONResponse
+
+router = APIRouter()
+
+
+# ✅ Full-text search over tasks and comments of the projects the caller can see
+def _search(db: Session, current_user, q, filters, cursor, limit):
+    items, next_cursor = search_repo.search(db, current_user, q, filters, cursor, limit)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/search", response_model=schemas.SearchPage, response_class=RowsJSONResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    filters: schemas.SearchFilters = Depends(),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    return RowsJSONResponse(await run_db(db, _search, current_user, q, filters, cursor, limit))
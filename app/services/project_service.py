@@ -1,8 +1,20 @@
+from sqlalchemy import and_, func, select, tuple_
 from sqlalchemy.orm import Session
 from uuid import UUID
 from app import models, schemas
+from app.dependencies import load_project
+from app.rows import as_dicts, schema_columns
 from typing import List
 
+# Columns of schemas.ProjectSummary / TaskRead: project lists return plain dicts
+PROJECT_LIST_COLUMNS = schema_columns(
+    schemas.ProjectSummary, models.Project.__table__, exclude=("task_summary", "tasks")
+)
+TASK_READ_COLUMNS = schema_columns(schemas.TaskRead, models.Task.__table__)
+
+# Tasks in these states are never overdue
+CLOSED_TASK_STATUSES = ("done", "completed", "cancelled")
+
 # ✅ Create Project
 def create_project(db: Session, project_data: schemas.ProjectCreate, owner: str):
     new_project = models.Project(
@@ -20,29 +32,91 @@ def create_project(db: Session, project_data: schemas.ProjectCreate, owner: str)
 
 
 # ✅ Get All Projects (For Admins)
-def get_all_projects(db: Session):
-    projects = db.query(models.Project).all()
-    
-    return projects
-def get_all_projects(db: Session):
-    return db.query(models.Project).all()
+def get_all_projects(db: Session, include_tasks: bool = False):
+    return _project_summaries(db, None, include_tasks)
 
 
 # ✅ Get Projects for Specific User (Owner or Member)
-def get_user_related_projects(db: Session, username: str):
-    return db.query(models.Project).filter(
-        (models.Project.owners.any(username)) | (models.Project.members.any(username))
-    ).all()
+def get_user_related_projects(db: Session, username: str, include_tasks: bool = False):
+    member_of = select(models.ProjectMember.project_id).where(models.ProjectMember.username == username)
+    return _project_summaries(db, member_of, include_tasks)
+
+
+# ✅ ProjectSummary-shaped dicts: one query for the projects, one aggregate for
+# all their task rollups, and the full tasks only when asked for
+def _project_summaries(db: Session, visible, include_tasks: bool):
+    query = select(*PROJECT_LIST_COLUMNS)
+    if visible is not None:
+        query = query.where(models.Project.id.in_(visible))
+    projects = as_dicts(db.execute(query))
+    if not projects:
+        return projects
+
+    by_id = {project["id"]: project for project in projects}
+    rollups = task_rollups(db, visible)
+    for project in projects:
+        project["task_summary"] = rollups.get(project["id"]) or _empty_rollup()
+
+    if include_tasks:
+        for project in projects:
+            project["tasks"] = []
+        tasks = select(models.Task.project_id, *TASK_READ_COLUMNS).where(models.Task.project_id.in_(by_id))
+        for task in db.execute(tasks):
+            task = task._asdict()
+            by_id[task.pop("project_id")]["tasks"].append(task)
+    return projects
 
 
+def _empty_rollup():
+    return {"total": 0, "by_status": {}, "by_priority": {}, "overdue": 0, "last_activity": None}
+
+
+def task_rollups(db: Session, visible=None) -> dict:
+    """TaskRollup dicts by project id, for every project in ``visible`` (all
+    projects when None), from a single GROUPING SETS aggregate over tasks."""
+    task = models.Task
+    overdue = and_(task.due_date < func.current_date(), task.status.notin_(CLOSED_TASK_STATUSES))
+    # GROUPING() bit 1 = status rolled up, bit 0 = priority rolled up
+    grouping = func.grouping(task.status, task.priority)
+    query = (
+        select(
+            task.project_id,
+            task.status,
+            task.priority,
+            grouping.label("grouping"),
+            func.count().label("tasks"),
+            func.count().filter(overdue).label("overdue"),
+            func.max(func.greatest(task.created_at, task.updated_at)).label("last_activity"),
+        )
+        .where(task.project_id.isnot(None))
+        .group_by(
+            func.grouping_sets(
+                tuple_(task.project_id, task.status),
+                tuple_(task.project_id, task.priority),
+                tuple_(task.project_id),
+            )
+        )
+    )
+    if visible is not None:
+        query = query.where(task.project_id.in_(visible))
 
-# ✅ Get Single Project By ID
-def get_project_by_id(db: Session, project_id: UUID):
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
+    rollups = {}
+    for row in db.execute(query):
+        rollup = rollups.setdefault(row.project_id, _empty_rollup())
+        if row.grouping == 1:
+            rollup["by_status"][row.status or "none"] = row.tasks
+        elif row.grouping == 2:
+            rollup["by_priority"][row.priority or "none"] = row.tasks
+        else:
+            rollup.update(total=row.tasks, overdue=row.overdue, last_activity=row.last_activity)
+    return rollups
 
-   
 
-    return project
+
+# ✅ Get Single Project By ID
+def get_project_by_id(db: Session, project_id: UUID):
+    # Served from the session identity map when an access check already loaded it
+    return load_project(db, project_id)
 
 
 
@@ -52,7 +126,7 @@ def update_project_details(db: Session, project_id: UUID, project_data: schemas.
     if not project:
         return None
 
-    for field, value in project_data.dict(exclude_unset=True).items():
+    for field, value in project_data.model_dump(exclude_unset=True).items():
         setattr(project, field, value)
 
     db.commit()
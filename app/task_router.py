@@ -1,143 +1,230 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List
-from uuid import UUID
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID, uuid4
 
 from app import schemas, models
-from app.database import get_db
+from app.database import get_db, get_read_db, run_db
 from app.repository import task as task_repo
+from app.etag import etag_matches, not_modified, project_etag
+from app.rows import RowsJSONResponse, as_dicts
 from app.dependencies import (
     get_current_user,
+    has_project_role,
+    load_project,
+    load_task,
     require_admin_or_owner,
     require_task_update_access,
     require_admin_or_owner_by_task_id,
     require_project_participant,
+    project_access,
+    project_version_for_viewer,
 )
 
 router = APIRouter()
 
+# Each handler awaits one run_db() call; the _helpers below hold the
+# synchronous session work it runs (see app.database.run_db).
+
 # --- Create Task ---
+def _create_task(db: Session, t: schemas.TaskCreate, current_user):
+    require_project_participant(t.project_id, db, current_user)
+    return task_repo.create_task(db, t, current_user.username)
+
+
 @router.post("/tasks", response_model=schemas.Task)
-def create_task(
+async def create_task(
     t: schemas.TaskCreate,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    require_project_participant(t.project_id, db, current_user)
-    return task_repo.create_task(db, t, current_user.username)
+    return await run_db(db, _create_task, t, current_user)
+
+
+# --- Batch Create: same rules as POST /tasks, checked once per project ---
+def _create_tasks_batch(db: Session, batch: schemas.TaskBatchCreate, current_user):
+    access = project_access(db, (item.project_id for item in batch.items), current_user)
+    results, rows = [], []
+    for index, item in enumerate(batch.items):
+        if item.project_id not in access:
+            results.append({"index": index, "status": 404, "detail": "Project not found"})
+        elif not access[item.project_id]:
+            results.append({"index": index, "status": 403, "detail": "Only project participants can create tasks"})
+        else:
+            row = {**item.model_dump(), "id": uuid4(), "created_by": current_user.username}
+            rows.append(row)
+            results.append({"index": index, "status": 201, "id": row["id"]})
+    task_repo.create_tasks(db, rows)
+    return {"applied": len(rows), "results": results}
+
+
+@router.post("/tasks/batch", response_model=schemas.TaskBatchResult)
+async def create_tasks_batch(
+    batch: schemas.TaskBatchCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    return await run_db(db, _create_tasks_batch, batch, current_user)
+
+
+# --- Batch Update: partial updates, same rules as PUT /tasks/{task_id} ---
+def _update_tasks_batch(db: Session, batch: schemas.TaskBatchUpdate, current_user):
+    tasks = task_repo.get_task_access_rows(db, (item.id for item in batch.items))
+    owns = project_access(db, (task.project_id for task in tasks.values()), current_user, roles=("owner",))
+    now = datetime.utcnow()
+    results, rows, task_projects = [], [], {}
+    for index, item in enumerate(batch.items):
+        task = tasks.get(item.id)
+        if task is None:
+            results.append({"index": index, "id": item.id, "status": 404, "detail": "Task not found"})
+            continue
+        if task.project_id not in owns:
+            results.append({"index": index, "id": item.id, "status": 404, "detail": "Project not found"})
+            continue
+        if task.assignee != current_user.username and not owns[task.project_id]:
+            results.append({"index": index, "id": item.id, "status": 403,
+                            "detail": "Not authorized to update this task"})
+            continue
+        rows.append({**item.model_dump(exclude_unset=True), "id": item.id, "updated_at": now})
+        task_projects[item.id] = task.project_id
+        results.append({"index": index, "id": item.id, "status": 200})
+    task_repo.update_tasks(db, rows, task_projects)
+    return {"applied": len(rows), "results": results}
 
 
-# --- List Tasks: Admin, Owner, Member, or Assignee only ---
-@router.get("/tasks", response_model=List[schemas.Task])
-def list_tasks(
+@router.patch("/tasks/batch", response_model=schemas.TaskBatchResult)
+async def update_tasks_batch(
+    batch: schemas.TaskBatchUpdate,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    all_tasks = task_repo.get_tasks(db)
-    visible_tasks = []
+    return await run_db(db, _update_tasks_batch, batch, current_user)
 
-    for task in all_tasks:
-        project = db.query(models.Project).filter(models.Project.id == task.project_id).first()
-        if not project:
-            continue
 
-        is_admin = current_user.role == "admin"
-        is_owner = current_user.username in (project.owners or [])
-        is_member = current_user.username in (project.members or [])
-        is_assignee = task.assignee == current_user.username
+# --- Transition: every task of a project matching the filters, one UPDATE ---
+def _transition_tasks(db: Session, project_id: UUID, t: schemas.TaskTransition, current_user):
+    require_admin_or_owner(project_id, db, current_user)
+    return {"updated": task_repo.transition_tasks(db, project_id, t.filters, t.to_status)}
 
-        if is_admin or is_owner or is_member or is_assignee:
-            visible_tasks.append(task)
 
-    return visible_tasks
+@router.post("/projects/{project_id}/tasks/transition", response_model=schemas.TaskTransitionResult)
+async def transition_tasks(
+    project_id: UUID,
+    t: schemas.TaskTransition,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    return await run_db(db, _transition_tasks, project_id, t, current_user)
 
 
-# --- Get Task by ID ---
-@router.get("/tasks/{task_id}", response_model=schemas.Task)
-def get_task_by_id(
-    task_id: UUID,
-    db: Session = Depends(get_db),
+# --- List Tasks: Admin, Owner, Member, or Assignee only ---
+# List endpoints return Core rows as dicts through RowsJSONResponse; the
+# response_model only documents the shape (see app.rows)
+def _list_tasks(db: Session, current_user, filters, sort, cursor, limit):
+    items, next_cursor = task_repo.get_visible_tasks(db, current_user, filters, sort, cursor, limit)
+    return {"items": as_dicts(items), "next_cursor": next_cursor}
+
+
+@router.get("/tasks", response_model=schemas.TaskPage, response_class=RowsJSONResponse)
+async def list_tasks(
+    filters: schemas.TaskFilters = Depends(),
+    sort: schemas.TaskSort = "created_at",
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    task = db.query(models.Task).filter(models.Task.id == task_id).first()
+    return RowsJSONResponse(await run_db(db, _list_tasks, current_user, filters, sort, cursor, limit))
+
+
+# --- Task visibility: admins, project owners and members, the assignee ---
+def _require_task_view(db: Session, project_id: UUID, task, current_user):
+    if current_user.role == "admin" or task.assignee == current_user.username:
+        return
+    if not has_project_role(db, project_id, current_user):
+        raise HTTPException(status_code=403, detail="Access denied")
+
+
+# --- Get Task by ID ---
+def _get_task_by_id(db: Session, task_id: UUID, current_user):
+    task = load_task(db, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    project = db.query(models.Project).filter(models.Project.id == task.project_id).first()
+    project = load_project(db, task.project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    is_admin = current_user.role == "admin"
-    is_owner = current_user.username in (project.owners or [])
-    is_member = current_user.username in (project.members or [])
-    is_assignee = task.assignee == current_user.username
-
-    if not (is_admin or is_owner or is_member or is_assignee):
-        raise HTTPException(status_code=403, detail="Access denied")
-
+    _require_task_view(db, project.id, task, current_user)
     return task
 
 
-# --- Get Tasks by Project ---
-@router.get("/projects/{project_id}/tasks", response_model=List[schemas.Task])
-def get_tasks_by_project(
-    project_id: UUID,
-    db: Session = Depends(get_db),
+@router.get("/tasks/{task_id}", response_model=schemas.Task)
+async def get_task_by_id(
+    task_id: UUID,
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
+    return await run_db(db, _get_task_by_id, task_id, current_user)
 
-    is_admin = current_user.role == "admin"
-    is_owner = current_user.username in (project.owners or [])
-    is_member = current_user.username in (project.members or [])
 
-    if not (is_admin or is_owner or is_member):
-        raise HTTPException(status_code=403, detail="Not authorized to view tasks")
+# --- Get Tasks by Project (304 when If-None-Match is current) ---
+def _get_tasks_by_project(db: Session, project_id: UUID, current_user, filters, sort, cursor, limit, if_none_match):
+    version = project_version_for_viewer(db, project_id, current_user, detail="Not authorized to view tasks")
+    etag = project_etag("tasks", project_id, version, filters.model_dump(), sort, cursor, limit)
+    if etag_matches(if_none_match, etag):
+        return etag, None
 
-    return task_repo.get_tasks_by_project(db, project_id)
+    items, next_cursor = task_repo.get_tasks_by_project(db, project_id, filters, sort, cursor, limit)
+    return etag, {"items": as_dicts(items), "next_cursor": next_cursor}
 
-# --- Get Specific Task in Project ---
 
-@router.get("/projects/{project_id}/tasks/{task_id}", response_model=schemas.Task)
-def get_task_by_project_and_task_id(
+@router.get("/projects/{project_id}/tasks", response_model=schemas.TaskPage, response_class=RowsJSONResponse)
+async def get_tasks_by_project(
     project_id: UUID,
-    task_id: UUID,
-    db: Session = Depends(get_db),
+    filters: schemas.TaskFilters = Depends(),
+    sort: schemas.TaskSort = "created_at",
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    if_none_match: str = Header(None),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
+    etag, page = await run_db(
+        db, _get_tasks_by_project, project_id, current_user, filters, sort, cursor, limit, if_none_match
+    )
+    if page is None:
+        return not_modified(etag)
+    return RowsJSONResponse(page, headers={"ETag": etag})
+
+# --- Get Specific Task in Project ---
+def _get_task_by_project_and_task_id(db: Session, project_id: UUID, task_id: UUID, current_user):
+    project = load_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    task = db.query(models.Task).filter(
-        models.Task.id == task_id,
-        models.Task.project_id == project_id,
-    ).first()
+    task = load_task(db, task_id, project_id)
 
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    is_admin = current_user.role == "admin"
-    is_owner = current_user.username in (project.owners or [])
-    is_member = current_user.username in (project.members or [])
-    is_assignee = task.assignee == current_user.username
-
-    if not (is_admin or is_owner or is_member or is_assignee):
-        raise HTTPException(status_code=403, detail="Access denied")
-
+    _require_task_view(db, project.id, task, current_user)
     return task
 
 
-# --- Update Task ---
-@router.put("/tasks/{task_id}", response_model=schemas.Task)
-def update_task(
+@router.get("/projects/{project_id}/tasks/{task_id}", response_model=schemas.Task)
+async def get_task_by_project_and_task_id(
+    project_id: UUID,
     task_id: UUID,
-    t: schemas.TaskUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user),
 ):
+    return await run_db(db, _get_task_by_project_and_task_id, project_id, task_id, current_user)
+
+
+# --- Update Task ---
+def _update_task(db: Session, task_id: UUID, t: schemas.TaskUpdate, current_user):
     require_task_update_access(task_id, db, current_user)
     task = task_repo.update_task(db, task_id, t)
     if not task:
@@ -145,25 +232,26 @@ def update_task(
     return task
 
 
-# --- Update Task in Project ---
-@router.put("/projects/{project_id}/tasks/{task_id}", response_model=schemas.Task)
-def update_task_in_project(
-    project_id: UUID,
+@router.put("/tasks/{task_id}", response_model=schemas.Task)
+async def update_task(
     task_id: UUID,
     t: schemas.TaskUpdate,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
+    return await run_db(db, _update_task, task_id, t, current_user)
+
+
+# --- Update Task in Project ---
+def _update_task_in_project(db: Session, project_id: UUID, task_id: UUID, t: schemas.TaskUpdate, current_user):
     require_task_update_access(task_id, db, current_user)
 
-    task = db.query(models.Task).filter(
-        models.Task.id == task_id, models.Task.project_id == project_id
-    ).first()
+    task = load_task(db, task_id, project_id)
 
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    for field, value in t.dict(exclude_unset=True).items():
+    for field, value in t.model_dump(exclude_unset=True).items():
         setattr(task, field, value)
 
     db.commit()
@@ -171,15 +259,30 @@ def update_task_in_project(
     return task
 
 
-# --- Delete Task ---
-@router.delete("/tasks/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_task(
+@router.put("/projects/{project_id}/tasks/{task_id}", response_model=schemas.Task)
+async def update_task_in_project(
+    project_id: UUID,
     task_id: UUID,
+    t: schemas.TaskUpdate,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
+    return await run_db(db, _update_task_in_project, project_id, task_id, t, current_user)
+
+
+# --- Delete Task ---
+def _delete_task(db: Session, task_id: UUID, current_user):
     require_admin_or_owner_by_task_id(task_id, db, current_user)
     deleted = task_repo.delete_task(db, task_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Task not found")
+
+
+@router.delete("/tasks/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_task(
+    task_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    await run_db(db, _delete_task, task_id, current_user)
     return
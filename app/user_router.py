@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_read_db, run_db
 from app.models import User
 
 router = APIRouter()
 
+def _get_users(db: Session):
+    return db.query(User).all()
+
 @router.get("/users")
-def get_users(db: Session = Depends(get_db)):
-    return db.query(User).all()
\ No newline at end of file
+async def get_users(db: Session = Depends(get_read_db)):
+    return await run_db(db, _get_users)
@@ -0,0 +1,95 @@
+"""Compare DB_MODE=sync and DB_MODE=async under the same read load.
+
+Seeds one project with tasks, then for each mode starts a fresh interpreter
+(the mode is read at import) that drives GET /projects/{id}/tasks and
+GET /tasks in-process with many concurrent clients. Needs DATABASE_URL
+pointing at a disposable database.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_db_modes \
+        --concurrency 256 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.common import drive, percentile
+
+
+def seed(tasks: int):
+    from app import database, models
+    from app.auth import create_access_token
+
+    models.Base.metadata.create_all(bind=database.engine)
+    with database.SessionLocal() as db:
+        user = db.query(models.User).filter(models.User.username == "bench-modes").first()
+        if user is None:
+            user = models.User(username="bench-modes", email="bench-modes@example.com", password="x")
+            db.add(user)
+        project = models.Project(name="bench-modes", owners=["bench-modes"])
+        db.add(project)
+        db.flush()
+        db.add_all(
+            models.Task(title=f"Task {i}", created_by="bench-modes", project_id=project.id) for i in range(tasks)
+        )
+        db.commit()
+        return str(project.id), create_access_token({"sub": str(user.id)})
+
+
+async def child(args):
+    from app.main import app
+
+    headers = {"Authorization": f"Bearer {args.token}"}
+    urls = [f"/projects/{args.project}/tasks", "/tasks"]
+    latencies, statuses = [], {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await client.get(urls[0], headers=headers)  # warm caches and the pool
+        deadline = time.perf_counter() + args.duration
+        await asyncio.gather(*(
+            drive(client, "GET", urls[i % len(urls)], deadline, latencies, statuses, headers=headers)
+            for i in range(args.concurrency)
+        ))
+    print(json.dumps({
+        "mode": os.environ.get("DB_MODE", "sync"),
+        "requests_per_s": round(len(latencies) / args.duration, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "statuses": statuses,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--modes", default="sync,async")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--project", help=argparse.SUPPRESS)
+    parser.add_argument("--token", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(child(args))
+        return
+
+    project, token = seed(args.tasks)
+    for mode in args.modes.split(","):
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_db_modes", "--child",
+             "--project", project, "--token", token,
+             "--concurrency", str(args.concurrency), "--duration", str(args.duration)],
+            env={**os.environ, "DB_MODE": mode},
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
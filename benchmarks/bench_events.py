@@ -0,0 +1,221 @@
+"""Thousands of idle event-stream subscribers on one worker.
+
+Starts uvicorn with one worker, opens --subscribers connections to GET
+/projects/{id}/events (raw sockets, so the client stays cheap) and waits for
+each one's "ready" event. It then reports:
+
+* the worker's memory per open stream (resident set size before and after,
+  from /proc);
+* the CPU the worker uses while all of them sit idle for --idle seconds;
+* the latency of an ordinary request while they are open;
+* fan-out: for --writes task updates, the time from sending the PUT until
+  each subscriber has received its event (p50/p99/max over all deliveries).
+
+Needs DATABASE_URL pointing at a disposable database, and Linux for /proc.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_events --subscribers 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from app import database, models
+from app.auth import create_access_token
+from benchmarks.common import free_port, percentile
+
+OWNER = "bench-events"
+CONNECT_CONCURRENCY = 200
+
+
+def seed():
+    models.Base.metadata.create_all(bind=database.engine)
+    with database.SessionLocal() as db:
+        user = db.query(models.User).filter_by(username=OWNER).first()
+        if user is None:
+            user = models.User(username=OWNER, email=f"{OWNER}@example.com", password="x")
+            db.add(user)
+        project = models.Project(name="bench-events", owners=[OWNER])
+        db.add(project)
+        db.flush()
+        task = models.Task(title="Watched task", created_by=OWNER, project_id=project.id)
+        db.add(task)
+        db.commit()
+        return create_access_token({"sub": str(user.id)}), project.id, task.id
+
+
+def _proc_status(pid):
+    with open(f"/proc/{pid}/status") as f:
+        return {line.split(":")[0]: line.split(":")[1].strip() for line in f}
+
+
+def rss_kib(pid) -> int:
+    return int(_proc_status(pid)["VmRSS"].split()[0])
+
+
+def cpu_seconds(pid) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+class Fanout:
+    """Arrival times of each write's event, and when every subscriber has it."""
+
+    def __init__(self, subscribers: int, writes: int):
+        self.subscribers = subscribers
+        self.arrivals = [[] for _ in range(writes)]
+        self.complete = [asyncio.Event() for _ in range(writes)]
+
+    def arrived(self, write: int, at: float):
+        if write < len(self.arrivals):
+            self.arrivals[write].append(at)
+            if len(self.arrivals[write]) == self.subscribers:
+                self.complete[write].set()
+
+
+class Subscriber:
+    def __init__(self, fanout: Fanout):
+        self.fanout = fanout
+        self.received = 0
+        self.ready = asyncio.Event()
+        self.writer = None
+
+    async def run(self, port, path, token, semaphore):
+        async with semaphore:
+            reader, self.writer = await asyncio.open_connection("127.0.0.1", port)
+            self.writer.write(
+                f"GET {path} HTTP/1.1\r\nHost: bench\r\nAuthorization: Bearer {token}\r\n\r\n".encode()
+            )
+            await self.writer.drain()
+            head = await reader.readuntil(b"\r\n\r\n")
+            if not head.startswith(b"HTTP/1.1 200"):
+                raise RuntimeError(head.split(b"\r\n", 1)[0].decode())
+        while True:
+            # Chunked transfer framing is left in: frames are found by their fields
+            chunk = await reader.read(65536)
+            if not chunk:
+                return
+            if b"event: ready" in chunk:
+                self.ready.set()
+            now = time.perf_counter()
+            for _ in range(chunk.count(b"event: task.updated")):
+                self.fanout.arrived(self.received, now)
+                self.received += 1
+
+
+async def wait_until_serving(port, timeout=60.0):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() < deadline:
+            try:
+                await client.get(f"http://127.0.0.1:{port}/ready-probe")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.05)
+    raise RuntimeError("uvicorn did not start")
+
+
+async def run(args, pid, port, token, project_id, task_id):
+    base = f"http://127.0.0.1:{port}"
+    headers = {"Authorization": f"Bearer {token}"}
+    rss_before = rss_kib(pid)
+
+    semaphore = asyncio.Semaphore(CONNECT_CONCURRENCY)
+    fanout = Fanout(args.subscribers, args.writes)
+    subscribers = [Subscriber(fanout) for _ in range(args.subscribers)]
+    started = time.perf_counter()
+    running = [
+        asyncio.create_task(s.run(port, f"/projects/{project_id}/events", token, semaphore)) for s in subscribers
+    ]
+    await asyncio.gather(*(s.ready.wait() for s in subscribers))
+    connect_s = time.perf_counter() - started
+    rss_after = rss_kib(pid)
+
+    cpu_before = cpu_seconds(pid)
+    await asyncio.sleep(args.idle)
+    idle_cpu = (cpu_seconds(pid) - cpu_before) / args.idle
+
+    async with httpx.AsyncClient(base_url=base, headers=headers) as client:
+        request_latencies = []
+        for _ in range(50):
+            t0 = time.perf_counter()
+            await client.get(f"/tasks/{task_id}")
+            request_latencies.append(time.perf_counter() - t0)
+
+        delivery, cpu_before = [], cpu_seconds(pid)
+        for i in range(args.writes):
+            sent = time.perf_counter()
+            response = await client.put(f"/tasks/{task_id}", json={"title": f"Watched task {i}"})
+            response.raise_for_status()
+            try:
+                await asyncio.wait_for(fanout.complete[i].wait(), 10)
+            except asyncio.TimeoutError:
+                pass
+            delivery.extend(at - sent for at in fanout.arrivals[i])
+            await asyncio.sleep(args.write_interval)
+        write_cpu = cpu_seconds(pid) - cpu_before
+
+    for s in subscribers:
+        s.writer.close()
+    for task in running:
+        task.cancel()
+    await asyncio.gather(*running, return_exceptions=True)
+
+    def ms(value):
+        return round(value * 1000, 2)
+
+    return {
+        "subscribers": args.subscribers,
+        "connect_all_s": round(connect_s, 2),
+        "rss_kib_before": rss_before,
+        "rss_kib_per_subscriber": round((rss_after - rss_before) / args.subscribers, 1),
+        "idle_cpu_percent": round(idle_cpu * 100, 2),
+        "request_p50_ms": ms(statistics.median(request_latencies)),
+        "fanout_deliveries": len(delivery),
+        "fanout_missed": args.writes * args.subscribers - len(delivery),
+        "fanout_p50_ms": ms(percentile(delivery, 50)),
+        "fanout_p99_ms": ms(percentile(delivery, 99)),
+        "fanout_max_ms": ms(max(delivery, default=0.0)),
+        # Worker CPU for the writes and every delivery, per delivery
+        "server_cpu_us_per_delivery": round(write_cpu / max(1, len(delivery)) * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--idle", type=float, default=10.0, help="seconds to sit idle before writing")
+    parser.add_argument("--writes", type=int, default=20)
+    parser.add_argument("--write-interval", type=float, default=0.1)
+    args = parser.parse_args()
+
+    # Each subscriber is one socket here and one in the worker
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, args.subscribers * 2 + 256)), hard))
+
+    token, project_id, task_id = seed()
+    port = free_port()
+    env = dict(os.environ, SSE_MAX_SUBSCRIBERS=str(args.subscribers + 100))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning",
+         "--backlog", str(max(2048, CONNECT_CONCURRENCY * 2))],
+        env=env,
+    )
+    try:
+        asyncio.run(wait_until_serving(port))
+        print(json.dumps(asyncio.run(run(args, server.pid, port, token, project_id, task_id)), indent=2))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Rows per second of the COPY importer, with the per-row ORM path for scale.
+
+Generates NDJSON files with --projects projects, --tasks tasks spread over
+them and --comments comments per task, imports them with app.importer and
+reports rows/s. --orm-sample creates that many tasks one at a time through
+task_repo.create_task (commit + refresh per row) for comparison. Needs
+DATABASE_URL pointing at a disposable database.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_import \\
+        --projects 100 --tasks 200000 --comments 2 --orm-sample 2000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from app import database, models, schemas
+from app.importer import import_files
+from app.repository import task as task_repo
+
+USERS = [f"bench-import-{i}" for i in range(20)]
+
+
+def seed_users():
+    models.Base.metadata.create_all(bind=database.engine)
+    with database.SessionLocal() as db:
+        existing = {u for (u,) in db.query(models.User.username).filter(models.User.username.in_(USERS))}
+        db.add_all(
+            models.User(username=u, email=f"{u}@example.com", password="x") for u in USERS if u not in existing
+        )
+        db.commit()
+
+
+def write_files(directory, projects, tasks, comments):
+    paths = {kind: os.path.join(directory, f"{kind}.ndjson") for kind in ("projects", "tasks", "comments")}
+    with open(paths["projects"], "w") as f:
+        for p in range(projects):
+            f.write(json.dumps({"ref": f"p{p}", "name": f"Project {p}", "owners": [USERS[p % len(USERS)]],
+                                "members": USERS[:3]}) + "\n")
+    with open(paths["tasks"], "w") as t, open(paths["comments"], "w") as c:
+        for i in range(tasks):
+            t.write(json.dumps({"ref": f"t{i}", "project": f"p{i % projects}", "title": f"Task {i}",
+                                "description": "Imported task " * 4, "created_by": USERS[i % len(USERS)],
+                                "assignee": USERS[(i + 1) % len(USERS)], "due_date": "2027-01-15"}) + "\n")
+            for j in range(comments):
+                c.write(json.dumps({"task": f"t{i}", "content": f"Comment {j}", "author": USERS[j % len(USERS)]})
+                        + "\n")
+    return paths
+
+
+def orm_rate(sample):
+    with database.SessionLocal() as db:
+        project = models.Project(name="bench-import-orm", owners=[USERS[0]])
+        db.add(project)
+        db.commit()
+        started = time.perf_counter()
+        for i in range(sample):
+            task_repo.create_task(db, schemas.TaskCreate(title=f"ORM {i}", project_id=project.id), USERS[0])
+        return sample / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--comments", type=int, default=2, help="comments per task")
+    parser.add_argument("--batch-rows", type=int, default=100_000)
+    parser.add_argument("--orm-sample", type=int, default=0, help="tasks to create through the ORM path")
+    args = parser.parse_args()
+
+    seed_users()
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_files(directory, args.projects, args.tasks, args.comments)
+        counts = import_files(paths["projects"], paths["tasks"], paths["comments"], args.batch_rows)
+
+    rows = counts["projects"] + counts["tasks"] + counts["comments"]
+    print(f"imported rows        {rows:12,d}")
+    print(f"seconds              {counts['seconds']:12.2f}")
+    print(f"COPY import rows/s   {rows / counts['seconds']:12,.0f}")
+    if args.orm_sample:
+        print(f"ORM create rows/s    {orm_rate(args.orm_sample):12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
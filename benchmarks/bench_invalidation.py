@@ -0,0 +1,185 @@
+"""Caches and event streams across several uvicorn workers.
+
+Starts uvicorn with --workers processes, twice: with the invalidation bus
+(LISTEN/NOTIFY) and without it (INVALIDATION_BUS=false). Every request opens
+a new connection, so requests spread over the workers. For each run it reports:
+
+* conditional GETs of a project's task list that are answered 304: latency
+  and SQL statements per request (X-DB-Statements);
+* staleness: after each --writes task update, how long any worker still
+  answers 304 to the ETag from before the write;
+* with the bus, event streams: --subscribers streams spread over the workers,
+  and how many of them received each write's event.
+
+Needs DATABASE_URL pointing at a disposable database.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_invalidation --workers 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from app import database, models
+from app.auth import create_access_token
+from benchmarks.bench_events import Fanout, Subscriber, wait_until_serving
+from benchmarks.common import free_port, percentile
+
+OWNER = "bench-invalidation"
+
+
+def seed():
+    models.Base.metadata.create_all(bind=database.engine)
+    with database.SessionLocal() as db:
+        user = db.query(models.User).filter_by(username=OWNER).first()
+        if user is None:
+            user = models.User(username=OWNER, email=f"{OWNER}@example.com", password="x")
+            db.add(user)
+        project = models.Project(name="bench-invalidation", owners=[OWNER])
+        db.add(project)
+        db.flush()
+        task = models.Task(title="Shared task", created_by=OWNER, project_id=project.id)
+        db.add(task)
+        db.commit()
+        return create_access_token({"sub": str(user.id)}), project.id, task.id
+
+
+def fresh_client(base, headers):
+    # No keep-alive: each request is accepted by whichever worker is free
+    return httpx.AsyncClient(base_url=base, headers=headers, limits=httpx.Limits(max_keepalive_connections=0))
+
+
+async def conditional_gets(client, path, etag, requests):
+    latencies, statements, statuses = [], [], {}
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = await client.get(path, headers={"If-None-Match": etag})
+        latencies.append(time.perf_counter() - started)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        statements.append(int(response.headers.get("X-DB-Statements", 0)))
+    return latencies, statements, statuses
+
+
+async def stale_window(client, path, etag, task_id, title, watch_seconds):
+    """Seconds after the update returned during which a worker still
+    answered 304 to ``etag``."""
+    (await client.put(f"/tasks/{task_id}", json={"title": title})).raise_for_status()
+    written, last_stale = time.perf_counter(), None
+
+    async def probe():
+        nonlocal last_stale
+        while time.perf_counter() - written < watch_seconds:
+            response = await client.get(path, headers={"If-None-Match": etag})
+            if response.status_code == 304:
+                last_stale = time.perf_counter() - written
+
+    await asyncio.gather(*(probe() for _ in range(8)))
+    return last_stale or 0.0
+
+
+async def run(args, port, token, project_id, task_id, with_streams):
+    base = f"http://127.0.0.1:{port}"
+    headers = {"Authorization": f"Bearer {token}"}
+    path = f"/projects/{project_id}/tasks"
+
+    def ms(value):
+        return round(value * 1000, 2)
+
+    async with fresh_client(base, headers) as client:
+        etag = (await client.get(path)).headers["ETag"]
+        # Warm every worker's caches
+        await conditional_gets(client, path, etag, args.workers * 20)
+        latencies, statements, statuses = await conditional_gets(client, path, etag, args.requests)
+
+        windows = []
+        for i in range(args.writes):
+            etag = (await client.get(path)).headers["ETag"]
+            await conditional_gets(client, path, etag, args.workers * 10)
+            windows.append(await stale_window(client, path, etag, task_id, f"Shared task {i}", args.watch))
+
+    report = {
+        "conditional_get_p50_ms": ms(statistics.median(latencies)),
+        "conditional_get_statuses": statuses,
+        "conditional_get_db_statements_avg": round(statistics.mean(statements), 3),
+        "stale_304_after_write_p50_ms": ms(percentile(windows, 50)),
+        "stale_304_after_write_max_ms": ms(max(windows, default=0.0)),
+    }
+    if with_streams:
+        report.update(await streams(args, port, base, headers, token, project_id, task_id))
+    return report
+
+
+async def streams(args, port, base, headers, token, project_id, task_id):
+    fanout = Fanout(args.subscribers, args.writes)
+    subscribers = [Subscriber(fanout) for _ in range(args.subscribers)]
+    semaphore = asyncio.Semaphore(50)
+    running = [
+        asyncio.create_task(s.run(port, f"/projects/{project_id}/events", token, semaphore)) for s in subscribers
+    ]
+    await asyncio.gather(*(s.ready.wait() for s in subscribers))
+    delivery = []
+    async with fresh_client(base, headers) as client:
+        for i in range(args.writes):
+            sent = time.perf_counter()
+            (await client.put(f"/tasks/{task_id}", json={"title": f"Streamed {i}"})).raise_for_status()
+            try:
+                await asyncio.wait_for(fanout.complete[i].wait(), 5)
+            except asyncio.TimeoutError:
+                pass
+            delivery.extend(at - sent for at in fanout.arrivals[i])
+    for s in subscribers:
+        s.writer.close()
+    for task in running:
+        task.cancel()
+    await asyncio.gather(*running, return_exceptions=True)
+    return {
+        "stream_deliveries": len(delivery),
+        "stream_missed": args.writes * args.subscribers - len(delivery),
+        "stream_delivery_p50_ms": round(percentile(delivery, 50) * 1000, 2),
+        "stream_delivery_max_ms": round(max(delivery, default=0.0) * 1000, 2),
+    }
+
+
+def serve(args, bus: bool):
+    port = free_port()
+    env = dict(os.environ, INVALIDATION_BUS="true" if bus else "false")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning",
+         "--workers", str(args.workers)],
+        env=env,
+    )
+    return server, port
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=1000, help="conditional GETs answered from warm caches")
+    parser.add_argument("--writes", type=int, default=10)
+    parser.add_argument("--watch", type=float, default=0.5, help="seconds to look for stale 304s after a write")
+    parser.add_argument("--subscribers", type=int, default=200)
+    args = parser.parse_args()
+
+    token, project_id, task_id = seed()
+    results = {}
+    for bus in (True, False):
+        server, port = serve(args, bus)
+        try:
+            asyncio.run(wait_until_serving(port))
+            # Give every worker's listener time to connect
+            time.sleep(1)
+            results["bus" if bus else "no_bus"] = asyncio.run(run(args, port, token, project_id, task_id, bus))
+        finally:
+            server.terminate()
+            server.wait()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Per-row cost of building a task-list response, ORM path vs row path.
+
+"orm" is what the list endpoints used to do: load Task objects, validate them
+through the response_model (schemas.TaskPage) and encode with the stdlib json
+encoder via JSONResponse. "rows" is the current path: a Core select of the
+schema's columns, plain dicts and RowsJSONResponse (orjson). Fetch and
+serialization are timed separately. Needs DATABASE_URL pointing at a
+disposable database.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_list_serialization \
+        --rows 200 --repeat 200
+"""
+import argparse
+import time
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from app import database, models, schemas
+from app.repository.task import TASK_LIST_COLUMNS
+from app.rows import RowsJSONResponse, as_dicts
+
+
+def seed(rows: int):
+    models.Base.metadata.create_all(bind=database.engine)
+    with database.SessionLocal() as db:
+        project = models.Project(name="bench-serialization", owners=["bench"])
+        db.add(project)
+        db.flush()
+        db.add_all(
+            models.Task(title=f"Task {i}", description="x" * 80, created_by="bench", project_id=project.id)
+            for i in range(rows)
+        )
+        db.commit()
+        return project.id
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200, help="tasks per response")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    project_id = seed(args.rows)
+    page = TypeAdapter(schemas.TaskPage)
+
+    with database.SessionLocal() as db:
+        def orm_fetch():
+            db.expunge_all()
+            return db.query(models.Task).filter(models.Task.project_id == project_id).all()
+
+        def rows_fetch():
+            return as_dicts(db.execute(select(*TASK_LIST_COLUMNS).where(models.Task.project_id == project_id)))
+
+        orm_fetch_s, tasks = timed(orm_fetch, args.repeat)
+        rows_fetch_s, dicts = timed(rows_fetch, args.repeat)
+
+    def orm_serialize():
+        value = page.validate_python({"items": tasks, "next_cursor": None}, from_attributes=True)
+        return JSONResponse(page.dump_python(value, mode="json")).body
+
+    def rows_serialize():
+        return RowsJSONResponse({"items": dicts, "next_cursor": None}).body
+
+    orm_ser_s, _ = timed(orm_serialize, args.repeat)
+    rows_ser_s, _ = timed(rows_serialize, args.repeat)
+
+    n = args.rows
+    print(f"{'per row (us)':<14} {'fetch':>10} {'serialize':>10} {'total':>10}")
+    for label, fetch, ser in (("orm", orm_fetch_s, orm_ser_s), ("rows", rows_fetch_s, rows_ser_s)):
+        print(f"{label:<14} {fetch / n * 1e6:10.2f} {ser / n * 1e6:10.2f} {(fetch + ser) / n * 1e6:10.2f}")
+    print(f"serialize speedup {orm_ser_s / rows_ser_s:5.1f}x, total {(orm_fetch_s + orm_ser_s) / (rows_fetch_s + rows_ser_s):5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""Per-endpoint latency, throughput and query counts on a seeded dataset.
+
+Seeds the dataset described in benchmarks.seed (skip with --skip-seed when
+the database already holds it, with the same dataset arguments), then drives
+every endpoint in turn for --duration seconds with --concurrency clients.
+Client k is user-k, so it owns a project and sees that project's tasks;
+write endpoints create their own rows and the DELETE endpoints remove those.
+
+Statements and DB time per request come from the X-DB-Statements and
+X-DB-Time-Ms response headers. The app runs in-process by default; with
+--base-url the requests go to a running server started against the same
+database and SECRET_KEY.
+
+The report is JSON (--output, default stdout); --baseline takes an earlier
+report and prints the p95 change per endpoint, for comparing commits.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_load \\
+        --users 10000 --projects 50000 --tasks 1000000 --comments 5000000 \\
+        --concurrency 32 --duration 10 --output after.json --baseline before.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable
+
+import httpx
+
+from app import database
+from app.auth import create_access_token
+from benchmarks.common import percentile
+from benchmarks.seed import ADMIN, PASSWORD, Dataset, add_dataset_arguments, dataset_from, seed, seeded_id
+
+
+@dataclass
+class Endpoint:
+    method: str
+    path: str
+    # request(client state) -> (url, httpx keyword arguments), or None when
+    # the client has nothing left to send (e.g. no more rows to delete)
+    request: Callable
+
+
+class Client:
+    """One simulated user: user-k, one of their projects and its tasks."""
+
+    def __init__(self, k: int, dataset: Dataset):
+        self.k = k
+        self.dataset = dataset
+        self.username = dataset.user(k)
+        self.user_id = seeded_id("user", k % dataset.users)
+        self.headers = _auth(self.user_id)
+        self.project_number = dataset.owned_project(k)
+        self.project = str(seeded_id("project", self.project_number))
+        self.tasks = [str(seeded_id("task", i)) for i in dataset.project_tasks(self.project_number)]
+        self.rng = random.Random(k)
+        self.serial = itertools.count()
+        # Filled by the create endpoints, drained by update/delete ones
+        self.created_tasks = []
+        self.created_projects = []
+
+    def task(self):
+        return self.rng.choice(self.tasks)
+
+    def new_task(self):
+        return self.created_tasks.pop() if self.created_tasks else None
+
+
+def _auth(user_id) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+def _remember(collection):
+    def hook(client, response):
+        if response.status_code in (200, 201):
+            collection(client).append(response.json()["id"])
+    return hook
+
+
+def _new_account(client) -> dict:
+    username = f"load-{os.getpid()}-{client.k}-{next(client.serial)}"
+    return {"username": username, "email": f"{username}@example.com", "password": PASSWORD}
+
+
+def _get(path):
+    return lambda c: (path.format(c=c), {"headers": c.headers})
+
+
+ENDPOINTS = [
+    Endpoint("POST", "/register", lambda c: ("/register", {"json": _new_account(c)})),
+    Endpoint("POST", "/login", lambda c: ("/login", {"json": {"username": c.username, "password": PASSWORD}})),
+    Endpoint("GET", "/projects", _get("/projects")),
+    Endpoint("GET", "/projects/{project_id}", _get("/projects/{c.project}")),
+    Endpoint("GET", "/projects/{project_id}/members", _get("/projects/{c.project}/members")),
+    Endpoint("GET", "/projects/{project_id}/tasks", _get("/projects/{c.project}/tasks")),
+    Endpoint("GET", "/projects/{project_id}/tasks/{task_id}",
+             lambda c: (f"/projects/{c.project}/tasks/{c.task()}", {"headers": c.headers})),
+    Endpoint("GET", "/tasks", _get("/tasks")),
+    Endpoint("GET", "/tasks/{task_id}", lambda c: (f"/tasks/{c.task()}", {"headers": c.headers})),
+    Endpoint("GET", "/projects/{project_id}/tasks/{task_id}/comments",
+             lambda c: (f"/projects/{c.project}/tasks/{c.task()}/comments", {"headers": c.headers})),
+    Endpoint("GET", "/projects/{project_id}/tasks-with-comment-count",
+             _get("/projects/{c.project}/tasks-with-comment-count")),
+    Endpoint("GET", "/search", lambda c: ("/search", {"headers": c.headers, "params": {
+        "q": c.rng.choice(["invoice", "deploy login", "backup", "billing -fix"])}})),
+    Endpoint("GET", "/projects/{project_id}/export",
+             lambda c: (f"/projects/{c.project}/export", {"headers": c.headers, "params": {"kind": "tasks"}})),
+    Endpoint("GET", "/users", _get("/users")),
+    Endpoint("GET", "/api/users", _get("/api/users")),
+    Endpoint("GET", "/internal/pool", lambda c: ("/internal/pool", {"headers": _auth(seeded_id("user", ADMIN))})),
+    Endpoint("POST", "/projects", lambda c: ("/projects", {"headers": c.headers, "json": {
+        "name": f"Load project {c.k}-{next(c.serial)}", "description": "created by bench_load"}})),
+    Endpoint("PUT", "/projects/{project_id}", lambda c: (f"/projects/{c.project}", {
+        "headers": c.headers, "json": {"description": f"updated {next(c.serial)}"}})),
+    Endpoint("PUT", "/projects/{project_id}/members", lambda c: (f"/projects/{c.project}/members", {
+        "headers": c.headers, "json": {"members": c.dataset.project_members(c.project_number)}})),
+    Endpoint("PUT", "/projects/{project_id}/owners", lambda c: (f"/projects/{c.project}/owners", {
+        "headers": c.headers, "json": {"owners": [c.username]}})),
+    Endpoint("POST", "/tasks", lambda c: ("/tasks", {"headers": c.headers, "json": {
+        "title": f"Load task {next(c.serial)}", "project_id": c.project, "assignee": c.username}})),
+    Endpoint("PUT", "/tasks/{task_id}", lambda c: (f"/tasks/{c.task()}", {
+        "headers": c.headers, "json": {"description": f"updated {next(c.serial)}"}})),
+    Endpoint("PUT", "/projects/{project_id}/tasks/{task_id}", lambda c: (
+        f"/projects/{c.project}/tasks/{c.task()}", {"headers": c.headers, "json": {"priority": "high"}})),
+    Endpoint("POST", "/tasks/batch", lambda c: ("/tasks/batch", {"headers": c.headers, "json": {"items": [
+        {"title": f"Batch task {next(c.serial)}", "project_id": c.project} for _ in range(10)]}})),
+    Endpoint("PATCH", "/tasks/batch", lambda c: ("/tasks/batch", {"headers": c.headers, "json": {"items": [
+        {"id": c.task(), "status": "in_progress"} for _ in range(10)]}})),
+    Endpoint("POST", "/projects/{project_id}/tasks/transition", lambda c: (
+        f"/projects/{c.project}/tasks/transition",
+        {"headers": c.headers, "json": {"filters": {"status": "in_progress"}, "to_status": "in_progress"}})),
+    Endpoint("POST", "/projects/{project_id}/tasks/{task_id}/comments", lambda c: (
+        f"/projects/{c.project}/tasks/{c.task()}/comments",
+        {"headers": c.headers, "json": {"content": f"Load comment {next(c.serial)}", "author": c.username}})),
+    Endpoint("DELETE", "/tasks/{task_id}", lambda c: (
+        (f"/tasks/{task}", {"headers": c.headers}) if (task := c.new_task()) else None)),
+    Endpoint("DELETE", "/projects/{project_id}", lambda c: (
+        (f"/projects/{c.created_projects.pop()}", {"headers": c.headers}) if c.created_projects else None)),
+    # Last: each request revokes the fresh token it brings
+    Endpoint("POST", "/logout", lambda c: ("/logout", {"headers": _auth(c.user_id)})),
+]
+
+# Responses whose ids later endpoints (DELETE) consume
+AFTER_RESPONSE = {
+    ("POST", "/tasks"): _remember(lambda c: c.created_tasks),
+    ("POST", "/projects"): _remember(lambda c: c.created_projects),
+}
+
+
+async def run_endpoint(http, endpoint: Endpoint, clients, duration: float):
+    latencies, statuses, db = [], {}, {"statements": 0, "ms": 0.0, "reported": 0}
+    after = AFTER_RESPONSE.get((endpoint.method, endpoint.path))
+
+    async def worker(client):
+        while time.perf_counter() < deadline:
+            request = endpoint.request(client)
+            if request is None:
+                return
+            url, kwargs = request
+            started = time.perf_counter()
+            response = await http.request(endpoint.method, url, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if "x-db-statements" in response.headers:
+                db["statements"] += int(response.headers["x-db-statements"])
+                db["ms"] += float(response.headers["x-db-time-ms"])
+                db["reported"] += 1
+            if after:
+                after(client, response)
+
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(worker(client) for client in clients))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "method": endpoint.method,
+        "path": endpoint.path,
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "statuses": {str(code): n for code, n in sorted(statuses.items())},
+        # From the X-DB-Statements / X-DB-Time-Ms headers (see app.query_stats)
+        "statements_per_request": round(db["statements"] / db["reported"], 2) if db["reported"] else None,
+        "db_ms_per_request": round(db["ms"] / db["reported"], 2) if db["reported"] else None,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args, dataset: Dataset):
+    clients = [Client(k, dataset) for k in range(args.concurrency)]
+    selected = [e for e in ENDPOINTS if not args.only or any(s in f"{e.method} {e.path}" for s in args.only)]
+
+    if args.base_url:
+        transport, base_url = None, args.base_url
+    else:
+        from app.main import app
+        # Server errors become 500s in the report rather than ending the run
+        transport, base_url = httpx.ASGITransport(app=app, raise_app_exceptions=False), "http://bench"
+
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=None) as http:
+        await http.get("/projects", headers=clients[0].headers)  # warm caches and the pool
+        for endpoint in selected:
+            result = await run_endpoint(http, endpoint, clients, args.duration)
+            results.append(result)
+            _log(f"{endpoint.method:6} {endpoint.path:50} {result['throughput_rps']:9.1f}/s"
+                 f"  p95 {result['p95_ms']:8.2f} ms  {result['statuses']}")
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "db_mode": database.DB_MODE,
+            "target": args.base_url or "in-process",
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "dataset": dataset.__dict__,
+        },
+        "endpoints": results,
+    }
+
+
+def _log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def compare(report: dict, baseline: dict):
+    before = {(e["method"], e["path"]): e for e in baseline["endpoints"]}
+    _log(f"\n{'endpoint':57} {'p95 before':>11} {'p95 after':>11} {'change':>8}")
+    for e in report["endpoints"]:
+        old = before.get((e["method"], e["path"]))
+        if old is None or not old["p95_ms"]:
+            continue
+        change = (e["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+        _log(f"{e['method'] + ' ' + e['path']:57} {old['p95_ms']:11.2f} {e['p95_ms']:11.2f} {change:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_dataset_arguments(parser)
+    parser.add_argument("--skip-seed", action="store_true", help="reuse a database seeded with the same arguments")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per endpoint")
+    parser.add_argument("--only", action="append", help="only endpoints whose 'METHOD /path' contains this")
+    parser.add_argument("--base-url", help="drive a running server instead of the app in-process")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="earlier JSON report to compare p95 latencies against")
+    args = parser.parse_args()
+
+    dataset = dataset_from(args)
+    if not args.skip_seed:
+        seed(dataset)
+    report = asyncio.run(run(args, dataset))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
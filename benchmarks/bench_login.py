@@ -0,0 +1,82 @@
+"""Login throughput while other authenticated traffic is running.
+
+Drives POST /login and GET /projects concurrently against the app in-process
+and reports login throughput, 503 rejections and the latency of the
+background requests. Needs DATABASE_URL pointing at a disposable database.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_login \
+        --duration 10 --logins 32 --background 16
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app import database, models
+from app.auth import create_access_token, hash_password
+from app.main import app
+from benchmarks.common import percentile
+
+PASSWORD = "benchmark-password"
+
+
+def seed(users: int):
+    models.Base.metadata.create_all(bind=database.engine)
+    hashed = hash_password(PASSWORD)
+    with database.SessionLocal() as db:
+        db.query(models.User).filter(models.User.username.like("bench-login-%")).delete(synchronize_session=False)
+        rows = [
+            models.User(username=f"bench-login-{i}", email=f"bench-login-{i}@example.com", password=hashed)
+            for i in range(users)
+        ]
+        db.add_all(rows)
+        db.commit()
+        return [(row.username, create_access_token({"sub": str(row.id)})) for row in rows]
+
+
+async def login_worker(client, username, deadline, results):
+    while time.perf_counter() < deadline:
+        response = await client.post("/login", json={"username": username, "password": PASSWORD})
+        results[response.status_code] = results.get(response.status_code, 0) + 1
+
+
+async def background_worker(client, token, deadline, latencies):
+    headers = {"Authorization": f"Bearer {token}"}
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await client.get("/projects", headers=headers)
+        latencies.append(time.perf_counter() - started)
+
+
+async def run(args):
+    accounts = seed(max(args.logins, args.background))
+    deadline = time.perf_counter() + args.duration
+    login_results, latencies = {}, []
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await asyncio.gather(
+            *(login_worker(client, accounts[i][0], deadline, login_results) for i in range(args.logins)),
+            *(background_worker(client, accounts[i][1], deadline, latencies) for i in range(args.background)),
+        )
+
+    print(f"logins ok/s          {login_results.get(200, 0) / args.duration:10.1f}")
+    print(f"logins rejected 503  {login_results.get(503, 0):10d}")
+    print(f"background req/s     {len(latencies) / args.duration:10.1f}")
+    print(f"background p50 ms    {percentile(latencies, 50) * 1000:10.2f}")
+    print(f"background p95 ms    {percentile(latencies, 95) * 1000:10.2f}")
+    print(f"background mean ms   {statistics.fmean(latencies) * 1000 if latencies else 0.0:10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--logins", type=int, default=32, help="concurrent login clients")
+    parser.add_argument("--background", type=int, default=16, help="concurrent GET /projects clients")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
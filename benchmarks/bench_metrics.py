@@ -0,0 +1,77 @@
+"""Per-request cost of MetricsMiddleware, and the cost of a /metrics scrape.
+
+Calls a trivial ASGI app directly and through MetricsMiddleware (no server,
+no HTTP client) and reports the difference per request, then renders the
+registry as a scrape would. Needs DATABASE_URL (the pools are reported).
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_metrics --requests 200000
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from starlette.routing import Route
+
+from app import metrics
+
+
+async def endpoint(request):
+    pass
+
+
+ROUTES = [Route(f"/resource{i}/{{item_id}}", endpoint if i == 0 else (lambda r: None)) for i in range(30)]
+APP = SimpleNamespace(router=SimpleNamespace(routes=ROUTES))
+START = {"type": "http.response.start", "status": 200, "headers": []}
+BODY = {"type": "http.response.body", "body": b"{}"}
+
+
+async def bare_app(scope, receive, send):
+    # What the router leaves behind for the middleware
+    scope["endpoint"] = endpoint
+    await send(START)
+    await send(BODY)
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def per_request(app, requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app({"type": "http", "method": "GET", "path": "/resource0/42", "app": APP}, receive, send)
+    return (time.perf_counter() - started) / requests
+
+
+async def run(args):
+    wrapped = metrics.MetricsMiddleware(bare_app, registry=metrics.Registry())
+    await per_request(wrapped, 1000)  # warm the route lookup
+    bare = await per_request(bare_app, args.requests)
+    with_metrics = await per_request(wrapped, args.requests)
+    print(f"bare app          {bare * 1e6:8.2f} µs/request")
+    print(f"with metrics      {with_metrics * 1e6:8.2f} µs/request")
+    print(f"overhead          {(with_metrics - bare) * 1e6:8.2f} µs/request")
+
+    registry = metrics.Registry()
+    for i in range(args.routes):
+        for method in ("GET", "POST"):
+            registry.series(method, f"/resource{i}/{{item_id}}").observe(200, 0.01, 0.002, 3)
+    started = time.perf_counter()
+    body = metrics.render(registry)
+    print(f"scrape, {args.routes * 2} series {(time.perf_counter() - started) * 1000:8.2f} ms, {len(body)} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--routes", type=int, default=30)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
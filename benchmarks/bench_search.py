@@ -0,0 +1,109 @@
+"""GET /search latency on a large corpus, with an ILIKE scan for scale.
+
+Seeds --tasks tasks (and --comments comments per task) of random words from a
+small vocabulary in one project with INSERT ... SELECT generate_series, then
+runs --queries searches through the search repository as the project's owner
+and reports p50/p95 per query, next to the same terms matched with ILIKE.
+Needs DATABASE_URL pointing at a disposable database.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_search \\
+        --tasks 200000 --comments 1 --queries 200
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy import text
+
+from app import database, models, schemas
+from app.repository import search as search_repo
+from benchmarks.common import percentile
+
+OWNER = "bench-search"
+WORDS = ["invoice", "deploy", "database", "migration", "customer", "report", "release", "backup",
+         "payment", "login", "export", "dashboard", "latency", "cache", "billing", "upgrade"]
+
+# Each row gets a few vocabulary words plus filler, so terms are neither rare nor everywhere
+SEED_TASKS = text("""
+    INSERT INTO tasks (id, title, description, status, priority, created_by, project_id, created_at, comment_count)
+    SELECT gen_random_uuid(),
+           (:words)[1 + (i * 7) % 16] || ' ' || (:words)[1 + (i * 13) % 16] || ' task ' || i,
+           repeat('routine filler text ', 5) || (:words)[1 + (i * 5) % 16],
+           'pending', 'medium', :owner, :project_id, now(), :comments
+    FROM generate_series(1, :n) AS i
+""")
+SEED_COMMENTS = text("""
+    INSERT INTO comments (id, task_id, content, author, created_at)
+    SELECT gen_random_uuid(), t.id, 'note about ' || (:words)[1 + (j * 11 + length(t.title)) % 16], :owner, now()
+    FROM tasks t CROSS JOIN generate_series(1, :per_task) AS j
+    WHERE t.project_id = :project_id
+""")
+
+
+def seed(tasks, comments):
+    models.Base.metadata.create_all(bind=database.engine)
+    with database.SessionLocal() as db:
+        user = db.query(models.User).filter_by(username=OWNER).first()
+        if user is None:
+            user = models.User(username=OWNER, email=f"{OWNER}@example.com", password="x")
+            db.add(user)
+        project = models.Project(name="bench-search", owners=[OWNER])
+        db.add(project)
+        db.commit()
+        params = {"words": WORDS, "owner": OWNER, "project_id": project.id}
+        db.execute(SEED_TASKS, {**params, "n": tasks, "comments": comments})
+        if comments:
+            db.execute(SEED_COMMENTS, {**params, "per_task": comments})
+        db.commit()
+        db.execute(text("ANALYZE tasks"))
+        db.execute(text("ANALYZE comments"))
+        db.commit()
+        db.refresh(user)
+        db.expunge(user)
+        return user, project.id
+
+
+def timed(fn, queries):
+    latencies = []
+    for q in queries:
+        started = time.perf_counter()
+        fn(q)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def run(args):
+    user, project_id = seed(args.tasks, args.comments)
+    rng = random.Random(1)
+    queries = [" ".join(rng.sample(WORDS, rng.choice((1, 2)))) for _ in range(args.queries)]
+    filters = schemas.SearchFilters()
+
+    with database.SessionLocal() as db:
+        def fts(q):
+            search_repo.search(db, user, q, filters, limit=args.limit)
+
+        def ilike(q):
+            pattern = f"%{q.split()[0]}%"
+            db.execute(text(
+                "SELECT id FROM tasks WHERE project_id = :p AND (title ILIKE :q OR description ILIKE :q)"
+                " ORDER BY created_at DESC LIMIT :limit"
+            ), {"p": project_id, "q": pattern, "limit": args.limit}).all()
+
+        results = {"full-text": timed(fts, queries), "ilike": timed(ilike, queries)}
+
+    print(f"{'':12} {'p50 ms':>10} {'p95 ms':>10}")
+    for name, latencies in results.items():
+        print(f"{name:12} {percentile(latencies, 50) * 1000:10.2f} {percentile(latencies, 95) * 1000:10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=200_000)
+    parser.add_argument("--comments", type=int, default=1, help="comments per task")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20, help="page size")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Worker start time: from a fresh interpreter to serving requests.
+
+Each run starts a new process, like a new worker or a rolling restart, and
+measures two things:
+
+* in-process: time to import app.main, then to run the lifespan startup,
+  then to answer a first request that uses the database;
+* uvicorn: time from spawning ``uvicorn app.main:app`` until it answers
+  HTTP on its port.
+
+--unreachable-db points DATABASE_URL at a closed port, to check that a
+worker still starts (and fails only the requests that need the database).
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_startup --runs 10
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from sqlalchemy import make_url
+
+from benchmarks.common import free_port
+
+CHILD = r"""
+import asyncio, httpx, json, time
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def main():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            status = (await client.post("/login", json={"username": "nobody", "password": "x"})).status_code
+        return ready, time.perf_counter(), status
+
+ready, served, status = asyncio.run(main())
+print(json.dumps({"import_s": imported - started, "lifespan_s": ready - imported,
+                  "first_db_request_s": served - ready, "first_status": status}))
+"""
+
+
+def in_process(env) -> dict:
+    output = subprocess.run([sys.executable, "-c", CHILD], env=env, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def uvicorn_ready(env, timeout: float = 60.0) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=0.5) as conn:
+                    conn.sendall(b"GET /ready-probe HTTP/1.1\r\nHost: bench\r\n\r\n")
+                    if conn.recv(16).startswith(b"HTTP/1.1"):
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError("uvicorn did not start")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--unreachable-db", action="store_true", help="point DATABASE_URL at a closed port")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.unreachable_db:
+        url = make_url(env["DATABASE_URL"]).set(host="127.0.0.1", port=free_port(), query={})
+        env["DATABASE_URL"] = url.render_as_string(hide_password=False)
+
+    runs = [in_process(env) for _ in range(args.runs)]
+    spawn = [uvicorn_ready(env) for _ in range(args.runs)]
+
+    def median_ms(values):
+        return round(statistics.median(values) * 1000, 1)
+
+    print(json.dumps({
+        "runs": args.runs,
+        "unreachable_db": args.unreachable_db,
+        "import_ms": median_ms([r["import_s"] for r in runs]),
+        "lifespan_ms": median_ms([r["lifespan_s"] for r in runs]),
+        "first_db_request_ms": median_ms([r["first_db_request_s"] for r in runs]),
+        "first_status": sorted({r["first_status"] for r in runs}),
+        "uvicorn_spawn_to_ready_ms": median_ms(spawn),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""Helpers shared by the benchmark scripts."""
+import socket
+import time
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def drive(client, method, url, deadline, latencies, statuses, **kwargs):
+    """Issue ``method url`` back to back until ``deadline``, recording latencies and status codes."""
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        latencies.append(time.perf_counter() - started)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
@@ -0,0 +1,176 @@
+"""Seed a large, reproducible dataset for the load benchmarks.
+
+Everything is generated server-side with INSERT ... SELECT generate_series,
+in chunks, with the secondary indexes dropped during the load and rebuilt
+afterwards. Ids are md5 of a stable name (``md5('task-42')::uuid``), so the
+same arguments always produce the same rows and a benchmark can compute any
+id without asking the database. Replaces everything in DATABASE_URL.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.seed \\
+        --users 10000 --projects 50000 --tasks 1000000 --comments 5000000
+
+Layout: user-i owns project p when p % users == i, and the --members users
+after the owner (user-(p+1), ...) are its members; task i belongs to project
+i % projects and is assigned to one of its members; comment j belongs to
+task j % tasks. Every user's password is PASSWORD; "bench-admin" is an admin.
+"""
+import argparse
+import hashlib
+import time
+import uuid
+from dataclasses import dataclass
+
+from sqlalchemy import text
+
+from app import database, models
+from app.auth import hash_password
+
+PASSWORD = "benchmark-password"
+ADMIN = "bench-admin"
+CHUNK_ROWS = 250_000
+
+STATEMENTS = {
+    "users": """
+        INSERT INTO users (id, username, email, password, role)
+        SELECT md5('user-' || i)::uuid, 'user-' || i, 'user-' || i || '@example.com', :password, 'user'
+        FROM generate_series(:lo, :hi) AS i
+    """,
+    "projects": """
+        INSERT INTO projects (id, name, description, status, due_date, owners, members, created_at, version)
+        SELECT md5('project-' || p)::uuid, 'Project ' || p, 'Seeded project ' || p,
+               (ARRAY['pending', 'active', 'completed'])[1 + p % 3], DATE '2027-01-01' + p % 365,
+               ARRAY['user-' || (p % :users)],
+               ARRAY(SELECT 'user-' || ((p + k) % :users) FROM generate_series(1, :members) AS k),
+               now() - p * interval '1 second', 1
+        FROM generate_series(:lo, :hi) AS p
+    """,
+    "project_members": """
+        INSERT INTO project_members (project_id, username, role)
+        SELECT md5('project-' || p)::uuid, 'user-' || (p % :users), 'owner' FROM generate_series(:lo, :hi) AS p
+        UNION ALL
+        SELECT md5('project-' || p)::uuid, 'user-' || ((p + k) % :users), 'member'
+        FROM generate_series(:lo, :hi) AS p CROSS JOIN generate_series(1, :members) AS k
+    """,
+    "tasks": """
+        INSERT INTO tasks (id, title, description, status, priority, due_date, assignee, created_by,
+                           project_id, created_at, updated_at, comment_count)
+        SELECT md5('task-' || i)::uuid,
+               (ARRAY['Fix', 'Write', 'Review', 'Deploy', 'Migrate', 'Test'])[1 + i % 6] || ' '
+                   || (ARRAY['invoice', 'login', 'export', 'dashboard', 'backup', 'search', 'billing'])[1 + i % 7]
+                   || ' ' || i,
+               'Seeded task ' || i || ' for the load benchmark',
+               (ARRAY['pending', 'in_progress', 'done'])[1 + i % 3],
+               (ARRAY['low', 'medium', 'high'])[1 + (i / 3) % 3],
+               DATE '2027-01-01' + i % 365,
+               'user-' || ((i % :projects + 1 + (i / :projects) % :members) % :users),
+               'user-' || (i % :projects % :users),
+               md5('project-' || (i % :projects))::uuid,
+               now() - i * interval '1 second', now() - i * interval '1 second',
+               :comments / :tasks + CASE WHEN i < :comments % :tasks THEN 1 ELSE 0 END
+        FROM generate_series(:lo, :hi) AS i
+    """,
+    "comments": """
+        INSERT INTO comments (id, task_id, content, author, created_at)
+        SELECT md5('comment-' || j)::uuid, md5('task-' || (j % :tasks))::uuid,
+               'Comment ' || j || ' about the ' || (ARRAY['invoice', 'rollout', 'fix', 'numbers'])[1 + j % 4],
+               'user-' || (j % :users), now() - j * interval '1 second'
+        FROM generate_series(:lo, :hi) AS j
+    """,
+}
+
+
+@dataclass(frozen=True)
+class Dataset:
+    users: int
+    projects: int
+    tasks: int
+    comments: int
+    members: int = 4
+
+    def sizes(self) -> dict:
+        return {"users": self.users, "projects": self.projects, "project_members": self.projects,
+                "tasks": self.tasks, "comments": self.comments}
+
+    def user(self, i: int) -> str:
+        return f"user-{i % self.users}"
+
+    def owned_project(self, i: int) -> int:
+        # Project numbers owned by user-i (the first one)
+        return i % min(self.users, self.projects)
+
+    def project_members(self, p: int) -> list:
+        return [self.user(p + k) for k in range(1, self.members + 1)]
+
+    def project_tasks(self, p: int) -> range:
+        return range(p, self.tasks, self.projects)
+
+
+def seeded_id(kind: str, n: int) -> uuid.UUID:
+    """The id seed() gave to ``kind`` number ``n`` (same as md5('kind-n')::uuid)."""
+    return uuid.UUID(hashlib.md5(f"{kind}-{n}".encode()).hexdigest())
+
+
+def _log(message):
+    print(message, flush=True)
+
+
+def seed(dataset: Dataset, chunk_rows: int = CHUNK_ROWS):
+    if dataset.members >= dataset.users or min(dataset.projects, dataset.tasks) < 1:
+        raise SystemExit("need --members < --users and at least one project and task")
+    models.Base.metadata.create_all(bind=database.engine)
+    tables = models.Base.metadata.sorted_tables
+    indexes = [index for table in tables for index in table.indexes]
+    params = {"users": dataset.users, "projects": dataset.projects, "tasks": dataset.tasks,
+              "comments": dataset.comments, "members": dataset.members, "password": hash_password(PASSWORD)}
+
+    with database.engine.begin() as conn:
+        conn.execute(text(f"TRUNCATE {', '.join(t.name for t in tables)} CASCADE"))
+        # Building an index once is far cheaper than maintaining it row by row
+        for index in indexes:
+            index.drop(conn)
+        conn.execute(
+            text("INSERT INTO users (id, username, email, password, role)"
+                 " VALUES (md5('user-' || :u)::uuid, :u, :u || '@example.com', :password, 'admin')"),
+            {"u": ADMIN, "password": params["password"]},
+        )
+
+    for table, total in dataset.sizes().items():
+        started = time.perf_counter()
+        for lo in range(0, total, chunk_rows):
+            with database.engine.begin() as conn:
+                conn.execute(text(STATEMENTS[table]), {**params, "lo": lo, "hi": min(total, lo + chunk_rows) - 1})
+        _log(f"{table:16} {total:>10} rows  {time.perf_counter() - started:8.1f}s")
+
+    started = time.perf_counter()
+    with database.engine.begin() as conn:
+        for index in indexes:
+            index.create(conn)
+    _log(f"{'indexes':16} {len(indexes):>10}       {time.perf_counter() - started:8.1f}s")
+
+    with database.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in tables:
+            conn.execute(text(f"VACUUM ANALYZE {table.name}"))
+
+
+def add_dataset_arguments(parser):
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--projects", type=int, default=50_000)
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--comments", type=int, default=5_000_000)
+    parser.add_argument("--members", type=int, default=4, help="members per project besides the owner")
+
+
+def dataset_from(args) -> Dataset:
+    return Dataset(args.users, args.projects, args.tasks, args.comments, args.members)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_dataset_arguments(parser)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+    seed(dataset_from(args), args.chunk_rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import os
+from contextlib import contextmanager
+
+import pytest
+
+# The models use PostgreSQL-only types (UUID, ARRAY), so the suite needs a real
+# database. Point TEST_DATABASE_URL at a throwaway database to run it.
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+    # Sync the revocation filter once up front so it never adds a statement
+    # to the ones a test counts.
+    os.environ.setdefault("REVOCATION_SYNC_SECONDS", "3600")
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+else:
+    collect_ignore_glob = ["test_*.py"]
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import database, models
+    from app.main import app
+    from app.auth import revoked_tokens
+
+    models.Base.metadata.drop_all(bind=database.engine)
+    models.Base.metadata.create_all(bind=database.engine)
+    with database.SessionLocal() as session:
+        revoked_tokens.is_revoked(session, "warm-up")
+    yield app
+    database.engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def _clean_tables(request):
+    yield
+    if "app" not in request.fixturenames:
+        return
+    from sqlalchemy import text
+    from app import database, models
+    from app.dependencies import principal_cache, project_viewers
+
+    principal_cache.clear()
+    project_viewers.clear()
+
+    tables = ", ".join(t.name for t in models.Base.metadata.sorted_tables)
+    with database.engine.begin() as conn:
+        conn.execute(text(f"TRUNCATE {tables} CASCADE"))
+
+
+@pytest.fixture
+def client(app):
+    from fastapi.testclient import TestClient
+
+    return TestClient(app)
+
+
+@pytest.fixture
+def db(app):
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    from app import models
+    from app.auth import create_access_token
+
+    def _make_user(username, role="user"):
+        user = models.User(
+            username=username,
+            email=f"{username}@example.com",
+            password="not-a-real-hash",
+            role=role,
+        )
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        token = create_access_token(data={"sub": str(user.id)})
+        return user, {"Authorization": f"Bearer {token}"}
+
+    return _make_user
+
+
+@pytest.fixture
+def count_queries(app):
+    from sqlalchemy import event
+    from app import database
+
+    @contextmanager
+    def _count():
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(database.engine, "before_cursor_execute", _record)
+        try:
+            yield statements
+        finally:
+            event.remove(database.engine, "before_cursor_execute", _record)
+
+    return _count
+
+
+@pytest.fixture
+def max_statements(count_queries):
+    """``with max_statements(n): ...`` fails when the block runs more than n
+    SQL statements; run it over datasets of different sizes to catch N+1s."""
+
+    @contextmanager
+    def _max(limit):
+        with count_queries() as statements:
+            yield statements
+        assert len(statements) <= limit, (
+            f"{len(statements)} statements, at most {limit} expected:\n" + "\n".join(statements)
+        )
+
+    return _max
+
+
+@pytest.fixture
+def async_client(app, monkeypatch):
+    """A client for the app running with DB_MODE=async (AsyncSession on asyncpg)."""
+    from fastapi.testclient import TestClient
+    from app import database
+
+    monkeypatch.setattr(database, "DB_MODE", "async")
+    with TestClient(app) as client:
+        yield client
+        if database.async_engine is not None:
+            client.portal.call(database.async_engine.dispose)
+    database.async_engine = database.AsyncSessionLocal = None
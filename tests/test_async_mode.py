@@ -0,0 +1,32 @@
+from app import database
+
+
+def _register_and_login(client, username):
+    client.post("/register", json={"username": username, "email": f"{username}@example.com", "password": "pw"})
+    token = client.post("/login", json={"username": username, "password": "pw"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_core_flows_in_async_mode(async_client, make_user):
+    client = async_client
+    _, alice = make_user("alice")
+
+    project = client.post("/projects", json={"name": "Board"}, headers=alice).json()
+    task = client.post("/tasks", json={"title": "Write", "project_id": project["id"]}, headers=alice).json()
+
+    assert client.get("/tasks", headers=alice).json()["items"][0]["id"] == task["id"]
+    assert [t["id"] for t in client.get(f"/projects/{project['id']}", headers=alice).json()["tasks"]] == [task["id"]]
+    assert [p["id"] for p in client.get("/projects", headers=alice).json()] == [project["id"]]
+
+    response = client.put(f"/projects/{project['id']}/tasks/{task['id']}", json={"status": "done"}, headers=alice)
+    assert response.json()["status"] == "done"
+
+    url = f"/projects/{project['id']}/tasks/{task['id']}/comments"
+    assert client.post(url, json={"content": "Looks good", "author": "alice"}).status_code == 201
+    assert len(client.get(url).json()) == 1
+
+    assert client.delete(f"/tasks/{task['id']}", headers=alice).status_code == 204
+
+    bob = _register_and_login(client, "bob")
+    assert client.get(f"/projects/{project['id']}", headers=bob).status_code == 403
+    assert database.async_engine is not None
@@ -0,0 +1,141 @@
+from app.dependencies import principal_cache
+
+
+def _touches_users(statements):
+    return any("FROM users" in s for s in statements)
+
+
+def test_principal_cache_skips_users_table_on_hit(client, make_user, count_queries):
+    _, alice = make_user("alice")
+
+    with count_queries() as cold:
+        assert client.get("/projects", headers=alice).status_code == 200
+    with count_queries() as warm:
+        assert client.get("/projects", headers=alice).status_code == 200
+
+    assert _touches_users(cold)
+    assert not _touches_users(warm)
+    assert principal_cache.stats()["hits"] >= 1
+
+
+def test_principal_cache_evicted_on_role_change(client, db, make_user):
+    user, headers = make_user("alice")
+    client.get("/projects", headers=headers)
+    assert principal_cache.get(str(user.id)).role == "user"
+
+    user.role = "admin"
+    db.commit()
+
+    assert principal_cache.get(str(user.id)) is None
+    client.get("/projects", headers=headers)
+    assert principal_cache.get(str(user.id)).role == "admin"
+
+
+def test_logout_revokes_token(client, make_user, count_queries):
+    _, alice = make_user("alice")
+
+    with count_queries() as statements:
+        assert client.get("/projects", headers=alice).status_code == 200
+    assert not any("revoked_tokens" in s for s in statements)
+
+    assert client.post("/logout", headers=alice).status_code == 204
+    response = client.get("/projects", headers=alice)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token has been revoked"
+
+
+def test_logout_refuses_tokens_without_an_id(client, make_user):
+    from jose import jwt
+
+    from app.auth import ALGORITHM, SECRET_KEY, decode_access_claims
+
+    _, alice = make_user("alice")
+    claims = decode_access_claims(alice["Authorization"].split()[1])
+    legacy = jwt.encode({"sub": claims["sub"], "exp": claims["exp"]}, SECRET_KEY, algorithm=ALGORITHM)
+
+    response = client.post("/logout", headers={"Authorization": f"Bearer {legacy}"})
+    assert response.status_code == 400
+    assert "cannot be revoked" in response.json()["detail"]
+
+
+def test_revocation_list_syncs_other_workers_revocations(db):
+    from app.auth import RevocationList, create_access_token, decode_access_claims
+
+    claims = decode_access_claims(create_access_token({"sub": "someone"}))
+    other_worker = RevocationList(capacity=100, sync_interval=0)
+    assert not other_worker.is_revoked(db, claims["jti"])
+
+    RevocationList(capacity=100).revoke(db, claims["jti"], claims["exp"])
+    assert other_worker.is_revoked(db, claims["jti"])
+
+
+def test_revocation_check_never_waits_for_a_running_sync(db):
+    # In async mode the syncing caller can be a suspended coroutine on the
+    # same thread; waiting for its lock would deadlock the event loop
+    import threading
+
+    from app.auth import RevocationList, create_access_token, decode_access_claims
+
+    claims = decode_access_claims(create_access_token({"sub": "someone"}))
+    RevocationList(capacity=100).revoke(db, claims["jti"], claims["exp"])
+    cold = RevocationList(capacity=100)
+    answers = []
+    with cold._lock:
+        check = threading.Thread(
+            target=lambda: answers.extend([cold.is_revoked(db, claims["jti"]), cold.is_revoked(db, "fine")]),
+            daemon=True,
+        )
+        check.start()
+        check.join(5)
+    assert answers == [True, False]
+
+
+def test_register_and_login(client):
+    payload = {"username": "alice", "email": "alice@example.com", "password": "s3cret"}
+    assert client.post("/register", json=payload).json()["role"] == "user"
+    assert client.post("/register", json=payload).status_code == 400
+
+    response = client.post("/login", json={"username": "alice", "password": "s3cret"})
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    assert client.get("/projects", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+
+    assert client.post("/login", json={"username": "alice", "password": "nope"}).status_code == 401
+
+
+def test_login_rehashes_outdated_cost(client, db):
+    from app import models
+    from app.auth import pwd_context
+
+    client.post("/register", json={"username": "alice", "email": "a@example.com", "password": "s3cret"})
+    pwd_context.update(bcrypt__rounds=5)
+    try:
+        assert client.post("/login", json={"username": "alice", "password": "s3cret"}).status_code == 200
+    finally:
+        pwd_context.update(bcrypt__rounds=4)
+
+    stored = db.query(models.User.password).filter(models.User.username == "alice").scalar()
+    assert stored.startswith("$2b$05$")
+
+
+def test_password_hasher_refuses_work_when_saturated():
+    import asyncio
+    import threading
+
+    import pytest
+    from fastapi import HTTPException
+
+    from app.auth import PasswordHasher
+
+    async def scenario():
+        hasher = PasswordHasher(workers=1, max_pending=1)
+        release = threading.Event()
+        running = [hasher.submit(release.wait), hasher.submit(release.wait)]
+        with pytest.raises(HTTPException) as exc:
+            hasher.submit(release.wait)
+        release.set()
+        await asyncio.gather(*running)
+        await hasher.submit(lambda: None)
+        return exc.value.status_code
+
+    assert asyncio.run(scenario()) == 503
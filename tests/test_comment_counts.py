@@ -0,0 +1,43 @@
+from app import models
+
+
+def _project_with_task(db, owner):
+    project = models.Project(name="Board", owners=[owner])
+    task = models.Task(title="Task", created_by=owner, project=project)
+    db.add(task)
+    db.commit()
+    return project.id, task.id
+
+
+def test_comment_count_follows_inserts_and_deletes(client, db, make_user):
+    _, alice = make_user("alice")
+    project_id, task_id = _project_with_task(db, "alice")
+    url = f"/projects/{project_id}/tasks/{task_id}/comments"
+
+    for text in ("one", "two", "three"):
+        assert client.post(url, json={"content": text, "author": "alice"}).status_code == 201
+
+    listed = client.get(f"/projects/{project_id}/tasks-with-comment-count").json()
+    assert [(t["id"], t["comment_count"]) for t in listed] == [(str(task_id), 3)]
+    assert client.get(f"/tasks/{task_id}", headers=alice).json()["comment_count"] == 3
+
+    comment = db.query(models.Comment).filter_by(task_id=task_id).first()
+    db.delete(comment)
+    db.commit()
+    db.expire_all()
+    assert db.get(models.Task, task_id).comment_count == 2
+
+
+def test_comments_added_with_a_new_task_and_moved_between_tasks(db):
+    task = models.Task(title="New", created_by="alice")
+    task.comments = [models.Comment(content="a", author="alice"), models.Comment(content="b", author="alice")]
+    db.add(task)
+    db.commit()
+    assert task.comment_count == 2
+
+    other = models.Task(title="Other", created_by="alice")
+    db.add(other)
+    db.commit()
+    task.comments[0].task_id = other.id
+    db.commit()
+    assert (task.comment_count, other.comment_count) == (1, 1)
@@ -0,0 +1,64 @@
+from app import models
+
+
+def _project_with_task(db, owner):
+    project = models.Project(name="Board", owners=[owner])
+    task = models.Task(title="Task", created_by=owner, project=project)
+    db.add(task)
+    db.commit()
+    return project.id, task.id
+
+
+def test_project_etag_revalidates_with_one_statement(client, db, make_user, count_queries):
+    _, alice = make_user("alice")
+    project_id, _ = _project_with_task(db, "alice")
+    url = f"/projects/{project_id}"
+
+    first = client.get(url, headers=alice)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and etag.startswith('"')
+
+    with count_queries() as statements:
+        cached = client.get(url, headers={**alice, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag and cached.content == b""
+    # version + membership check only; no project or task rows
+    assert len(statements) == 1
+
+
+def test_every_kind_of_change_bumps_the_version(client, db, make_user):
+    _, alice = make_user("alice")
+    project_id, task_id = _project_with_task(db, "alice")
+    url = f"/projects/{project_id}/tasks"
+
+    def etag():
+        return client.get(url, headers=alice).headers["ETag"]
+
+    seen = [etag()]
+
+    client.put(f"/projects/{project_id}/tasks/{task_id}", json={"status": "done"}, headers=alice)
+    seen.append(etag())
+    client.post(f"{url}/{task_id}/comments", json={"content": "Hi", "author": "alice"})
+    seen.append(etag())
+    client.put(f"/projects/{project_id}", json={"name": "Renamed"}, headers=alice)
+    seen.append(etag())
+    client.post("/tasks", json={"title": "Second", "project_id": str(project_id)}, headers=alice)
+    seen.append(etag())
+    client.delete(f"/tasks/{task_id}", headers=alice)
+    seen.append(etag())
+
+    assert len(set(seen)) == len(seen)
+    db.expire_all()
+    assert db.get(models.Project, project_id).version == 6
+
+
+def test_etag_varies_with_query_and_checks_access(client, db, make_user):
+    _, alice = make_user("alice")
+    _, bob = make_user("bob")
+    project_id, _ = _project_with_task(db, "alice")
+    url = f"/projects/{project_id}/tasks"
+
+    etag = client.get(url, headers=alice).headers["ETag"]
+    assert client.get(f"{url}?status=done", headers={**alice, "If-None-Match": etag}).status_code == 200
+    assert client.get(url, headers={**alice, "If-None-Match": f'W/{etag}, "other"'}).status_code == 304
+    assert client.get(url, headers={**bob, "If-None-Match": etag}).status_code == 403
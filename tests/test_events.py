@@ -0,0 +1,187 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+from app import events, models
+
+
+def _make_project(db, owners=(), members=()):
+    project = models.Project(name="Board", owners=list(owners), members=list(members))
+    db.add(project)
+    db.commit()
+    return project
+
+
+@asynccontextmanager
+async def open_stream(app, path, headers):
+    """Run GET ``path`` against the ASGI app and yield a function returning
+    its next SSE event as (type, data), or None once the stream has ended.
+    TestClient would wait for the whole body, which never comes."""
+    messages = asyncio.Queue()
+    disconnected = asyncio.Event()
+
+    async def receive():
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        "client": ("test", 1), "server": ("test", 80),
+    }
+    running = asyncio.create_task(app(scope, receive, messages.put))
+    start = await messages.get()
+    assert start["status"] == 200
+    buffer = b""
+
+    async def next_event():
+        nonlocal buffer
+        while True:
+            frame, separator, rest = buffer.partition(b"\n\n")
+            if separator:
+                buffer = rest
+                fields = dict(line.split(b": ", 1) for line in frame.split(b"\n") if b": " in line)
+                if b"event" in fields:
+                    return fields[b"event"].decode(), json.loads(fields[b"data"])
+                continue
+            message = await asyncio.wait_for(messages.get(), 5)
+            if not message.get("more_body", False) and not message.get("body"):
+                return None
+            buffer += message.get("body", b"")
+
+    try:
+        yield next_event
+    finally:
+        disconnected.set()
+        await asyncio.wait_for(running, 5)
+
+
+def test_stream_sends_committed_changes(app, client, db, make_user):
+    _, alice = make_user("alice")
+    project = _make_project(db, owners=["alice"])
+
+    async def scenario():
+        async with open_stream(app, f"/projects/{project.id}/events", alice) as next_event:
+            assert (await next_event())[0] == "ready"
+
+            task = (await asyncio.to_thread(
+                client.post, "/tasks", json={"title": "Live", "project_id": str(project.id)}, headers=alice
+            )).json()
+            kind, data = await next_event()
+            assert (kind, data["task_id"], data["project_id"]) == ("task.created", task["id"], str(project.id))
+
+            comment = (await asyncio.to_thread(
+                client.post, f"/projects/{project.id}/tasks/{task['id']}/comments",
+                json={"content": "hi", "author": "alice"},
+            )).json()
+            assert await next_event() == ("comment.created", {
+                "type": "comment.created", "project_id": str(project.id),
+                "task_id": task["id"], "comment_id": comment["id"],
+            })
+
+            await asyncio.to_thread(client.put, f"/tasks/{task['id']}", json={"status": "done"}, headers=alice)
+            assert (await next_event())[0] == "task.updated"
+
+            await asyncio.to_thread(
+                client.post, f"/projects/{project.id}/tasks/transition", json={"to_status": "pending"}, headers=alice
+            )
+            assert await next_event() == ("task.updated", {
+                "type": "task.updated", "project_id": str(project.id), "task_id": task["id"],
+            })
+
+            await asyncio.to_thread(client.delete, f"/tasks/{task['id']}", headers=alice)
+            kinds = {(await next_event())[0], (await next_event())[0]}
+            assert kinds == {"comment.deleted", "task.deleted"}
+
+    asyncio.run(scenario())
+    assert events.broker.subscriber_count == 0
+
+
+def test_rolled_back_changes_are_not_published(app, db, make_user):
+    _, alice = make_user("alice")
+    project = _make_project(db, owners=["alice"])
+
+    async def scenario():
+        async with open_stream(app, f"/projects/{project.id}/events", alice) as next_event:
+            assert (await next_event())[0] == "ready"
+
+            def write():
+                db.add(models.Task(title="Discarded", created_by="alice", project_id=project.id))
+                db.flush()
+                db.rollback()
+                kept = models.Task(title="Kept", created_by="alice", project_id=project.id)
+                db.add(kept)
+                db.commit()
+                return str(kept.id)
+
+            kept_id = await asyncio.to_thread(write)
+            kind, data = await next_event()
+            assert (kind, data["task_id"]) == ("task.created", kept_id)
+
+    asyncio.run(scenario())
+
+
+def test_stream_requires_view_access(client, db, make_user):
+    _, bob = make_user("bob")
+    project = _make_project(db, owners=["alice"])
+
+    assert client.get(f"/projects/{project.id}/events", headers=bob).status_code == 403
+    assert client.get("/projects/00000000-0000-0000-0000-000000000000/events", headers=bob).status_code == 404
+
+
+def test_stream_refused_with_503_when_the_broker_is_full(app, client, db, make_user, monkeypatch):
+    _, alice = make_user("alice")
+    project = _make_project(db, owners=["alice"])
+    subscribers = events.broker.subscriber_count
+
+    monkeypatch.setattr(events.broker, "max_subscribers", subscribers)
+    response = client.get(f"/projects/{project.id}/events", headers=alice)
+    assert (response.status_code, response.headers["Retry-After"]) == (503, "5")
+
+    monkeypatch.setattr(events.broker, "max_subscribers", subscribers + 1)
+
+    async def scenario():
+        async with open_stream(app, f"/projects/{project.id}/events", alice) as next_event:
+            assert (await next_event())[0] == "ready"
+            assert events.broker.subscriber_count == subscribers + 1
+
+    asyncio.run(scenario())
+    assert events.broker.subscriber_count == subscribers
+
+
+def test_stream_ends_when_access_is_removed(app, client, db, make_user):
+    _, alice = make_user("alice")
+    _, bob = make_user("bob")
+    project = _make_project(db, owners=["alice"], members=["bob"])
+
+    async def scenario():
+        async with open_stream(app, f"/projects/{project.id}/events", bob) as next_event:
+            assert (await next_event())[0] == "ready"
+            await asyncio.to_thread(client.put, f"/projects/{project.id}/members", json={"members": []}, headers=alice)
+            assert await next_event() is None
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_gets_resync_instead_of_unbounded_queue():
+    broker = events.Broker()
+
+    async def scenario():
+        subscription = broker.subscribe("p", maxsize=2)
+        broker.publish([("task.updated", "p", {"task_id": i}) for i in range(3)])
+        broker.publish([("project.members_changed", "p", {})])
+        broker.publish([("task.updated", "p", {"task_id": i}) for i in range(3, 5)])
+        await asyncio.sleep(0)
+        batch = await subscription.next_batch(1)
+        assert [event.type for event in batch] == ["resync", "project.members_changed"]
+
+        broker.publish([("task.updated", "p", {"task_id": 5})])
+        await asyncio.sleep(0)
+        assert [b'"task_id":5' in event.frame for event in await subscription.next_batch(1)] == [True]
+        assert await subscription.next_batch(0.01) == []
+        broker.unsubscribe(subscription)
+
+    asyncio.run(scenario())
+    assert broker.resyncs == 1
+    assert broker.subscriber_count == 0
@@ -0,0 +1,60 @@
+import csv
+import io
+import json
+
+from app import models
+
+
+def _seed(db):
+    project = models.Project(name="Board", owners=["alice"], members=["bob"])
+    project.tasks = [
+        models.Task(title=f"Task {i}", created_by="alice",
+                    comments=[models.Comment(content=f"c{i}", author="bob")] if i % 2 else [])
+        for i in range(5)
+    ]
+    db.add(project)
+    db.commit()
+    return project.id
+
+
+def test_ndjson_export_streams_project_tasks_and_comments(client, db, make_user, monkeypatch):
+    from app import exporter
+
+    monkeypatch.setattr(exporter, "EXPORT_BATCH_ROWS", 2)
+    _, alice = make_user("alice")
+    project_id = _seed(db)
+
+    response = client.get(f"/projects/{project_id}/export", headers=alice)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["type"] for r in records] == ["project"] + ["task"] * 5 + ["comment"] * 2
+    assert records[0]["ref"] == str(project_id) and records[0]["owners"] == ["alice"]
+    assert {r["project"] for r in records if r["type"] == "task"} == {str(project_id)}
+
+
+def test_csv_export_matches_the_import_format(client, db, make_user):
+    _, alice = make_user("alice")
+    project_id = _seed(db)
+
+    response = client.get(f"/projects/{project_id}/export?kind=tasks&format=csv", headers=alice)
+    assert response.headers["content-disposition"] == f'attachment; filename="project-{project_id}-tasks.csv"'
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 5
+    assert set(rows[0]) == {"ref", "project", "title", "description", "status", "priority", "due_date",
+                            "assignee", "created_by", "created_at"}
+
+    assert client.get(f"/projects/{project_id}/export?format=csv", headers=alice).status_code == 400
+
+
+def test_export_requires_view_access(client, db, make_user):
+    _, carol = make_user("carol")
+    project_id = _seed(db)
+    assert client.get(f"/projects/{project_id}/export", headers=carol).status_code == 403
+
+
+def test_export_in_async_mode(async_client, db, make_user):
+    _, alice = make_user("alice")
+    project_id = _seed(db)
+    response = async_client.get(f"/projects/{project_id}/export?kind=comments", headers=alice)
+    assert sorted(json.loads(line)["content"] for line in response.text.splitlines()) == ["c1", "c3"]
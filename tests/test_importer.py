@@ -0,0 +1,126 @@
+import json
+
+import pytest
+
+from app import models
+from app.importer import ImportFailed, import_files
+
+
+def _write(path, records):
+    path.write_text("".join(json.dumps(r) + "\n" for r in records))
+    return str(path)
+
+
+def test_import_merges_projects_tasks_and_comments(db, make_user, tmp_path):
+    make_user("alice")
+    make_user("Bob")
+    existing = models.Project(name="Existing", owners=["alice"])
+    db.add(existing)
+    db.commit()
+
+    projects = _write(tmp_path / "projects.ndjson", [
+        {"ref": "p1", "name": "Imported", "owners": ["alice"], "members": ["bob"], "due_date": "2026-12-01"},
+    ])
+    tasks = tmp_path / "tasks.csv"
+    tasks.write_text(
+        "ref,project,title,created_by,assignee,priority\n"
+        "t1,p1,First,alice,bob,high\n"
+        f"t2,{existing.id},\"Second, with comma\",bob,,\n"
+    )
+    comments = _write(tmp_path / "comments.ndjson", [
+        {"task": "t1", "content": "one", "author": "alice"},
+        {"task": "t1", "content": "two", "author": "bob"},
+    ])
+    progress = []
+
+    counts = import_files(projects, str(tasks), comments, batch_rows=1, progress=lambda *a: progress.append(a))
+    assert (counts["projects"], counts["tasks"], counts["comments"]) == (1, 2, 2)
+    assert ("merge tasks", 2, 2) in progress
+
+    db.expire_all()
+    imported = db.query(models.Project).filter_by(name="Imported").one()
+    assert (imported.owners, imported.members) == (["alice"], ["Bob"])
+    assert {(m.username, m.role) for m in imported.memberships} == {("alice", "owner"), ("Bob", "member")}
+    first = db.query(models.Task).filter_by(title="First").one()
+    assert (first.project_id, first.assignee, first.priority, first.comment_count) == (imported.id, "Bob", "high", 2)
+    second = db.query(models.Task).filter_by(title="Second, with comma").one()
+    assert (second.project_id, second.created_by, second.status) == (existing.id, "Bob", "pending")
+    assert db.get(models.Project, existing.id).version > 1
+
+
+def test_invalid_records_are_reported_and_nothing_is_written(db, make_user, tmp_path):
+    make_user("alice")
+    projects = _write(tmp_path / "projects.ndjson", [
+        {"ref": "p1", "name": "Ok", "owners": ["alice"]},
+        {"ref": "p2", "name": "", "owners": ["nobody"], "due_date": "2026-02-31"},
+    ])
+    tasks = _write(tmp_path / "tasks.ndjson", [
+        {"ref": "t1", "project": "p9", "title": "Lost", "created_by": "alice"},
+    ])
+
+    with pytest.raises(ImportFailed) as failed:
+        import_files(projects, tasks)
+    assert sorted(failed.value.errors) == [
+        ("projects", 2, "invalid due_date 2026-02-31"),
+        ("projects", 2, "name is required"),
+        ("projects", 2, "unknown user nobody"),
+        ("tasks", 1, "unknown project p9"),
+    ]
+    assert db.query(models.Project).count() == 0
+
+    with pytest.raises(ImportFailed) as failed:
+        import_files(_write(tmp_path / "bad.ndjson", [{"ref": "p1", "colour": "red"}]))
+    assert failed.value.errors == [("projects", 1, "unknown field(s): colour")]
+
+
+def test_errors_report_the_line_each_record_starts_on(make_user, tmp_path):
+    make_user("alice")
+    projects = tmp_path / "projects.ndjson"
+    projects.write_text(
+        json.dumps({"ref": "p1", "name": "Ok", "owners": ["alice"]}) + "\n\n\n"
+        + json.dumps({"ref": "p2", "name": ""}) + "\n"
+    )
+    tasks = tmp_path / "tasks.csv"
+    tasks.write_text(
+        "ref,project,title,description,created_by\n"
+        "t1,p1,First,\"spans\nthree\nlines\",alice\n"
+        "t2,p1,,,alice\n"
+    )
+
+    with pytest.raises(ImportFailed) as failed:
+        import_files(str(projects), str(tasks))
+    assert sorted(failed.value.errors) == [
+        ("projects", 4, "name is required"),
+        ("tasks", 5, "title is required"),
+    ]
+
+
+def test_malformed_csv_rows_are_reported_by_line(make_user, tmp_path):
+    make_user("alice")
+    tasks = tmp_path / "tasks.csv"
+    tasks.write_text(
+        "ref,project,title,created_by\n"
+        "t1,p1,First,alice\n"
+        "t2,p1,\"Second, quoted\",alice,extra\n"
+    )
+
+    with pytest.raises(ImportFailed) as failed:
+        import_files(tasks=str(tasks))
+    assert failed.value.errors == [("tasks", 3, "expected 4 fields, got 5")]
+
+
+def test_a_failing_merge_writes_nothing(db, make_user, tmp_path, monkeypatch):
+    from app import importer
+
+    make_user("alice")
+    projects = _write(tmp_path / "projects.ndjson", [{"ref": "p1", "name": "Imported", "owners": ["alice"]}])
+    tasks = _write(tmp_path / "tasks.ndjson", [
+        {"ref": f"t{i}", "project": "p1", "title": f"Task {i}", "created_by": "alice"} for i in range(3)
+    ])
+    comments = _write(tmp_path / "comments.ndjson", [{"task": "t0", "content": "one", "author": "alice"}])
+    monkeypatch.setattr(importer, "MERGE_COMMENTS_SQL", "SELECT 1 / 0")
+
+    with pytest.raises(Exception, match="division by zero"):
+        import_files(projects, tasks, comments, batch_rows=1)
+    assert db.query(models.Project).count() == 0
+    assert db.query(models.Task).count() == 0
@@ -0,0 +1,120 @@
+import json
+import time
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from app import invalidation, models
+from app.dependencies import principal_cache, project_viewers
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def listening(app):
+    invalidation.bus.start()
+    wait_for(lambda: invalidation.bus.connected)
+    yield invalidation.bus
+    invalidation.bus.stop()
+
+
+def _project(db, owner):
+    project = models.Project(name="Board", owners=[owner])
+    db.add(project)
+    db.commit()
+    return project.id
+
+
+def test_payloads_stay_under_the_notify_limit():
+    bus = invalidation.InvalidationBus()
+    keys = {("project", str(uuid.uuid4())) for _ in range(500)}
+    payloads = bus.payloads(keys, [("task.updated", uuid.uuid4(), {"task_id": uuid.uuid4()})])
+
+    assert len(payloads) > 1
+    assert all(len(payload.encode()) < 8000 for payload in payloads)
+    messages = [json.loads(payload) for payload in payloads]
+    assert {tuple(key) for message in messages for key in message.get("k", ())} == keys
+    assert sum(len(message.get("e", ())) for message in messages) == 1
+
+    # A bulk write's events become one resync per project
+    project_id = uuid.uuid4()
+    burst = [("task.updated", project_id, {"task_id": i}) for i in range(invalidation.INVALIDATION_MAX_EVENTS + 1)]
+    (payload,) = bus.payloads(set(), burst)
+    assert json.loads(payload)["e"] == [["resync", str(project_id), {}]]
+
+
+def test_other_workers_writes_evict_cached_principals_and_projects(listening, client, db, make_user, count_queries):
+    user, alice = make_user("alice")
+    project_id = _project(db, "alice")
+
+    etag = client.get(f"/projects/{project_id}", headers=alice).headers["ETag"]
+    with count_queries() as statements:
+        response = client.get(f"/projects/{project_id}", headers={**alice, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert statements == []
+    assert principal_cache.get(str(user.id)) is not None
+
+    # Another worker renames alice's project and demotes her behind the ORM's
+    # back: only its notification tells this worker
+    other_worker = invalidation.InvalidationBus()
+    db.execute(text("UPDATE projects SET version = version + 1 WHERE id = :id"), {"id": project_id})
+    db.execute(text("UPDATE users SET role = 'admin' WHERE id = :id"), {"id": user.id})
+    other_worker.send(db.connection(), {("project", str(project_id)), ("user", str(user.id))})
+    db.commit()
+
+    wait_for(lambda: project_viewers.get(project_id) is None and principal_cache.get(str(user.id)) is None)
+    assert client.get(f"/projects/{project_id}", headers={**alice, "If-None-Match": etag}).status_code == 200
+    assert principal_cache.get(str(user.id)).role == "admin"
+
+
+def test_own_writes_are_evicted_at_commit_not_by_the_listener(listening, client, db, make_user):
+    _, alice = make_user("alice")
+    project_id = _project(db, "alice")
+    client.get(f"/projects/{project_id}", headers=alice)
+    assert project_viewers.get(project_id) is not None
+    batches = listening.batches
+
+    client.post("/tasks", json={"title": "New", "project_id": str(project_id)}, headers=alice)
+    assert project_viewers.get(project_id) is None
+    time.sleep(0.1)
+    assert listening.batches == batches
+
+
+def test_rolled_back_writes_notify_nobody(listening, db):
+    project_id = _project(db, "alice")
+    notifications = listening.notifications
+
+    project = db.get(models.Project, project_id)
+    project.name = "Renamed"
+    db.flush()
+    db.rollback()
+    db.execute(text("SELECT pg_notify(:channel, '{}')"), {"channel": listening.channel})
+    db.commit()
+
+    wait_for(lambda: listening.notifications > notifications)
+    time.sleep(0.1)
+    assert listening.notifications == notifications + 1
+
+
+def test_listener_reconnects_and_resyncs(listening, client, db, make_user):
+    user, alice = make_user("alice")
+    client.get("/projects", headers=alice)
+    assert principal_cache.get(str(user.id)) is not None
+    resyncs = listening.resyncs
+
+    db.execute(
+        text("SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE application_name = :name"),
+        {"name": invalidation.LISTENER_NAME},
+    )
+    db.commit()
+
+    wait_for(lambda: listening.reconnects >= 1 and listening.connected)
+    # Cleared on losing the connection and again once listening
+    assert listening.resyncs >= resyncs + 2
+    assert principal_cache.get(str(user.id)) is None
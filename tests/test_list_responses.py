@@ -0,0 +1,38 @@
+from datetime import date
+
+from app import models, schemas
+
+
+def _seed(db, owner):
+    project = models.Project(name="Board", owners=[owner], members=["bob"])
+    project.tasks = [
+        models.Task(title="Plain", created_by=owner),
+        models.Task(title="Dated", created_by=owner, due_date=date(2026, 1, 2), assignee="bob"),
+    ]
+    db.add(project)
+    db.commit()
+    return project
+
+
+def test_row_responses_match_the_validated_schemas(client, db, make_user):
+    _, alice = make_user("alice")
+    project = _seed(db, "alice")
+
+    # What the response_model path produced from ORM objects
+    db.expire_all()
+    tasks = db.query(models.Task).order_by(models.Task.created_at, models.Task.id).all()
+    expected_tasks = [schemas.Task.model_validate(t, from_attributes=True).model_dump(mode="json") for t in tasks]
+    expected_project = schemas.ProjectOut.model_validate(project, from_attributes=True).model_dump(mode="json")
+
+    response = client.get(f"/projects/{project.id}/tasks", headers=alice)
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {"items": expected_tasks, "next_cursor": None}
+    assert client.get("/tasks", headers=alice).json()["items"] == expected_tasks
+
+    # Embedded tasks come in no particular order
+    [listed] = client.get("/projects?include=tasks", headers=alice).json()
+    assert sorted(listed.pop("tasks"), key=lambda t: t["id"]) == sorted(
+        expected_project.pop("tasks"), key=lambda t: t["id"]
+    )
+    listed.pop("task_summary")
+    assert listed == expected_project
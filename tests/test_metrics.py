@@ -0,0 +1,54 @@
+import re
+
+from app import metrics
+
+
+def _value(text, sample):
+    match = re.search(rf"^{re.escape(sample)} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_metrics_report_routes_statuses_and_db_time(client, db, make_user):
+    _, alice = make_user("alice")
+    project_id = client.post("/projects", json={"name": "Board"}, headers=alice).json()["id"]
+    route = 'method="GET",route="/projects/{project_id}"'
+    before = client.get("/metrics").text
+
+    client.get(f"/projects/{project_id}", headers=alice)
+    client.get(f"/projects/{project_id}", headers=alice)
+    client.get("/projects/not-a-uuid", headers=alice)
+    client.get("/no/such/path")
+    after = client.get("/metrics").text
+
+    def delta(sample):
+        return _value(after, sample) - _value(before, sample)
+
+    assert delta(f'http_requests_total{{{route},status="200"}}') == 2
+    assert delta(f'http_requests_total{{{route},status="422"}}') == 1
+    assert delta('http_requests_total{method="GET",route="unmatched",status="404"}') == 1
+    assert delta(f'http_request_duration_seconds_count{{{route}}}') == 3
+    assert delta(f'http_request_duration_seconds_bucket{{{route},le="+Inf"}}') == 3
+    assert delta(f"http_request_db_statements_total{{{route}}}") >= 2
+    assert delta(f"http_request_db_seconds_sum{{{route}}}") > 0
+    # the scrape itself is in flight while it renders
+    assert _value(after, 'http_requests_in_flight{method="GET"}') == 1
+    assert _value(after, 'db_pool_size{pool="primary"}') > 0
+    assert "# TYPE http_request_duration_seconds histogram" in after
+    # alice's second request found her in the principal cache
+    assert delta('cache_hits_total{cache="principal"}') >= 1
+    assert _value(after, 'cache_entries{cache="principal"}') >= 1
+
+
+def test_same_endpoint_under_two_paths_gets_two_routes(client, make_user):
+    _, alice = make_user("alice")
+    client.get("/users", headers=alice)
+    client.get("/api/users", headers=alice)
+    text = client.get("/metrics").text
+    assert 'http_requests_total{method="GET",route="/users",status="200"}' in text
+    assert 'http_requests_total{method="GET",route="/api/users",status="200"}' in text
+
+
+def test_metrics_token(client, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "s3cret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
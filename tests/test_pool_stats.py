@@ -0,0 +1,31 @@
+from app import database
+
+
+def test_pool_endpoint_reports_usage(client, make_user):
+    _, admin = make_user("root", role="admin")
+    _, alice = make_user("alice")
+
+    assert client.get("/internal/pool", headers=alice).status_code == 403
+
+    report = client.get("/internal/pool", headers=admin).json()
+    primary = report["pools"]["primary"]
+    assert primary["size"] == database.DB_POOL_SIZE
+    assert {"checked_out", "idle", "overflow", "max_overflow", "timeouts"} <= set(primary)
+    assert primary["checkouts"] >= 1
+    assert set(primary["wait_ms"]) == {"p50", "p95", "p99", "max"}
+
+
+def test_checkout_waits_are_recorded(app):
+    pool = database.engine.pool
+    before = pool.wait_stats.checkouts
+    with database.engine.connect():
+        assert database.pool_report()["pools"]["primary"]["checked_out"] >= 1
+    assert pool.wait_stats.checkouts == before + 1
+
+
+def test_statement_timeout_option(monkeypatch):
+    monkeypatch.setattr(database, "DB_STATEMENT_TIMEOUT_MS", 2500)
+    assert database.engine_options()["connect_args"] == {"options": "-c statement_timeout=2500"}
+    assert database.engine_options(asyncio=True)["connect_args"] == {
+        "server_settings": {"statement_timeout": "2500"}
+    }
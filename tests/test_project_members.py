@@ -0,0 +1,54 @@
+from app import models
+
+
+def _memberships(db, project_id):
+    rows = db.query(models.ProjectMember).filter(models.ProjectMember.project_id == project_id).all()
+    return {(m.username, m.role) for m in rows}
+
+
+def test_membership_rows_follow_owner_and_member_updates(client, db, make_user):
+    _, alice = make_user("alice")
+    make_user("bob")
+
+    project_id = client.post("/projects", json={"name": "Board"}, headers=alice).json()["id"]
+    assert _memberships(db, project_id) == {("alice", "owner")}
+
+    client.put(f"/projects/{project_id}/members", json={"members": ["bob"]}, headers=alice)
+    client.put(f"/projects/{project_id}/owners", json={"owners": ["alice", "bob"]}, headers=alice)
+    db.expire_all()
+    assert _memberships(db, project_id) == {("alice", "owner"), ("bob", "owner"), ("bob", "member")}
+
+
+def test_project_listing_and_access_use_membership(client, db, make_user):
+    _, alice = make_user("alice")
+    _, bob = make_user("bob")
+    _, carol = make_user("carol")
+
+    project_id = client.post("/projects", json={"name": "Board"}, headers=alice).json()["id"]
+    client.put(f"/projects/{project_id}/members", json={"members": ["bob"]}, headers=alice)
+
+    assert [p["id"] for p in client.get("/projects", headers=bob).json()] == [project_id]
+    assert client.get("/projects", headers=carol).json() == []
+
+    assert client.get(f"/projects/{project_id}", headers=bob).status_code == 200
+    assert client.get(f"/projects/{project_id}", headers=carol).status_code == 403
+    assert client.put(f"/projects/{project_id}", json={"name": "x"}, headers=bob).status_code == 403
+
+
+def test_task_reads_use_membership(client, db, make_user):
+    _, alice = make_user("alice")
+    _, bob = make_user("bob")
+    _, carol = make_user("carol")
+
+    project_id = client.post("/projects", json={"name": "Board"}, headers=alice).json()["id"]
+    client.put(f"/projects/{project_id}/members", json={"members": ["bob"]}, headers=alice)
+    task_id = client.post("/tasks", json={"title": "Plan", "project_id": project_id}, headers=alice).json()["id"]
+
+    for path in (f"/tasks/{task_id}", f"/projects/{project_id}/tasks/{task_id}"):
+        assert client.get(path, headers=bob).status_code == 200
+        assert client.get(path, headers=carol).status_code == 403
+
+    # The membership rows decide, not the legacy arrays on the project
+    db.query(models.ProjectMember).filter_by(project_id=project_id, username="bob").delete()
+    db.commit()
+    assert client.get(f"/tasks/{task_id}", headers=bob).status_code == 403
@@ -0,0 +1,41 @@
+from datetime import date, timedelta
+
+from app import models
+
+
+def test_project_list_returns_rollups_from_one_aggregate(client, db, make_user, count_queries):
+    _, alice = make_user("alice")
+    yesterday = date.today() - timedelta(days=1)
+    busy = models.Project(name="Busy", owners=["alice"])
+    busy.tasks = [
+        models.Task(title="a", created_by="alice", status="pending", priority="high", due_date=yesterday),
+        models.Task(title="b", created_by="alice", status="pending", priority="low"),
+        models.Task(title="c", created_by="alice", status="done", priority="high", due_date=yesterday),
+    ]
+    empty = models.Project(name="Empty", owners=["alice"])
+    hidden = models.Project(name="Hidden", owners=["bob"], tasks=[models.Task(title="x", created_by="bob")])
+    db.add_all([busy, empty, hidden])
+    db.commit()
+
+    client.get("/projects", headers=alice)  # warm the principal cache
+    with count_queries() as statements:
+        projects = {p["name"]: p for p in client.get("/projects", headers=alice).json()}
+    # projects, then one GROUPING SETS aggregate for all their tasks
+    assert len(statements) == 2
+    assert "GROUPING SETS" in statements[1]
+
+    assert set(projects) == {"Busy", "Empty"}
+    assert "tasks" not in projects["Busy"]
+    summary = projects["Busy"]["task_summary"]
+    assert summary["total"] == 3
+    assert summary["by_status"] == {"pending": 2, "done": 1}
+    assert summary["by_priority"] == {"high": 2, "low": 1}
+    assert summary["overdue"] == 1
+    assert summary["last_activity"] is not None
+    assert projects["Empty"]["task_summary"] == {
+        "total": 0, "by_status": {}, "by_priority": {}, "overdue": 0, "last_activity": None,
+    }
+
+    with_tasks = {p["name"]: p for p in client.get("/projects?include=tasks", headers=alice).json()}
+    assert len(with_tasks["Busy"]["tasks"]) == 3 and with_tasks["Empty"]["tasks"] == []
+    assert client.get("/projects?include=comments", headers=alice).status_code == 422
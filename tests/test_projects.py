@@ -1,15 +1,24 @@
-
-from fastapi.testclient import TestClient
-from taskApi.app.main import app
-
-client = TestClient(app)
-
-def test_create_project():
+def test_create_project(client, make_user):
+    _, alice = make_user("alice")
     response = client.post("/projects", json={
         "name": "Test Project",
         "description": "Testing",
         "status": "pending",
         "due_date": "2025-07-01"
-    })
+    }, headers=alice)
+    assert response.status_code == 200
+    assert response.json()["name"] == "Test Project"
+    assert response.json()["owners"] == ["alice"]
+
+
+def test_list_project_members(client, make_user):
+    alice_user, alice = make_user("alice")
+    bob_user, _ = make_user("bob")
+    project_id = client.post("/projects", json={"name": "Team"}, headers=alice).json()["id"]
+    client.put(f"/projects/{project_id}/members", json={"members": ["bob"]}, headers=alice)
+
+    response = client.get(f"/projects/{project_id}/members", headers=alice)
     assert response.status_code == 200
-    assert response.json()["name"] == "Test Project"
\ No newline at end of file
+    assert sorted((m["id"], m["username"]) for m in response.json()) == sorted(
+        [(str(alice_user.id), "alice"), (str(bob_user.id), "bob")]
+    )
@@ -0,0 +1,118 @@
+"""EXPLAIN the hot repository queries on a seeded database.
+
+Each case runs a repository/service function against enough rows that the
+planner prefers an index where one fits, captures the statements it sends,
+and EXPLAINs them with the same parameters. A sequential scan of one of the
+large tables means an index is missing or a query stopped matching one.
+"""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event, text
+
+from app import dependencies, models, schemas
+from app.repository import search as search_repo
+from app.repository import task as task_repo
+from app.services import project_service
+
+HOT_TABLES = {"tasks", "comments", "users", "project_members"}
+PROJECTS, TASKS_PER_PROJECT, USERS = 200, 100, 2000
+
+SEED = [
+    """INSERT INTO users (id, username, email, password, role)
+       SELECT gen_random_uuid(), 'user-' || i, 'user-' || i || '@example.com', 'x', 'user'
+       FROM generate_series(0, :users - 1) AS i""",
+    """INSERT INTO projects (id, name, owners, members, status, version)
+       SELECT gen_random_uuid(), 'project-' || i, ARRAY['user-' || (i % 100)],
+              ARRAY(SELECT 'user-' || ((i * 10 + k) % :users) FROM generate_series(1, 10) AS k), 'active', 1
+       FROM generate_series(0, :projects - 1) AS i""",
+    """INSERT INTO project_members (project_id, username, role)
+       SELECT id, owners[1], 'owner' FROM projects
+       UNION ALL SELECT id, unnest(members), 'member' FROM projects""",
+    """INSERT INTO tasks (id, title, description, status, priority, assignee, created_by, project_id,
+                          created_at, updated_at, comment_count)
+       SELECT gen_random_uuid(), 'task ' || i || CASE WHEN i % 50 = 0 THEN ' rollback' ELSE '' END, 'routine', (ARRAY['pending', 'in_progress', 'done'])[1 + i % 3],
+              'medium', 'user-' || (i % :users), 'user-0', p.id, now() - i * interval '1 minute', now(), 2
+       FROM projects p CROSS JOIN generate_series(1, :per_project) AS i""",
+    """INSERT INTO comments (id, task_id, content, author, created_at)
+       SELECT gen_random_uuid(), t.id, 'comment ' || j || ' ' || md5(t.id::text), 'user-0', now()
+       FROM tasks t CROSS JOIN generate_series(1, 2) AS j""",
+]
+
+
+@pytest.fixture
+def seeded(app):
+    from app import database
+
+    with database.engine.begin() as conn:
+        for statement in SEED:
+            conn.execute(text(statement), {"users": USERS, "projects": PROJECTS, "per_project": TASKS_PER_PROJECT})
+    # VACUUM as well: rows inserted after a GIN index was built sit in its
+    # pending list (costed as a full scan) until vacuum merges them
+    with database.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in sorted(HOT_TABLES | {"projects"}):
+            conn.execute(text(f"VACUUM ANALYZE {table}"))
+    with database.engine.connect() as conn:
+        project_id = conn.execute(text("SELECT id FROM projects WHERE name = 'project-7'")).scalar()
+        task_id = conn.execute(text("SELECT id FROM tasks WHERE project_id = :p LIMIT 1"), {"p": project_id}).scalar()
+    return {"project_id": project_id, "task_id": task_id, "user": models.User(username="user-7", role="user")}
+
+
+@contextmanager
+def captured(db):
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "WITH")):
+            statements.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
+
+def seq_scans(plan):
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in HOT_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", ()):
+        found += seq_scans(child)
+    return found
+
+
+CASES = {
+    "project task page": lambda db, s: task_repo.get_tasks_by_project(db, s["project_id"], schemas.TaskFilters()),
+    "project task page by status": lambda db, s: task_repo.get_tasks_by_project(
+        db, s["project_id"], schemas.TaskFilters(status="done")),
+    "status transition": lambda db, s: task_repo.transition_tasks(
+        db, s["project_id"], schemas.TaskFilters(status="pending"), "done"),
+    "visible tasks": lambda db, s: task_repo.get_visible_tasks(db, s["user"], schemas.TaskFilters()),
+    "tasks assigned to": lambda db, s: task_repo.get_tasks(db, assignee="user-7"),
+    "task in project": lambda db, s: task_repo.get_task_by_project_and_id(db, s["project_id"], s["task_id"]),
+    "comments of task": lambda db, s: db.query(models.Comment).filter(models.Comment.task_id == s["task_id"]).all(),
+    "project summaries": lambda db, s: project_service.get_user_related_projects(db, "user-7"),
+    "project access": lambda db, s: dependencies.project_access(db, [s["project_id"]], s["user"]),
+    "project version for viewer": lambda db, s: dependencies.project_version_for_viewer(db, s["project_id"], s["user"]),
+    "user by username": lambda db, s: db.query(models.User).filter(models.User.username == "user-7").first(),
+    "search": lambda db, s: search_repo.search(db, s["user"], "rollback", schemas.SearchFilters()),
+}
+
+
+def test_hot_queries_use_indexes(db, seeded):
+    # One test for all cases: seeding is most of the runtime
+    regressions = []
+    for case, run in CASES.items():
+        with captured(db) as statements:
+            run(db, seeded)
+        db.rollback()
+        assert statements, case
+
+        for statement, parameters in statements:
+            (plan,) = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+            if seq_scans(plan["Plan"]):
+                regressions.append(f"{case}: sequential scan of {seq_scans(plan['Plan'])} in\n{statement}")
+        db.rollback()
+    assert not regressions, "\n\n".join(regressions)
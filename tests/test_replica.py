@@ -0,0 +1,74 @@
+import pytest
+from sqlalchemy import create_engine, make_url, text
+
+from app import database, models
+
+# A second local database plays the replica; rows written straight into it
+# show which engine served a request.
+REPLICA_DATABASE = "taskhub_test_replica"
+
+
+@pytest.fixture
+def replica(app, monkeypatch):
+    url = make_url(database.DATABASE_URL).set(database=REPLICA_DATABASE)
+    with database.engine.execution_options(isolation_level="AUTOCOMMIT").connect() as conn:
+        if not conn.execute(text("SELECT 1 FROM pg_database WHERE datname = :n"), {"n": REPLICA_DATABASE}).scalar():
+            conn.execute(text(f"CREATE DATABASE {REPLICA_DATABASE}"))
+    setup = create_engine(url)
+    models.Base.metadata.drop_all(bind=setup)
+    models.Base.metadata.create_all(bind=setup)
+    setup.dispose()
+
+    replica = database.Replica(url.render_as_string(hide_password=False), check_seconds=0)
+    monkeypatch.setattr(database, "replica", replica)
+    yield replica
+    replica.dispose()
+
+
+def test_reads_use_replica_and_writes_use_primary(client, make_user, replica):
+    _, alice = make_user("alice")
+
+    created = client.post("/projects", json={"name": "On primary"}, headers=alice)
+    assert created.status_code == 200 and created.json()["name"] == "On primary"
+    assert client.get("/projects", headers=alice).json() == []
+
+    with replica.SessionLocal() as db:
+        db.add(models.Project(name="On replica", owners=["alice"], members=[]))
+        db.commit()
+
+    assert [p["name"] for p in client.get("/projects", headers=alice).json()] == ["On replica"]
+    assert replica.status()["healthy"] and replica.status()["lag_s"] == 0
+
+
+def test_lagging_replica_falls_back_to_primary(client, make_user, replica, monkeypatch):
+    _, alice = make_user("alice")
+    client.post("/projects", json={"name": "On primary"}, headers=alice)
+
+    monkeypatch.setattr(replica, "_probe", lambda: replica.max_lag + 10)
+    assert [p["name"] for p in client.get("/projects", headers=alice).json()] == ["On primary"]
+    assert not replica.status()["healthy"]
+
+
+def test_unreachable_replica_falls_back_to_primary(client, make_user, monkeypatch):
+    missing = make_url(database.DATABASE_URL).set(database="taskhub_no_such_db")
+    replica = database.Replica(missing.render_as_string(hide_password=False), check_seconds=0)
+    monkeypatch.setattr(database, "replica", replica)
+    _, admin = make_user("root", role="admin")
+    client.post("/projects", json={"name": "On primary"}, headers=admin)
+
+    assert [p["name"] for p in client.get("/projects", headers=admin).json()] == ["On primary"]
+    report = client.get("/internal/pool", headers=admin).json()
+    assert "replica" in report["pools"]
+    assert report["replica"]["healthy"] is False and report["replica"]["error"]
+    replica.dispose()
+
+
+def test_async_mode_reads_from_replica(async_client, make_user, replica):
+    _, alice = make_user("alice")
+    with replica.SessionLocal() as db:
+        db.add(models.Project(name="On replica", owners=["alice"], members=[]))
+        db.commit()
+
+    assert [p["name"] for p in async_client.get("/projects", headers=alice).json()] == ["On replica"]
+    assert replica.async_engine is not None
+    async_client.portal.call(replica.async_engine.dispose)
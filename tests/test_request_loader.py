@@ -0,0 +1,53 @@
+from app import models
+
+
+def _selects_from(statements, table):
+    return [s for s in statements if s.lstrip().startswith("SELECT") and f"FROM {table}" in s]
+
+
+def _project_with_task(db, owner):
+    project = models.Project(name="Board", owners=[owner])
+    task = models.Task(title="Task", created_by=owner, project=project)
+    db.add(task)
+    db.commit()
+    return project.id, task.id
+
+
+def test_update_project_fetches_project_once(client, db, make_user, count_queries):
+    _, alice = make_user("alice")
+    project_id, _ = _project_with_task(db, "alice")
+
+    with count_queries() as statements:
+        response = client.put(f"/projects/{project_id}", json={"name": "Renamed"}, headers=alice)
+    assert response.status_code == 200
+
+    # user, project, owner check, UPDATE, NOTIFY other workers, refresh after commit
+    assert len(statements) == 6
+    assert len(_selects_from(statements, "projects")) == 2
+
+
+def test_update_task_in_project_fetches_each_entity_once(client, db, make_user, count_queries):
+    _, alice = make_user("alice")
+    project_id, task_id = _project_with_task(db, "alice")
+
+    with count_queries() as statements:
+        response = client.put(
+            f"/projects/{project_id}/tasks/{task_id}", json={"status": "done"}, headers=alice
+        )
+    assert response.status_code == 200
+    assert response.json()["status"] == "done"
+
+    # user, task, project, owner check, UPDATE task, project version bump,
+    # NOTIFY other workers, refresh after commit
+    assert len(statements) == 8
+    assert len(_selects_from(statements, "tasks")) == 2
+    assert len(_selects_from(statements, "projects")) == 1
+
+
+def test_update_task_in_other_project_is_404(client, db, make_user):
+    _, alice = make_user("alice")
+    _, task_id = _project_with_task(db, "alice")
+    other_id, _ = _project_with_task(db, "alice")
+
+    response = client.put(f"/projects/{other_id}/tasks/{task_id}", json={"status": "done"}, headers=alice)
+    assert response.status_code == 404
@@ -0,0 +1,134 @@
+from app import models, schemas
+
+
+def _project(db, owner, members=()):
+    project = models.Project(name="Board", owners=[owner], members=list(members))
+    db.add(project)
+    db.commit()
+    return project.id
+
+
+def test_search_ranks_titles_above_descriptions_and_comments(client, db, make_user):
+    _, alice = make_user("alice")
+    project_id = _project(db, "alice")
+    in_title = models.Task(title="Fix invoice rounding", created_by="alice", project_id=project_id)
+    in_description = models.Task(title="Billing cleanup", description="rounding on the invoice totals",
+                                 created_by="alice", project_id=project_id)
+    unrelated = models.Task(title="Write release notes", created_by="alice", project_id=project_id)
+    db.add_all([in_title, in_description, unrelated])
+    db.flush()
+    db.add(models.Comment(task_id=unrelated.id, content="the invoices are still rounded wrong", author="alice"))
+    db.commit()
+
+    body = client.get("/search", params={"q": "invoice rounding"}, headers=alice).json()
+    assert [(hit["type"], hit["title"]) for hit in body["items"]] == [
+        ("task", "Fix invoice rounding"), ("task", "Billing cleanup"), ("comment", "Write release notes"),
+    ]
+    assert body["items"][2]["task_id"] == str(unrelated.id)
+    assert "<mark>invoices</mark>" in body["items"][2]["snippet"]
+    assert body["next_cursor"] is None
+
+    only_comments = client.get("/search", params={"q": "invoice", "type": "comment"}, headers=alice).json()
+    assert [hit["type"] for hit in only_comments["items"]] == ["comment"]
+    phrase = client.get("/search", params={"q": '"invoice totals" -fix'}, headers=alice).json()
+    assert [hit["title"] for hit in phrase["items"]] == ["Billing cleanup"]
+
+
+def test_search_only_returns_visible_tasks(client, db, make_user):
+    _, alice = make_user("alice")
+    _, bob = make_user("bob")
+    _, admin = make_user("root", role="admin")
+    mine, theirs = _project(db, "alice"), _project(db, "carol")
+    db.add_all([
+        models.Task(title="Migrate database", created_by="alice", project_id=mine),
+        models.Task(title="Database backups", created_by="carol", project_id=theirs),
+        models.Task(title="Database failover", created_by="carol", project_id=theirs, assignee="bob"),
+    ])
+    db.commit()
+
+    def titles(headers, **params):
+        items = client.get("/search", params={"q": "database", **params}, headers=headers).json()["items"]
+        return sorted(hit["title"] for hit in items)
+
+    assert titles(alice) == ["Migrate database"]
+    assert titles(bob) == ["Database failover"]
+    assert titles(admin) == ["Database backups", "Database failover", "Migrate database"]
+    assert titles(admin, project_id=str(mine)) == ["Migrate database"]
+    assert titles(admin, assignee="bob") == ["Database failover"]
+
+
+def test_search_pages_with_cursor(client, db, make_user):
+    _, alice = make_user("alice")
+    project_id = _project(db, "alice")
+    db.add_all([
+        models.Task(title=f"Deploy service {i}", description="deploy " * i, created_by="alice", project_id=project_id)
+        for i in range(7)
+    ])
+    db.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": "deploy", "limit": 3, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/search", params=params, headers=alice).json()
+        seen += body["items"]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert len(seen) == len({hit["id"] for hit in seen}) == 7
+    ranks = [hit["rank"] for hit in seen]
+    assert ranks == sorted(ranks, reverse=True)
+    assert client.get("/search", params={"q": "deploy", "cursor": "junk"}, headers=alice).status_code == 400
+
+
+def test_search_pages_through_tied_ranks(client, db, make_user):
+    _, alice = make_user("alice")
+    project_id = _project(db, "alice")
+    db.add_all([models.Task(title="Deploy service", created_by="alice", project_id=project_id) for _ in range(7)])
+    db.commit()
+
+    seen, cursor = [], None
+    for _ in range(10):
+        params = {"q": "deploy", "limit": 3, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/search", params=params, headers=alice).json()
+        seen += [hit["id"] for hit in body["items"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert cursor is None
+    assert len(seen) == len(set(seen)) == 7
+
+
+def test_search_snippets_escape_user_markup(client, db, make_user):
+    _, alice = make_user("alice")
+    project_id = _project(db, "alice")
+    db.add(models.Task(title="<img src=x onerror=alert(1)> deploy", description="deploy <b>now</b> \x02",
+                       created_by="alice", project_id=project_id))
+    db.commit()
+
+    (hit,) = client.get("/search", params={"q": "deploy"}, headers=alice).json()["items"]
+    assert "<mark>deploy</mark>" in hit["snippet"]
+    assert "&gt;" in hit["snippet"]
+    markup = hit["snippet"].replace("<mark>", "").replace("</mark>", "")
+    assert "<" not in markup and ">" not in markup and "\x02" not in markup
+
+
+def test_search_skips_hits_deleted_before_their_snippets(db, make_user, monkeypatch):
+    from app.repository import search as search_repo
+
+    user, _ = make_user("alice")
+    project_id = _project(db, "alice")
+    kept, deleted = (models.Task(title=f"Rotate keys {i}", created_by="alice", project_id=project_id)
+                     for i in range(2))
+    db.add_all([kept, deleted])
+    db.commit()
+
+    with_snippets = search_repo._with_snippets
+
+    def delete_then_fetch(session, rows, tsquery):
+        session.delete(deleted)
+        session.flush()
+        return with_snippets(session, rows, tsquery)
+
+    monkeypatch.setattr(search_repo, "_with_snippets", delete_then_fetch)
+    items, _ = search_repo.search(db, user, "rotate", schemas.SearchFilters())
+    assert [item["id"] for item in items] == [kept.id]
@@ -0,0 +1,25 @@
+import os
+import subprocess
+import sys
+
+# Imports the app and runs its lifespan with nothing listening on the
+# database port: neither may touch the database
+OFFLINE_STARTUP = """
+from starlette.testclient import TestClient
+from app.main import app
+
+with TestClient(app) as client:
+    assert client.get("/no-such-route").status_code == 404
+print("started")
+"""
+
+
+def test_worker_starts_without_database():
+    env = dict(os.environ, DATABASE_URL="postgresql://postgres@127.0.0.1:9/taskhub", DATABASE_REPLICA_URL="")
+    result = subprocess.run(
+        [sys.executable, "-c", OFFLINE_STARTUP], env=env, capture_output=True, text=True, timeout=60,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().endswith("started")
+
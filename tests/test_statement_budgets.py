@@ -0,0 +1,57 @@
+import pytest
+
+from app import models
+
+# Statements per request must not grow with the data: each endpoint runs
+# against a small and a larger dataset under the same budget.
+SIZES = [2, 25]
+
+
+def _seed(db, size):
+    projects = [models.Project(name=f"P{i}", owners=["alice"], members=["bob"]) for i in range(size)]
+    db.add_all(projects)
+    db.flush()
+    tasks = [
+        models.Task(title=f"Deploy step {i}", created_by="alice", project_id=projects[i % size].id,
+                    assignee="bob" if i % 2 else None)
+        for i in range(size * 4)
+    ]
+    db.add_all(tasks)
+    db.flush()
+    db.add_all(models.Comment(task_id=task.id, content="deploy note", author="bob") for task in tasks for _ in range(2))
+    db.commit()
+    return projects[0].id, tasks[0].id
+
+
+ENDPOINTS = [
+    # (url, budget); a warm principal cache, so no user lookup
+    ("/projects", 2),
+    ("/projects?include=tasks", 3),
+    ("/tasks", 1),
+    ("/projects/{project_id}", 3),
+    ("/projects/{project_id}/tasks", 2),
+    ("/projects/{project_id}/members", 3),
+    ("/projects/{project_id}/tasks/{task_id}/comments", 2),
+    ("/projects/{project_id}/tasks-with-comment-count", 2),
+    ("/search?q=deploy", 3),
+]
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("url, budget", ENDPOINTS)
+def test_list_endpoints_stay_within_statement_budget(client, db, make_user, max_statements, size, url, budget):
+    _, alice = make_user("alice")
+    project_id, task_id = _seed(db, size)
+    url = url.format(project_id=project_id, task_id=task_id)
+    client.get("/projects", headers=alice)  # warm the principal cache
+
+    with max_statements(budget):
+        response = client.get(url, headers=alice)
+    assert response.status_code == 200
+
+
+def test_responses_report_statements_and_db_time(client, make_user):
+    _, alice = make_user("alice")
+    response = client.get("/projects", headers=alice)
+    assert response.headers["x-db-statements"] == "2"  # user, projects
+    assert float(response.headers["x-db-time-ms"]) > 0
@@ -0,0 +1,81 @@
+import uuid
+
+from app import models
+
+
+def _project(db, owner, members=()):
+    project = models.Project(name="Board", owners=[owner], members=list(members))
+    db.add(project)
+    db.commit()
+    return project.id
+
+
+def test_batch_create_checks_each_project_once(client, db, make_user, count_queries):
+    _, alice = make_user("alice")
+    mine, other = _project(db, "alice"), _project(db, "bob")
+    items = [{"title": f"T{i}", "project_id": str(mine)} for i in range(50)]
+    items += [{"title": "nope", "project_id": str(other)}, {"title": "gone", "project_id": str(uuid.uuid4())}]
+
+    client.get("/projects", headers=alice)  # warm the principal cache
+    with count_queries() as statements:
+        response = client.post("/tasks/batch", json={"items": items}, headers=alice)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["applied"] == 50
+    assert [r["status"] for r in body["results"]] == [201] * 50 + [403, 404]
+    # access for both projects, one multi-row INSERT, version bump, NOTIFY
+    assert len(statements) == 4
+
+    assert db.query(models.Task).filter_by(project_id=mine, created_by="alice").count() == 50
+    assert db.get(models.Project, mine).version == 2
+    assert client.post("/tasks/batch", json={"items": []}, headers=alice).status_code == 422
+
+
+def test_batch_update_applies_partial_changes_per_item(client, db, make_user):
+    _, alice = make_user("alice")
+    _, bob = make_user("bob")
+    project_id = _project(db, "alice", members=["bob"])
+    tasks = [
+        models.Task(title="a", created_by="alice", project_id=project_id, priority="low"),
+        models.Task(title="b", created_by="alice", project_id=project_id, assignee="bob"),
+        models.Task(title="c", created_by="alice", project_id=project_id),
+    ]
+    db.add_all(tasks)
+    db.commit()
+    a, b, c = (t.id for t in tasks)
+
+    items = [{"id": str(a), "status": "done"}, {"id": str(b), "title": "B"}, {"id": str(c), "status": "done"},
+             {"id": str(uuid.uuid4()), "status": "done"}]
+    body = client.patch("/tasks/batch", json={"items": items}, headers=bob).json()
+    assert [r["status"] for r in body["results"]] == [403, 200, 403, 404]
+
+    body = client.patch("/tasks/batch", json={"items": items[:1] + items[2:3]}, headers=alice).json()
+    assert body["applied"] == 2
+
+    db.expire_all()
+    assert [(t.title, t.status, t.priority) for t in (db.get(models.Task, i) for i in (a, b, c))] == [
+        ("a", "done", "low"), ("B", "pending", "medium"), ("c", "done", "medium"),
+    ]
+
+
+def test_transition_updates_matching_tasks_in_one_statement(client, db, make_user, count_queries):
+    _, alice = make_user("alice")
+    _, bob = make_user("bob")
+    project_id = _project(db, "alice", members=["bob"])
+    db.add_all([
+        models.Task(title="a", created_by="alice", project_id=project_id, priority="high"),
+        models.Task(title="b", created_by="alice", project_id=project_id, priority="high", status="done"),
+        models.Task(title="c", created_by="alice", project_id=project_id, priority="low"),
+    ])
+    db.commit()
+    url = f"/projects/{project_id}/tasks/transition"
+    payload = {"filters": {"priority": "high"}, "to_status": "done"}
+
+    assert client.post(url, json=payload, headers=bob).status_code == 403
+    client.get("/projects", headers=alice)
+    with count_queries() as statements:
+        assert client.post(url, json=payload, headers=alice).json() == {"updated": 1}
+    assert sum(s.startswith("UPDATE tasks") for s in statements) == 1
+
+    statuses = dict(db.query(models.Task.title, models.Task.status).filter_by(project_id=project_id))
+    assert statuses == {"a": "done", "b": "done", "c": "pending"}
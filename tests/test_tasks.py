@@ -0,0 +1,98 @@
+from app import models
+
+
+def _make_project(db, owners=(), members=()):
+    project = models.Project(name="Board", owners=list(owners), members=list(members))
+    db.add(project)
+    db.commit()
+    return project
+
+
+def _make_tasks(db, project, count, assignee=None):
+    db.add_all(
+        models.Task(title=f"Task {i}", created_by="seed", project_id=project.id, assignee=assignee)
+        for i in range(count)
+    )
+    db.commit()
+
+
+def test_list_tasks_visibility(client, db, make_user):
+    _, alice = make_user("alice")
+    _, bob = make_user("bob")
+    _, carol = make_user("carol")
+    _, admin = make_user("root", role="admin")
+
+    owned = _make_project(db, owners=["alice"], members=["bob"])
+    other = _make_project(db, owners=["dave"])
+    _make_tasks(db, owned, 2)
+    _make_tasks(db, other, 1, assignee="carol")
+    _make_tasks(db, other, 1)
+
+    assert len(client.get("/tasks", headers=alice).json()["items"]) == 2
+    assert len(client.get("/tasks", headers=bob).json()["items"]) == 2
+    assert len(client.get("/tasks", headers=carol).json()["items"]) == 1
+    assert len(client.get("/tasks", headers=admin).json()["items"]) == 4
+
+
+def test_list_tasks_query_count_is_constant(client, db, make_user, count_queries):
+    _, alice = make_user("alice")
+    project = _make_project(db, owners=["alice"])
+    _make_tasks(db, project, 3)
+    client.get("/tasks", headers=alice)  # warm the principal cache
+
+    with count_queries() as small:
+        assert len(client.get("/tasks", headers=alice).json()["items"]) == 3
+
+    _make_tasks(db, _make_project(db, members=["alice"]), 40)
+    _make_tasks(db, _make_project(db, owners=["dave"]), 40)
+
+    with count_queries() as large:
+        assert len(client.get("/tasks", headers=alice).json()["items"]) == 43
+
+    assert len(large) == len(small)
+
+
+def test_project_tasks_keyset_pagination(client, db, make_user):
+    _, alice = make_user("alice")
+    project = _make_project(db, owners=["alice"])
+    _make_tasks(db, project, 7)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, "sort": "-created_at"}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get(f"/projects/{project.id}/tasks", params=params, headers=alice).json()
+        seen.extend(t["id"] for t in page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert len(seen) == len(set(seen)) == 7
+
+    response = client.get(f"/projects/{project.id}/tasks", params={"cursor": "bogus"}, headers=alice)
+    assert response.status_code == 400
+
+
+def test_project_tasks_filters(client, db, make_user):
+    _, alice = make_user("alice")
+    project = _make_project(db, owners=["alice"])
+    _make_tasks(db, project, 2, assignee="bob")
+    _make_tasks(db, project, 3)
+
+    page = client.get(f"/projects/{project.id}/tasks", params={"assignee": "bob"}, headers=alice).json()
+    assert [t["assignee"] for t in page["items"]] == ["bob", "bob"]
+    assert page["next_cursor"] is None
+
+
+def test_update_task_changes_only_given_fields(client, db, make_user):
+    _, alice = make_user("alice")
+    project = _make_project(db, owners=["alice"])
+    task = models.Task(title="Keep me", priority="high", created_by="alice", project_id=project.id)
+    db.add(task)
+    db.commit()
+
+    response = client.put(f"/tasks/{task.id}", json={"description": "More detail"}, headers=alice)
+    assert response.status_code == 200
+    assert (response.json()["title"], response.json()["priority"]) == ("Keep me", "high")
+    assert response.json()["description"] == "More detail"